@@ -9,14 +9,26 @@ from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QVBoxLayout, QLa
 from PyQt5.QtCore import QTimer
 from PyQt5.QtGui import QPixmap
 from uuid import uuid4
+import os
+import json
+from event_bus import EventBus, FaceEntered, FaceLeft, SummaryReady, connect_bridge
+from outbox import Outbox
+import face_quality
+import face_detectors
+import face_embeddings
 
 
 # Get a reference to the webcam
 video_capture = cv2.VideoCapture(0)
 
+# FACE_EMBEDDER picks dlib (default) or an ONNX Runtime model; both match at distance 0.6
+embedder = face_embeddings.get_embedder()
+
 # Load known face
 obama_image = face_recognition.load_image_file("chanakya.jpg")
-obama_face_encoding = face_recognition.face_encodings(obama_image)[0]
+obama_locations = face_recognition.face_locations(obama_image)
+obama_face_encoding = embedder.face_encodings(
+    obama_image, obama_locations, face_recognition.face_landmarks(obama_image, obama_locations, model="small"))[0]
 
 # Initialize known faces
 known_face_encodings = [obama_face_encoding]
@@ -33,15 +45,30 @@ recordings = {}
 display_names = True
 display_remainder_modal = False
 button_pressed_time = None
-remainder_modal_start_time = None
+reminder_text = None  # Latest reminder pushed by the backend
+pending_reminder = False
 relationship_info = {known_face_uuid[0]: "Friend", "no_face" : "no_relationship"}
 latest_summary = {known_face_uuid[0]: "Sample chanakya summary", "no_face" : "no_summary"}
 uuid_url = {known_face_uuid[0]: "Ignore this url", "no_face" : "no_url"}
-once = 0
 count = 0
 current_uuid = None
 
 
+# FACE_DETECTOR picks the backend (hog, haar, yunet); FACE_MIN_PX the smallest face to find
+detector = face_detectors.get_detector()
+
+# Unknown faces are grouped by encoding distance and enrolled once, from their best crop
+enrollment = face_quality.EnrollmentTracks(
+    lambda a, b: face_recognition.face_distance([a], b)[0], threshold=0.6, min_sightings=2)
+
+
+def face_crop(frame, location, margin=0.3):
+    """The face at `location` cut from the frame, with some margin."""
+    top, right, bottom, left = location
+    pad_y, pad_x = int((bottom - top) * margin), int((right - left) * margin)
+    return frame[max(0, top - pad_y):bottom + pad_y, max(0, left - pad_x):right + pad_x].copy()
+
+
 # Video Processing
 def process_video_frame():
     global face_locations, current_uuid, face_encodings, face_names, frame_c, process_this_frame, display_remainder_modal, count
@@ -51,14 +78,24 @@ def process_video_frame():
         frame_c += 1
 
         if process_this_frame:
-            small_frame = cv2.resize(frame, (0, 0), fx=0.25, fy=0.25)
-            rgb_small_frame = small_frame[:, :, ::-1]
-
-            face_locations = face_recognition.face_locations(rgb_small_frame)
-            face_encodings = face_recognition.face_encodings(rgb_small_frame, face_locations)
+            rgb_frame = np.ascontiguousarray(frame[:, :, ::-1])
+
+            # Coarse pass on a downscaled copy, refined at full resolution (see face_detectors)
+            face_locations = face_detectors.detect(detector, frame)
+            # Score each face (size, blur and exposure, pose from 5-point landmarks)
+            # before paying for the encoder; poor crops are skipped
+            landmarks = face_recognition.face_landmarks(rgb_frame, face_locations, model="small")
+            good = []
+            for location, marks in zip(face_locations, landmarks):
+                quality = face_quality.assess(frame, location, marks)
+                if quality.ok:
+                    good.append((location, quality, marks))
+                else:
+                    print(f"Skipped face: {', '.join(quality.reasons)}")
+            face_encodings = embedder.face_encodings(rgb_frame, [g[0] for g in good], [g[2] for g in good])
             face_uuids = []
             name = "no_face"
-            for face_encoding in face_encodings:
+            for (location, quality, _), face_encoding in zip(good, face_encodings):
                 matches = face_recognition.compare_faces(known_face_encodings, face_encoding)
                 uuid = None;
                 face_distances = face_recognition.face_distance(known_face_encodings, face_encoding)
@@ -68,17 +105,9 @@ def process_video_frame():
                         uuid = known_face_uuid[best_match_index]
 
                 if not uuid:
-                    count += 1
-                    new_uuid = str(uuid4());
-                    name = f"New Person {count}"
-                    known_face_encodings.append(face_encoding)
-                    known_face_uuid.append(new_uuid)
-                    uuid_to_name[new_uuid] = name;
-                    relationship_info[str(new_uuid)] = "Unknown"
-                    latest_summary[str(new_uuid)] = "Unknown"
-                    uuid = new_uuid
-                    save_unknown_face(frame, uuid)
-                    display_unknown_face(frame)
+                    # Enrolled from the best of a few sightings, see below
+                    enrollment.add(face_encoding, quality, face_crop(frame, location))
+                    continue
                 
                 current_uuid = uuid;
                 face_uuids.append(str(uuid))
@@ -87,6 +116,19 @@ def process_video_frame():
                     recordings[str(uuid)] = 1
                     break;
 
+            for track in enrollment.ready():
+                face_encoding, quality, crop = track["best"]
+                count += 1
+                new_uuid = str(uuid4());
+                name = f"New Person {count}"
+                known_face_encodings.append(face_encoding)
+                known_face_uuid.append(new_uuid)
+                uuid_to_name[new_uuid] = name;
+                relationship_info[str(new_uuid)] = "Unknown"
+                latest_summary[str(new_uuid)] = "Unknown"
+                save_unknown_face(crop, new_uuid)
+                display_unknown_face(crop)
+
             for rec in list(recordings.keys()):
                 if rec not in face_uuids:
                     recordings[rec] += 1
@@ -134,7 +176,7 @@ def add_remainder_modal(frame):
     cv2.rectangle(overlay, (x1, y1), (x2, y2), (0, 0, 0), -1)
     cv2.addWeighted(overlay, 0.6, frame, 0.4, 0, frame)
     cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 255, 255), 2)
-    cv2.putText(frame, "Reminder: Take Medicines", (x1 + 10, y1 + 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+    cv2.putText(frame, f"Reminder: {reminder_text}", (x1 + 10, y1 + 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
 
 def save_unknown_face(frame, uuid):
     # Generate a unique filename using the current timestamp
@@ -150,46 +192,83 @@ def save_unknown_face(frame, uuid):
 #     cv2.imwrite(unknown_image_path, frame)  # Save the frame as an image
 #     print("Saved and displayed unknown face image.")
 
+# With EVENT_BUS_PORT set, talk to speech_api.py over the local event bus instead of the ngrok URL
+bus = None
+if os.getenv("EVENT_BUS_PORT"):
+    bus = EventBus()
+    connect_bridge(bus, port=int(os.getenv("EVENT_BUS_PORT")))
+    bus.on(SummaryReady, lambda event: apply_summary(event.session_id, event.summary))
+
+# Backend writes are queued on disk and synced in batches, so nothing is lost while offline
+outbox = Outbox()
+if os.getenv("USER_EMAIL"):
+    outbox.start_sync("https://recall-backend-5rw5.onrender.com", os.getenv("USER_EMAIL"))
+else:
+    print("USER_EMAIL not set; relations and summaries are kept in the outbox until it is")
+
 def trigger_recording_api(id):
     print("Starting recording for", id);
+    if bus is not None:
+        bus.publish(FaceEntered(str(id), uuid_to_name.get(id, "Unknown")))
+        return
     payload = {"Task": "start_recording", "id": str(id)}
-    requests.post("https://62e5-66-180-180-18.ngrok-free.app/trigger-recording", json=payload)
+    try:
+        requests.post("https://62e5-66-180-180-18.ngrok-free.app/trigger-recording", json=payload, timeout=10)
+    except requests.RequestException as e:
+        print(f"Could not start recording for {id}: {e}")
 
 def trigger_stop_recording_api(id):
     global name, relationship_info, latest_summary
     print("Stopping recording for", id);
+    if bus is not None:
+        bus.publish(FaceLeft(str(id)))  # The summary arrives as a SummaryReady event
+        return
     payload = {"Task": "stop_recording", "id": str(id)}
-    response = requests.post("https://62e5-66-180-180-18.ngrok-free.app/trigger-recording", json=payload)
-    json_response = response.json()
-    print(json_response);
     try:
-        resp_relationship = json_response['ai_response']['Relationship']
-        resp_summary = json_response['ai_response']['convo_summary']
-        resp_name = json_response['ai_response']['name']
-        if resp_name != "no_name":
-            uuid_to_name[id] = resp_name
-        latest_summary[id] = resp_summary
-        relationship_info[id] = resp_relationship
-        data = {
-            "relation" : {
-                "id": id,
-                "name": uuid_to_name[id],
-                "relationship": relationship_info[id],
-                "photo": uuid_url[id],
-            }
-        }
-        response = requests.post("https://recall-backend-5rw5.onrender.com/add-relation", json=data)
-        print("Add Relation:",str(response.json()))
-
-        data = {
-            "relation_id": id,
-            "message": latest_summary[id],
+        response = requests.post("https://62e5-66-180-180-18.ngrok-free.app/trigger-recording", json=payload, timeout=10)
+        json_response = response.json()
+        print(json_response);
+        if "job_id" in json_response:
+            json_response = wait_for_summary(json_response["job_id"])
+    except (requests.RequestException, ValueError) as e:
+        print(f"Could not stop recording for {id}: {e}")
+        return
+    apply_summary(id, json_response.get('ai_response'))
+
+def apply_summary(id, ai_response):
+    try:
+        resp_relationship = ai_response['Relationship']
+        resp_summary = ai_response['convo_summary']
+        resp_name = ai_response['name']
+    except (KeyError, TypeError) as e:
+        print(f"No summary for {id}: {e}")
+        return
+    if resp_name != "no_name":
+        uuid_to_name[id] = resp_name
+    latest_summary[id] = resp_summary
+    relationship_info[id] = resp_relationship
+    outbox.add("relation", {
+        "relation" : {
+            "id": id,
+            "name": uuid_to_name.get(id, "Unknown"),
+            "relationship": relationship_info[id],
+            "photo": uuid_url.get(id),
         }
-        response = requests.post("https://recall-backend-5rw5.onrender.com/message/add", json=data)
-        print("Message Add:", str(response.json()));
-    except:
-        print("No message")
-        pass
+    })
+    outbox.add("message", {"relation_id": id, "message": latest_summary[id]})
+    print(f"Queued summary for {id} ({len(outbox)} events pending)")
+
+def wait_for_summary(job_id, interval=1, timeout=60):
+    # Summaries are produced asynchronously by the speech API; poll until the job finishes
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = requests.get(f"https://62e5-66-180-180-18.ngrok-free.app/summary-job/{job_id}").json()
+        if job.get("status") == "done":
+            return {"ai_response": job["result"]}
+        if job.get("status") == "failed":
+            break
+        time.sleep(interval)
+    return {}
 
 def upload_to_imgur(img_path):
     import base64
@@ -213,24 +292,41 @@ def upload_to_imgur(img_path):
         return None
 
 def toggle_modal_visibility():
-    global display_names, button_pressed_time, remainder_modal_start_time, once, current_uuid
+    global display_names, button_pressed_time, current_uuid
     threading.Thread(target=trigger_count_api, args=(current_uuid,)).start()
     display_names = not display_names
     button_pressed_time = time.time()
-    remainder_modal_start_time = button_pressed_time + 3
-    once += 1
 
 def trigger_count_api(current):
-    data = {
-        "relation_id": current,
-    }
-    response = requests.post("https://recall-backend-5rw5.onrender.com/count", json=data)
-    print("Count: ", str(response.json()));
+    if current is not None:
+        outbox.add("count", {"relation_id": current})
 
 
+def listen_for_reminders(email):
+    """Follows the backend's event stream and queues each due reminder for the modal."""
+    global reminder_text, pending_reminder
+    while True:
+        try:
+            with requests.get("https://recall-backend-5rw5.onrender.com/events", params={"email": email}, stream=True, timeout=(10, 60)) as response:
+                event = None
+                for line in response.iter_lines(decode_unicode=True):
+                    if line.startswith("event: "):
+                        event = line[7:]
+                    elif line.startswith("data: ") and event == "reminder":
+                        reminder_text = json.loads(line[6:])["message"]
+                        pending_reminder = True
+        except requests.RequestException as e:
+            print(f"Reminder stream disconnected: {e}")
+        time.sleep(5)
+
+# With USER_EMAIL set, show that user's reminders as they fall due
+if os.getenv("USER_EMAIL"):
+    threading.Thread(target=listen_for_reminders, args=(os.getenv("USER_EMAIL"),), daemon=True).start()
+
 def check_modal_timers():
-    global display_remainder_modal, remainder_modal_start_time, once
-    if once == 1 and remainder_modal_start_time and time.time() >= remainder_modal_start_time:
+    global display_remainder_modal, pending_reminder
+    if pending_reminder:
+        pending_reminder = False
         display_remainder_modal = True
         QTimer.singleShot(5000, hide_remainder_modal)
 
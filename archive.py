@@ -0,0 +1,187 @@
+import datetime
+import json
+import os
+import threading
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zlib is always available; zstd compresses better and faster
+    zstandard = None
+
+HOT_DAYS = int(os.getenv("TRANSCRIPT_HOT_DAYS", "90"))
+COMPACT_INTERVAL = float(os.getenv("COMPACT_INTERVAL_S", str(6 * 3600)))
+
+
+def pack(transcripts: dict):
+    """(codec, blob) for a {conversation_id: transcript} map."""
+    raw = json.dumps(transcripts, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=10).compress(raw)
+    return "zlib", zlib.compress(raw, 9)
+
+
+def unpack(codec: str, blob: bytes) -> dict:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Segment is zstd-compressed; install zstandard to read it")
+        raw = zstandard.ZstdDecompressor().decompress(blob)
+    else:
+        raw = zlib.decompress(blob)
+    return json.loads(raw)
+
+
+def segment(timestamp: str) -> str:
+    """Archive segment (month) a conversation belongs to."""
+    return timestamp[:7]
+
+
+def cold_transcripts(user: dict, cutoff: str) -> dict:
+    """{relation_id: {month: {conversation_id: transcript}}} for hot transcripts older than `cutoff`."""
+    cold = {}
+    for relation in user.get("relations", []):
+        for conversation in relation.get("conversations", []):
+            if conversation.get("transcript") and conversation.get("timestamp", "") < cutoff:
+                months = cold.setdefault(relation["id"], {})
+                months.setdefault(segment(conversation["timestamp"]), {})[conversation["id"]] = conversation["transcript"]
+    return cold
+
+
+def store(db, email: str, relation_id: str, month: str, transcripts: dict, retries=5):
+    """
+    Merges transcripts into one archive segment. Segments carry a version so
+    two compactors writing the same one retry instead of losing each other's
+    transcripts.
+    """
+    from pymongo.errors import DuplicateKeyError
+
+    key = {"email": email, "relation_id": relation_id, "month": month}
+    for _ in range(retries):
+        existing = db.transcript_archive.find_one(key)
+        merged = dict(unpack(existing["codec"], existing["data"]), **transcripts) if existing else transcripts
+        codec, blob = pack(merged)
+        fields = {"codec": codec, "data": blob, "count": len(merged)}
+        if existing is None:
+            try:
+                db.transcript_archive.insert_one({**key, **fields, "version": 1})
+                return
+            except DuplicateKeyError:
+                continue
+        result = db.transcript_archive.update_one({**key, "version": existing["version"]},
+                                                  {"$set": fields, "$inc": {"version": 1}})
+        if result.matched_count:
+            return
+    raise RuntimeError(f"Archive segment {key} kept changing; giving up")
+
+
+def fetch(db, email: str, relation_id: str, conversation: dict):
+    """The transcript of an archived conversation, or None if it isn't in the archive."""
+    doc = db.transcript_archive.find_one({"email": email, "relation_id": relation_id, "month": conversation.get("archived")})
+    if doc is None:
+        return None
+    return unpack(doc["codec"], doc["data"]).get(conversation["id"])
+
+
+def compact(db, hot_days=HOT_DAYS, now=None) -> int:
+    """
+    Moves transcripts older than `hot_days` out of user documents into
+    compressed monthly segments in db.transcript_archive. Summaries, counts and
+    rollups stay in place; archived conversations get "archived": <month>.
+    Each segment is written before the transcripts are removed, so an
+    interrupted run loses nothing and the next run picks up where it stopped.
+    Returns the number of transcripts moved.
+    """
+    from pymongo import UpdateOne
+
+    cutoff = ((now or datetime.datetime.now()) - datetime.timedelta(days=hot_days)).isoformat()
+    query = {"relations.conversations": {"$elemMatch": {"timestamp": {"$lt": cutoff}, "transcript": {"$type": "string", "$ne": ""}}}}
+    moved = 0
+    for user in db.users.find(query, {"email": 1, "relations.id": 1, "relations.conversations": 1}):
+        ops = []
+        for relation_id, months in cold_transcripts(user, cutoff).items():
+            for month, transcripts in months.items():
+                store(db, user["email"], relation_id, month, transcripts)
+                ops.append(UpdateOne(
+                    {"_id": user["_id"]},
+                    {"$unset": {"relations.$[r].conversations.$[c].transcript": ""},
+                     "$set": {"relations.$[r].conversations.$[c].archived": month}},
+                    array_filters=[{"r.id": relation_id}, {"c.id": {"$in": list(transcripts)}}],
+                ))
+                moved += len(transcripts)
+        if ops:
+            db.users.bulk_write(ops, ordered=False)
+    return moved
+
+
+def start_compaction(db, interval=COMPACT_INTERVAL, hot_days=HOT_DAYS) -> threading.Thread:
+    """
+    Runs compact() on a daemon thread every `interval` seconds, along with
+    relation_stats.prune() so daily rollup buckets don't grow without bound.
+    """
+    from pymongo.errors import PyMongoError
+    from relation_stats import prune
+
+    def run():
+        while True:
+            try:
+                start = time.time()
+                moved = compact(db, hot_days)
+                if moved:
+                    print(f"Archived {moved} transcripts in {time.time() - start:.1f}s")
+                pruned = prune(db)
+                if pruned:
+                    print(f"Pruned old daily stats from {pruned} relations")
+            except (PyMongoError, RuntimeError) as e:
+                print(f"Transcript compaction failed: {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="transcript-compaction", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    # Measurement: hot user-document size over simulated years, with and
+    # without retention, plus archive size and the cost of an on-demand fetch.
+    # Transcripts are drawn from a Zipf-distributed vocabulary so they compress
+    # roughly like speech rather than like repeated text.
+    import random
+    import bson
+
+    rng = random.Random(0)
+    vocabulary = ["".join(rng.choice("etaoinshrdlucmfwypvbgkjqxz") for _ in range(rng.randint(2, 9))) for _ in range(5000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+
+    def transcript():
+        return " ".join(rng.choices(vocabulary, weights, k=rng.randint(80, 400)))
+
+    now = datetime.datetime(2026, 10, 18)
+    cutoff = (now - datetime.timedelta(days=HOT_DAYS)).isoformat()
+    relations = [{"id": str(i), "name": f"Person {i}", "relationship": "Friend", "conversations": []} for i in range(8)]
+    user = {"_id": bson.ObjectId(), "email": "a@example.com", "relations": relations}
+    print(f"codec: {'zstd' if zstandard else 'zlib'}, hot window {HOT_DAYS} days, 8 relations, 3 conversations a day")
+    for year in range(1, 6):
+        for day in range(365 * (year - 1), 365 * year):
+            for visit in range(3):
+                when = (now - datetime.timedelta(days=365 * 5 - day, hours=visit * 4)).isoformat()
+                rng.choice(relations)["conversations"].append({"id": f"{day}.{visit}", "timestamp": when, "transcript": transcript(), "summary": transcript()[:200]})
+        last = now - datetime.timedelta(days=365 * (5 - year))
+        cut = (last - datetime.timedelta(days=HOT_DAYS)).isoformat()
+        cold = cold_transcripts(user, cut)
+        hot = {**user, "relations": [{**r, "conversations": [
+            c if c["timestamp"] >= cut else {k: v for k, v in c.items() if k != "transcript"} | {"archived": segment(c["timestamp"])}
+            for c in r["conversations"]]} for r in relations]}
+        start = time.perf_counter()
+        segments = [pack(t)[1] for months in cold.values() for t in months.values()]
+        pack_s = time.perf_counter() - start
+        raw = sum(len(t.encode()) for months in cold.values() for m in months.values() for t in m.values())
+        print(f"year {year}: no retention {len(bson.encode(user)) / 1e6:6.2f} MB | hot {len(bson.encode(hot)) / 1e6:5.2f} MB"
+              f" + archive {sum(map(len, segments)) / 1e6:5.2f} MB ({raw / max(1, sum(map(len, segments))):.1f}x, "
+              f"{len(segments)} segments, packed in {pack_s:.2f}s)")
+
+    codec, blob = pack(max((t for months in cold.values() for t in months.values()), key=len))
+    start = time.perf_counter()
+    for _ in range(100):
+        unpack(codec, blob)
+    print(f"fetch: unpacking one monthly segment ({len(blob) / 1e3:.0f} kB) takes {(time.perf_counter() - start) * 10:.2f} ms")
@@ -0,0 +1,166 @@
+"""
+Single entry point for the whole assistant.
+
+    python assistant.py --profile backend         # API server only
+    python assistant.py --profile full            # API + speech + face recognition
+    python assistant.py --with backend,speech     # pick components explicitly
+    python assistant.py --profile full --measure  # report startup time and memory, then exit
+    python assistant.py --compare                 # --measure for every profile, each in a fresh process
+    python assistant.py --importtime              # fail if the API modules import slower than their budget
+
+Heavy libraries (speech_recognition, Gemini, DeepFace, faiss, OpenCV) are only
+imported when the component that needs them is enabled. Components run in one
+process and share the event bus and HTTP connections instead of talking to
+each other over ngrok.
+"""
+import time
+
+STARTED = time.perf_counter()
+
+import argparse
+import asyncio
+import importlib
+import os
+import resource
+import subprocess
+import sys
+import threading
+
+COMPONENTS = ["backend", "speech", "video"]  # Load order: later components reuse earlier ones
+PROFILES = {
+    "backend": ["backend"],
+    "speech": ["backend", "speech"],
+    "full": ["backend", "speech", "video"],
+}
+
+
+class Assistant:
+    def __init__(self, components, host="127.0.0.1"):
+        self.components = [c for c in COMPONENTS if c in components]
+        self.host = host
+        self.stop_event = threading.Event()
+        self.bus = None
+        self.servers = []
+        self.threads = []
+
+    def load(self):
+        for name in self.components:
+            start = time.perf_counter()
+            getattr(self, f"_load_{name}")()
+            print(f"Loaded {name} in {time.perf_counter() - start:.2f}s")
+
+    def _server(self, app, port):
+        import uvicorn
+        return uvicorn.Server(uvicorn.Config(app, host=self.host, port=port, log_level="info"))
+
+    def _load_backend(self):
+        main = importlib.import_module("main")
+        self.servers.append(self._server(main.app, 8000))
+
+    def _load_speech(self):
+        if "backend" in self.components:
+            # Summaries go straight to the in-process backend
+            os.environ.setdefault("BACKEND_URL", f"http://{self.host}:8000")
+        speech_api = importlib.import_module("speech_api")
+        self.bus = speech_api.bus
+        self.servers.append(self._server(speech_api.app, 8001))
+
+    def _load_video(self):
+        if self.bus is None:
+            from event_bus import EventBus
+            self.bus = EventBus()
+        video = importlib.import_module("video")
+        # Face events reach the speech sessions directly through the shared bus
+        self.threads.append(threading.Thread(target=video.video, args=(self.bus, self.stop_event), name="video", daemon=True))
+
+    def run(self):
+        for thread in self.threads:
+            thread.start()
+        try:
+            asyncio.run(self._serve())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop_event.set()
+            for thread in self.threads:
+                thread.join(timeout=5)
+
+    async def _serve(self):
+        if self.servers:
+            await asyncio.gather(*(server.serve() for server in self.servers))
+        else:
+            while not self.stop_event.is_set():
+                await asyncio.sleep(1)
+
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def compare():
+    for profile in PROFILES:
+        result = subprocess.run([sys.executable, __file__, "--profile", profile, "--measure"], capture_output=True, text=True)
+        lines = (result.stdout + result.stderr).strip().splitlines()
+        print(lines[-1] if lines else f"{profile}: no output (exit code {result.returncode})")
+
+
+# Cold-import budgets (ms) for the API modules; importing must not connect to or start anything
+IMPORT_BUDGETS_MS = {"main": 1000, "speech_api": 1000}
+
+
+def import_time_ms(module: str) -> float:
+    """Cumulative import time of `module` in a fresh interpreter, from `python -X importtime`."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if line.startswith("import time:") and len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"{module} not found in -X importtime output")
+
+
+def check_import_budgets(budgets=IMPORT_BUDGETS_MS) -> bool:
+    ok = True
+    for module, budget in budgets.items():
+        elapsed = min(import_time_ms(module) for _ in range(3))  # Best of 3 to ignore a cold disk cache
+        within = elapsed <= budget
+        ok = ok and within
+        print(f"{module}: {elapsed:.0f} ms (budget {budget} ms) {'ok' if within else 'OVER BUDGET'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Smriti.AI components in one process")
+    parser.add_argument("--profile", choices=PROFILES, default="backend")
+    parser.add_argument("--with", dest="components", help=f"comma-separated components: {', '.join(COMPONENTS)}")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--measure", action="store_true", help="print startup time and peak memory, then exit")
+    parser.add_argument("--compare", action="store_true", help="measure every profile in a fresh process")
+    parser.add_argument("--importtime", action="store_true", help="check API module import times against their budgets")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare()
+        return
+    if args.importtime:
+        sys.exit(0 if check_import_budgets() else 1)
+
+    components = args.components.split(",") if args.components else PROFILES[args.profile]
+    unknown = set(components) - set(COMPONENTS)
+    if unknown:
+        parser.error(f"unknown components: {', '.join(sorted(unknown))}")
+
+    assistant = Assistant(components, host=args.host)
+    assistant.load()
+    label = args.components or args.profile
+    print(f"{label}: started in {time.perf_counter() - STARTED:.2f}s, peak RSS {peak_rss_mb():.0f} MB")
+    if args.measure:
+        os._exit(0)  # Skip interpreter teardown so only startup is measured
+    assistant.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,18 @@
-import torch
+import os
 import pyaudio
 import numpy as np
-import soundfile as sf
-from transformers import pipeline
+from transcriber import TranscriptionService, SAMPLE_RATE
+from vad import SpeechSegmenter
 
 print("ok")
-# Load Whisper model from Hugging Face
-transcriber = pipeline("automatic-speech-recognition", model="openai/whisper-large",
-                       device=0 if torch.cuda.is_available() else -1)
+# Load Whisper once; WHISPER_MODEL picks the size, WHISPER_INT8=1 quantizes it for CPU
+transcriber = TranscriptionService(os.getenv("WHISPER_MODEL", "openai/whisper-base"),
+                                   quantize=os.getenv("WHISPER_INT8") == "1")
+transcriber.start()
 
 # Audio stream settings
 CHUNK = 512  # Number of frames per buffer
-RATE = 4000  # Sampling rate for Whisper
+RATE = SAMPLE_RATE  # Whisper expects 16 kHz
 FORMAT = pyaudio.paInt16
 CHANNELS = 1
 
@@ -26,28 +27,18 @@ stream = p.open(format=FORMAT,
 
 print("Recording... Press Ctrl+C to stop.")
 
-buffer = []
+# Only speech segments reach Whisper (the energy fallback calibrates on the first second)
+segmenter = SpeechSegmenter(rate=RATE)
 
 try:
     while True:
         # Read data from audio stream
         data = stream.read(CHUNK)
-        buffer.append(data)
+        samples = np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
 
-        # Convert audio buffer to numpy array when buffer size reaches a threshold
-        if len(buffer) >= 20:  # Adjust this based on desired response time
-            audio_data = b''.join(buffer)
-            buffer = []
-
-            # Convert audio to floating point array for Whisper
-            audio_np = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
-
-            # Save audio as temporary WAV file
-            sf.write("temp_audio.wav", audio_np, RATE)
-
-            # Transcribe the audio file
-            transcription = transcriber("temp_audio.wav")['text']
-            print("Transcription:", transcription)
+        # Hand finished speech segments to the inference thread and keep capturing
+        for segment in segmenter.push(samples):
+            transcriber.submit(segment)
 
 except KeyboardInterrupt:
     print("Stopped recording")
@@ -56,4 +47,10 @@ finally:
     # Close the stream
     stream.stop_stream()
     stream.close()
-    p.terminate()
\ No newline at end of file
+    p.terminate()
+    segment = segmenter.flush()
+    if segment is not None:
+        transcriber.submit(segment)
+    transcriber.stop()
+    print(f"Audio sent to Whisper: {segmenter.passed_fraction():.0%}")
+    print(f"Real-time factor: {transcriber.real_time_factor():.2f}")
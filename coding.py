@@ -1,24 +1,20 @@
 from video import video
 from voice import record_until_sentence
+from event_bus import EventBus
 import threading
 from time import sleep
 
-# Global variables
-face_id = "empty"
-stop_flag = False  # Flag to signal threads to stop
-
-# Lock to synchronize access to the global variable
-lock = threading.Lock()
+bus = EventBus()
+stop_event = threading.Event()  # Set to signal threads to stop
 
 # Wrapper function for voice recognition
 def voice():
-    while not stop_flag:
+    while not stop_event.is_set():
         record_until_sentence()
 
 def main():
-    global stop_flag
     # Create threads
-    thread1 = threading.Thread(target=video)
+    thread1 = threading.Thread(target=video, args=(bus, stop_event))
     thread2 = threading.Thread(target=voice)
 
     # Start both threads
@@ -30,7 +26,7 @@ def main():
         while True:
             sleep(1)  # Keep the main thread alive
     except KeyboardInterrupt:
-        stop_flag = True  # Set stop_flag to true to stop the threads
+        stop_event.set()  # Signal the threads to stop
         print("\nProgram interrupted by user with Ctrl + C")
 
     # Wait for both threads to finish
@@ -0,0 +1,211 @@
+import collections
+import datetime
+import threading
+import time
+from reminder_scheduler import get_zone, next_fire
+from relation_stats import week_key
+
+RECENT_CONVERSATIONS = 3
+NEXT_REMINDERS = 3
+TOP_VISITORS = 5
+PREVIEW_RELATIONS = 4
+
+
+def pipeline(email: str, recent=RECENT_CONVERSATIONS, now=None):
+    """
+    Projects one user down to what the dashboard shows. Conversations are
+    appended in time order, so each relation's newest ones are the tail of its
+    array; only that tail is read, which keeps the work and the reply size
+    proportional to the number of relations rather than to the history.
+    Transcripts never leave the server.
+    """
+    this_week = week_key(now or datetime.datetime.now())
+    return [
+        {"$match": {"email": email}},
+        {"$project": {
+            "_id": 0,
+            "name": 1,
+            "timezone": 1,
+            "reminders": 1,
+            "relations": {"$map": {"input": {"$ifNull": ["$relations", []]}, "as": "r", "in": {
+                "id": "$$r.id",
+                "name": "$$r.name",
+                "relationship": "$$r.relationship",
+                "photo": "$$r.photo",
+                "isRegistered": "$$r.isRegistered",
+                "lastSummary": "$$r.lastSummary",
+                "count": "$$r.count",
+                "this_week": f"$$r.stats.weeks.{this_week}.n",  # From the rollups in relation_stats
+                "conversations": {"$size": {"$ifNull": ["$$r.conversations", []]}},
+                "messages": {"$size": {"$ifNull": ["$$r.messages", []]}},
+                "recent": {"$map": {
+                    "input": {"$slice": [{"$ifNull": ["$$r.conversations", []]}, -recent]},
+                    "as": "c",
+                    "in": {"id": "$$c.id", "timestamp": "$$c.timestamp", "summary": "$$c.summary"},
+                }},
+            }}},
+        }},
+    ]
+
+
+def summarize(doc: dict, now=None) -> dict:
+    """Builds the /dashboard/summary reply from a document projected by `pipeline`."""
+    relations = doc.get("relations", [])
+    reminders = doc.get("reminders", [])
+    registered = [r for r in relations if r.get("isRegistered")]
+
+    after = datetime.datetime.fromtimestamp(now or time.time(), datetime.timezone.utc)
+    upcoming = []
+    for reminder in reminders:
+        try:
+            fire = next_fire(reminder, after, get_zone(reminder.get("timezone") or doc.get("timezone")))
+        except (KeyError, ValueError):
+            continue
+        if fire is not None:
+            upcoming.append((fire, reminder))
+    upcoming.sort(key=lambda item: item[0])
+
+    recent = [
+        {**conversation, "relation_id": r["id"], "relation_name": r["name"], "relationship": r.get("relationship") or "Unknown"}
+        for r in relations for conversation in r.get("recent", [])
+    ]
+    recent.sort(key=lambda c: c.get("timestamp") or "", reverse=True)
+
+    visitors = sorted((r for r in relations if (r.get("count") or {}).get("value")),
+                      key=lambda r: r["count"]["value"], reverse=True)
+
+    def preview(r):
+        return {
+            "id": r["id"],
+            "name": r["name"],
+            "relationship": r.get("relationship") or "Unknown",
+            "photo": r.get("photo"),
+            "isRegistered": bool(r.get("isRegistered")),
+            "lastSummary": r.get("lastSummary"),
+        }
+
+    return {
+        "name": doc.get("name"),
+        "counts": {
+            "relations": len(relations),
+            "registered": len(registered),
+            "reminders": len(reminders),
+            "conversations": sum(r.get("conversations", 0) + r.get("messages", 0) for r in relations),
+        },
+        "unregistered": [r["name"] for r in relations if not r.get("isRegistered")],
+        "relations": [preview(r) for r in relations[:PREVIEW_RELATIONS]],
+        "next_reminders": [
+            {**reminder, "next_at": datetime.datetime.fromtimestamp(fire, datetime.timezone.utc).isoformat()}
+            for fire, reminder in upcoming[:NEXT_REMINDERS]
+        ],
+        "recent_conversations": recent[:RECENT_CONVERSATIONS],
+        "top_visitors": [{**preview(r), "count": r["count"], "this_week": r.get("this_week") or 0} for r in visitors[:TOP_VISITORS]],
+    }
+
+
+class TTLCache:
+    """
+    Small in-process cache for per-user replies. Entries expire after `ttl`
+    seconds; writers call invalidate() so a user sees their own changes at
+    once, and the TTL bounds staleness from other processes' writes. Pass the
+    version() read before computing a value to put(), so a value computed
+    while a write invalidated the key is not cached.
+    """
+
+    def __init__(self, ttl=30.0, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()  # key -> (expires, value)
+        self._versions = collections.Counter()  # key -> invalidations so far
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def version(self, key) -> int:
+        with self._lock:
+            return self._versions[key]
+
+    def put(self, key, value, version=None):
+        with self._lock:
+            if version is not None and version != self._versions[key]:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._versions[key] += 1
+
+
+if __name__ == "__main__":
+    # Benchmark: the old dashboard's three requests (/get-user, /reminder/get,
+    # /conversations/all) against /dashboard/summary, for one user with 200
+    # relations and a growing history. Covers the API process's work: decoding
+    # what Mongo returns, building the reply and encoding it. The aggregation
+    # itself runs in mongod and isn't measured here; the projected document is
+    # built in Python to stand in for its output.
+    import random
+    import bson
+    from json_response import dumps
+
+    rng = random.Random(0)
+    words = "the a we went to park doctor lunch garden family grandson talked about weather medicine called visit".split()
+
+    def text(n):
+        return " ".join(rng.choice(words) for _ in range(n))
+
+    def project(user):
+        return {"name": user["name"], "reminders": user["reminders"], "relations": [{
+            **{k: r.get(k) for k in ("id", "name", "relationship", "photo", "isRegistered", "lastSummary", "count")},
+            "conversations": len(r["conversations"]), "messages": len(r["messages"]),
+            "recent": [{k: c[k] for k in ("id", "timestamp", "summary")} for c in r["conversations"][-RECENT_CONVERSATIONS:]],
+        } for r in user["relations"]]}
+
+    def timed(fn, repeat=5):
+        fn()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = fn()
+        return (time.perf_counter() - start) / repeat * 1000, result
+
+    for per_relation in (5, 25, 75):  # The last is near the 16 MB document limit
+        user = {"_id": bson.ObjectId(), "name": "A", "email": "a@example.com", "broadcastList": [],
+                "reminders": [{"id": i, "time": f"{rng.randrange(24):02d}:{rng.randrange(60):02d}", "message": text(4), "repeat": "daily"} for i in range(10)],
+                "relations": [{"id": str(i), "name": f"Person {i}", "relationship": "Friend", "photo": None, "isRegistered": True,
+                               "faceDescriptor": [rng.uniform(-1, 1) for _ in range(128)], "lastSummary": text(20), "messages": [text(20)],
+                               "count": {"value": rng.randrange(100), "first": "2026-01-01T00:00:00", "last": "2026-10-01T00:00:00"},
+                               "conversations": [{"id": str(j), "timestamp": f"2026-{1 + j * 9 // per_relation:02d}-{1 + j % 28:02d}T10:00:00",
+                                                  "transcript": text(120), "summary": text(20)} for j in range(per_relation)]}
+                              for i in range(200)]}
+        full = bson.encode(user)
+        projected = bson.encode(project(user))
+
+        def old():
+            size = len(dumps(bson.decode(full)))  # /get-user
+            size += len(dumps({"reminders": bson.decode(full)["reminders"]}))  # /reminder/get
+            relations = bson.decode(full)["relations"]  # /conversations/all
+            conversations = [{"relation_id": r["id"], "relation_name": r["name"], "relationship": r["relationship"], **c}
+                             for r in relations for c in r["conversations"]]
+            conversations.sort(key=lambda c: c["timestamp"], reverse=True)
+            return size + len(dumps({"conversations": conversations})), len(full) * 3
+
+        def new():
+            return len(dumps(summarize(bson.decode(projected)))), len(projected)
+
+        old_ms, (old_reply, old_read) = timed(old)
+        new_ms, (new_reply, new_read) = timed(new)
+        print(f"{200 * per_relation:>6} conversations: 3 requests {old_ms:7.1f} ms, {old_read / 1e6:6.2f} MB read, {old_reply / 1e6:6.2f} MB sent | "
+              f"summary {new_ms:5.2f} ms, {new_read / 1e3:5.0f} kB read, {new_reply / 1e3:4.1f} kB sent")
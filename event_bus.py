@@ -0,0 +1,181 @@
+import json
+import queue
+import socket
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+
+
+@dataclass
+class FaceEntered:
+    face_id: str
+    name: str = "Unknown"
+    ts: float = field(default_factory=time.time)
+
+
+@dataclass
+class FaceLeft:
+    face_id: str
+    ts: float = field(default_factory=time.time)
+
+
+@dataclass
+class TranscriptSegment:
+    session_id: str
+    text: str
+    start: float
+    end: float
+
+
+@dataclass
+class SummaryReady:
+    session_id: str
+    summary: dict
+    ts: float = field(default_factory=time.time)
+
+
+EVENT_TYPES = {cls.__name__: cls for cls in (FaceEntered, FaceLeft, TranscriptSegment, SummaryReady)}
+
+
+class Subscription:
+    """Queue of events matching the subscribed types, read by one consumer."""
+
+    def __init__(self, bus, types, maxsize):
+        self.bus = bus
+        self.types = types
+        self._queue = queue.Queue(maxsize=maxsize)
+
+    def matches(self, event) -> bool:
+        return not self.types or isinstance(event, self.types)
+
+    def _put(self, origin, event):
+        try:
+            self._queue.put_nowait((origin, event))
+        except queue.Full:
+            # A slow consumer loses its oldest event rather than blocking publishers
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._queue.put_nowait((origin, event))
+
+    def get(self, timeout=None):
+        """Next event, or None if `timeout` passes first."""
+        item = self.get_with_origin(timeout)
+        return item[1] if item else None
+
+    def get_with_origin(self, timeout=None):
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """
+    In-process publish/subscribe bus for typed events, safe to use from any
+    thread. Subscribers wake as soon as an event is published instead of
+    polling shared globals.
+    """
+
+    def __init__(self):
+        self.id = str(uuid.uuid4())
+        self._subscriptions = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, *types, maxsize=1000) -> Subscription:
+        sub = Subscription(self, tuple(types), maxsize)
+        with self._lock:
+            self._subscriptions.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            if sub in self._subscriptions:
+                self._subscriptions.remove(sub)
+
+    def publish(self, event, origin=None):
+        with self._lock:
+            subs = [s for s in self._subscriptions if s.matches(event)]
+        for sub in subs:
+            sub._put(origin or self.id, event)
+
+    def on(self, event_type, callback) -> threading.Thread:
+        """Runs `callback(event)` on a daemon thread for every matching event."""
+        sub = self.subscribe(event_type)
+
+        def run():
+            while True:
+                event = sub.get()
+                try:
+                    callback(event)
+                except Exception as e:
+                    print(f"Event handler {callback.__name__} failed: {e}")
+
+        thread = threading.Thread(target=run, name=f"on-{event_type.__name__}", daemon=True)
+        thread.start()
+        return thread
+
+
+def encode(event) -> bytes:
+    return (json.dumps({"type": type(event).__name__, "data": asdict(event)}) + "\n").encode("utf-8")
+
+
+def decode(line: bytes):
+    message = json.loads(line)
+    return EVENT_TYPES[message["type"]](**message["data"])
+
+
+def _pump(bus: EventBus, conn: socket.socket, link_id: str):
+    """Forwards local events to the peer and peer events to the local bus."""
+    sub = bus.subscribe()
+
+    def send():
+        try:
+            while True:
+                origin, event = sub.get_with_origin()
+                if origin != link_id:  # Don't echo events back to the process they came from
+                    conn.sendall(encode(event))
+        except OSError:
+            pass
+
+    threading.Thread(target=send, daemon=True).start()
+    try:
+        for line in conn.makefile("rb"):
+            try:
+                bus.publish(decode(line), origin=link_id)
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"Dropped malformed bridged event: {e}")
+    except OSError:
+        pass
+    finally:
+        sub.close()
+        conn.close()
+
+
+def serve_bridge(bus: EventBus, host="127.0.0.1", port=8765) -> threading.Thread:
+    """Shares `bus` with other local processes over a TCP socket (JSON lines)."""
+    server = socket.create_server((host, port))
+
+    def accept():
+        while True:
+            conn, _ = server.accept()
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=_pump, args=(bus, conn, str(uuid.uuid4())), daemon=True).start()
+
+    thread = threading.Thread(target=accept, name="bus-bridge", daemon=True)
+    thread.start()
+    return thread
+
+
+def connect_bridge(bus: EventBus, host="127.0.0.1", port=8765) -> threading.Thread:
+    """Joins `bus` to a bridge served by another process."""
+    conn = socket.create_connection((host, port))
+    conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    thread = threading.Thread(target=_pump, args=(bus, conn, str(uuid.uuid4())), name="bus-bridge", daemon=True)
+    thread.start()
+    return thread
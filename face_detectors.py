@@ -0,0 +1,225 @@
+import os
+import time
+import urllib.request
+import numpy as np
+
+# Boxes are (top, right, bottom, left) in pixels of the frame passed in, as
+# face_recognition returns them; frames are BGR, as OpenCV reads them.
+#
+# Resolution strategy: a face 3 m from a 640x480 webcam is only ~30 px wide,
+# while each detector has a smallest face it can find (min_face). The coarse
+# pass runs at the largest downscale that still keeps a MIN_FACE_PX face
+# findable, then each hit is refined on a full-resolution crop around it, so
+# boxes (and the encodings taken from them) are as sharp as the camera allows.
+
+MIN_FACE_PX = int(os.getenv("FACE_MIN_PX", "30"))  # Smallest face to find, in full-frame pixels (~3 m on a 640 px webcam)
+YUNET_MODEL = os.getenv("YUNET_MODEL", "models/face_detection_yunet_2023mar.onnx")
+YUNET_URL = "https://github.com/opencv/opencv_zoo/raw/main/models/face_detection_yunet/face_detection_yunet_2023mar.onnx"
+
+
+class HogDetector:
+    """dlib's HOG detector via face_recognition: no extra model, slow on large frames."""
+
+    name = "hog"
+
+    def __init__(self, upsample=1):
+        import face_recognition
+        self._locate = face_recognition.face_locations
+        self.upsample = upsample
+        self.min_face = 80 // 2 ** upsample  # dlib's 80 px window, halved by each upsampling
+
+    def detect(self, frame):
+        rgb = np.ascontiguousarray(frame[:, :, ::-1])
+        return self._locate(rgb, number_of_times_to_upsample=self.upsample, model="hog")
+
+
+class HaarDetector:
+    """OpenCV's Haar cascade: the cheapest option, frontal faces only, more false positives."""
+
+    name = "haar"
+
+    def __init__(self, scale_factor=1.1, min_neighbors=5, min_face=24):
+        import cv2
+        self._cv2 = cv2
+        self.cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_face = min_face
+
+    def detect(self, frame):
+        gray = self._cv2.cvtColor(frame, self._cv2.COLOR_BGR2GRAY)
+        faces = self.cascade.detectMultiScale(gray, scaleFactor=self.scale_factor, minNeighbors=self.min_neighbors,
+                                              minSize=(self.min_face, self.min_face))
+        return [(int(y), int(x + w), int(y + h), int(x)) for x, y, w, h in faces]
+
+
+class YuNetDetector:
+    """OpenCV's YuNet CNN (cv2.FaceDetectorYN): small faces and off-angle poses at Haar-like speed."""
+
+    name = "yunet"
+
+    def __init__(self, model=YUNET_MODEL, score_threshold=0.8, min_face=12):
+        import cv2
+        if not os.path.exists(model):
+            raise FileNotFoundError(f"YuNet model not found at {model}; run: python face_detectors.py fetch-model")
+        self.detector = cv2.FaceDetectorYN.create(model, "", (320, 320), score_threshold)
+        self.min_face = min_face
+
+    def detect(self, frame):
+        height, width = frame.shape[:2]
+        self.detector.setInputSize((width, height))
+        _, faces = self.detector.detect(frame)
+        if faces is None:
+            return []
+        boxes = []
+        for x, y, w, h in faces[:, :4]:
+            left, top = max(0, int(x)), max(0, int(y))
+            boxes.append((top, min(width, int(x + w)), min(height, int(y + h)), left))
+        return boxes
+
+
+DETECTORS = {"hog": HogDetector, "haar": HaarDetector, "yunet": YuNetDetector}
+
+
+def get_detector(name=None):
+    """
+    The detector named by `name` or FACE_DETECTOR (hog, haar, yunet). "auto",
+    the default, picks YuNet when its model file is present and HOG otherwise.
+    """
+    name = (name or os.getenv("FACE_DETECTOR", "auto")).lower()
+    if name == "auto":
+        name = "yunet" if os.path.exists(YUNET_MODEL) else "hog"
+    if name not in DETECTORS:
+        raise ValueError(f"Unknown face detector {name!r}; choose one of {', '.join(DETECTORS)}")
+    return DETECTORS[name]()
+
+
+def coarse_scale(detector, min_face=MIN_FACE_PX) -> float:
+    """The largest downscale at which a `min_face` face is still findable by `detector`."""
+    return min(1.0, 1.25 * detector.min_face / min_face)
+
+
+def _resize(frame, scale):
+    import cv2
+    return cv2.resize(frame, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+
+
+def _overlap(a, b) -> float:
+    """Intersection over union of two boxes."""
+    top, right, bottom, left = max(a[0], b[0]), min(a[1], b[1]), min(a[2], b[2]), max(a[3], b[3])
+    inter = max(0, right - left) * max(0, bottom - top)
+    area = lambda box: (box[1] - box[3]) * (box[2] - box[0])
+    return inter / max(1, area(a) + area(b) - inter)
+
+
+def refine(detector, frame, box, margin=0.5):
+    """
+    Re-detects the face at `box` on a full-resolution crop around it, upscaled
+    if it is too small for the detector. Returns the refined box, or `box` if
+    the detector doesn't find it again.
+    """
+    height, width = frame.shape[:2]
+    top, right, bottom, left = box
+    pad = int(max(bottom - top, right - left) * margin)
+    y0, x0 = max(0, top - pad), max(0, left - pad)
+    roi = frame[y0:min(height, bottom + pad), x0:min(width, right + pad)]
+    if roi.size == 0:
+        return box
+    scale = max(1.0, 2 * detector.min_face / max(1, min(bottom - top, right - left)))
+    if scale > 1:
+        roi = _resize(roi, scale)
+    found = [(int(t / scale) + y0, int(r / scale) + x0, int(b / scale) + y0, int(l / scale) + x0) for t, r, b, l in detector.detect(roi)]
+    best = max(found, key=lambda f: _overlap(f, box), default=None)
+    return best if best is not None and _overlap(best, box) > 0.3 else box
+
+
+def detect(detector, frame, scale=None, min_face=MIN_FACE_PX, refine_boxes=True):
+    """
+    Face boxes in `frame`, coarse to fine: detection on a copy downscaled by
+    `scale` (by default coarse_scale(detector, min_face)), then each box is
+    refined at full resolution. scale=1 and refine_boxes=False is a plain
+    single full-resolution pass.
+    """
+    scale = coarse_scale(detector, min_face) if scale is None else scale
+    small = _resize(frame, scale) if scale != 1 else frame
+    boxes = [tuple(int(v / scale) for v in box) for box in detector.detect(small)]
+    if refine_boxes and scale < 1:
+        boxes = [refine(detector, frame, box) for box in boxes]
+    return boxes
+
+
+def fetch_model(path=YUNET_MODEL, url=YUNET_URL):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    urllib.request.urlretrieve(url, path)
+    print(f"Saved YuNet model to {path}")
+
+
+def benchmark(image_dir="imgs", frame_size=(640, 480), distances=(1.0, 2.0, 3.0), repeat=5):
+    """
+    Speed and recall of each backend and strategy on the images in
+    `image_dir`. Each image is shrunk so its faces appear as they would at
+    each distance and placed on a webcam-sized frame; the reference faces are
+    the union of what every backend finds on the original image at full
+    resolution. Distances assume a face is ~150 px wide at 1 m on a 640 px
+    webcam.
+    """
+    import cv2
+
+    detectors = []
+    for name in DETECTORS:
+        try:
+            detectors.append(DETECTORS[name]())
+        except (ImportError, FileNotFoundError) as e:
+            print(f"Skipping {name}: {e}")
+    if not detectors:
+        return
+
+    images = []
+    for filename in sorted(os.listdir(image_dir)):
+        image = cv2.imread(os.path.join(image_dir, filename))
+        if image is None:
+            continue
+        reference = []
+        for detector in detectors:
+            for box in detector.detect(image):
+                if all(_overlap(box, seen) < 0.3 for seen in reference):
+                    reference.append(box)
+        if reference:
+            images.append((filename, image, reference))
+    print(f"{len(images)} images, {sum(len(r) for _, _, r in images)} reference faces, {frame_size[0]}x{frame_size[1]} frames")
+
+    strategies = {
+        "full": lambda d, f: detect(d, f, scale=1, refine_boxes=False),
+        "fixed 0.25": lambda d, f: detect(d, f, scale=0.25, refine_boxes=False),
+        "coarse-fine": lambda d, f: detect(d, f),
+    }
+    for distance in distances:
+        frames = []
+        for _, image, reference in images:
+            face_width = np.median([r - l for _, r, _, l in reference])
+            scale = min(150 / distance / face_width, frame_size[0] / image.shape[1], frame_size[1] / image.shape[0])
+            placed = _resize(image, scale)
+            frame = np.zeros((frame_size[1], frame_size[0], 3), dtype=np.uint8)
+            frame[:placed.shape[0], :placed.shape[1]] = placed
+            frames.append((frame, [tuple(int(v * scale) for v in box) for box in reference]))
+        for detector in detectors:
+            for label, run in strategies.items():
+                found = total = 0
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    for frame, reference in frames:
+                        boxes = run(detector, frame)
+                        found += sum(any(_overlap(box, ref) > 0.3 for box in boxes) for ref in reference)
+                        total += len(reference)
+                ms = (time.perf_counter() - start) / (repeat * len(frames)) * 1000
+                print(f"{distance:.0f} m  {detector.name:6s} {label:11s} {ms:7.1f} ms/frame  recall {found / max(1, total):.0%}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:2] == ["fetch-model"]:
+        fetch_model()
+    else:
+        # python face_detectors.py [image_dir]
+        benchmark(*sys.argv[1:2])
@@ -0,0 +1,273 @@
+import os
+import time
+import urllib.request
+import numpy as np
+
+# Face embedding backends behind one call, face_encodings(rgb, boxes, landmarks),
+# mirroring face_recognition.face_encodings. FACE_EMBEDDER picks one:
+#
+#   dlib  face_recognition's ResNet (the default)
+#   onnx  an exported model run through ONNX Runtime on the CPU, by default
+#         OpenCV Zoo's SFace (python face_embeddings.py fetch-model)
+#
+# Different models put faces at different distances, so ONNX embeddings are
+# L2-normalised and scaled to map the model's own match threshold onto
+# MATCH_DISTANCE. The existing matchers then work unchanged:
+# face_recognition.compare_faces (tolerance 0.6) and video.py's FAISS
+# score > 0.7 (squared distance < 0.43, a distance of 0.65). Embeddings from
+# different backends don't mix, so switching backends means re-enrolling.
+
+MATCH_DISTANCE = 0.6  # face_recognition's default tolerance
+ONNX_MODEL = os.getenv("FACE_EMBEDDING_MODEL", "models/face_recognition_sface_2021dec.onnx")
+ONNX_URL = "https://github.com/opencv/opencv_zoo/raw/main/models/face_recognition_sface/face_recognition_sface_2021dec.onnx"
+ONNX_THRESHOLD = float(os.getenv("FACE_EMBEDDING_THRESHOLD", "1.128"))  # SFace's L2 threshold on normalised embeddings
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))  # 0 lets ONNX Runtime use every core
+ONNX_INT8 = os.getenv("ONNX_INT8", "0") == "1"
+
+# Where the ArcFace/SFace family expect the eyes and nose tip in a 112x112 crop
+TEMPLATE = np.array([[38.2946, 51.6963], [73.5318, 51.5014], [56.0252, 71.7366]], dtype=np.float32)
+
+
+def align(rgb, box, landmarks=None, size=(112, 112)):
+    """A `size` face crop; eyes and nose are moved onto TEMPLATE when landmarks are given."""
+    import cv2
+
+    height, width = size
+    if landmarks and "nose_tip" in landmarks:
+        eyes = sorted([np.mean(landmarks["left_eye"], axis=0), np.mean(landmarks["right_eye"], axis=0)], key=lambda p: p[0])
+        nose = np.asarray(landmarks["nose_tip"], dtype=np.float32).reshape(-1, 2)
+        points = np.array([eyes[0], eyes[1], nose[len(nose) // 2]], dtype=np.float32)
+        matrix, _ = cv2.estimateAffinePartial2D(points, TEMPLATE * [width / 112, height / 112])
+        if matrix is not None:
+            return cv2.warpAffine(rgb, matrix, (width, height), borderMode=cv2.BORDER_REPLICATE)
+    top, right, bottom, left = box
+    pad = (bottom - top) // 8  # Roughly the framing of the aligned template
+    crop = rgb[max(0, top - pad):bottom + pad, max(0, left - pad):right + pad]
+    return cv2.resize(crop, (width, height), interpolation=cv2.INTER_AREA)
+
+
+class DlibEmbedder:
+    """face_recognition's dlib ResNet: 128-d, matched at distance 0.6."""
+
+    name = "dlib"
+
+    def __init__(self):
+        import face_recognition
+        self._encode = face_recognition.face_encodings
+
+    def face_encodings(self, rgb, boxes, landmarks=None):
+        return self._encode(rgb, boxes)
+
+
+def quantize(model_path: str, faces=None, mean=0.0, scale=1.0) -> str:
+    """
+    Path of an int8 copy of the model, created next to it on first use.
+    Given aligned calibration faces it is statically quantised (QDQ), which
+    also quantises the convolutions' activations and is the fast option;
+    without, weights only (dynamic), which mostly saves memory.
+    """
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_dynamic, quantize_static
+
+    quantized = model_path.replace(".onnx", ".int8.onnx")
+    if os.path.exists(quantized) and faces is None:
+        return quantized
+    if faces is None:
+        quantize_dynamic(model_path, quantized, weight_type=QuantType.QInt8)
+    else:
+        import onnxruntime as ort
+
+        name = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+
+        class Faces(CalibrationDataReader):
+            def __init__(self):
+                self.batches = iter([{name: ((face[None].astype(np.float32) - mean) * scale).transpose(0, 3, 1, 2)} for face in faces])
+
+            def get_next(self):
+                return next(self.batches, None)
+
+        quantize_static(model_path, quantized, Faces(), quant_format=QuantFormat.QDQ,
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+    print(f"Quantized {model_path} to {quantized} ({'static' if faces is not None else 'dynamic'})")
+    return quantized
+
+
+class OnnxEmbedder:
+    """
+    An exported embedding model on ONNX Runtime's CPU provider. `threads`
+    caps intra-op threads (0: all cores), `batch_size` is how many faces go
+    through one run, `int8` runs the quantised copy of the model (see
+    quantize(); python face_embeddings.py quantize builds the fast one).
+    Input is RGB in 0..255, NCHW, minus `mean` and times `scale`; the defaults
+    suit SFace, ArcFace exports want mean=127.5, scale=1/127.5.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model=ONNX_MODEL, threads=ONNX_THREADS, batch_size=16, int8=ONNX_INT8,
+                 threshold=ONNX_THRESHOLD, mean=0.0, scale=1.0):
+        import onnxruntime as ort
+
+        if not os.path.exists(model):
+            raise FileNotFoundError(f"Embedding model not found at {model}; run: python face_embeddings.py fetch-model")
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(quantize(model) if int8 else model, options, providers=["CPUExecutionProvider"])
+        self.input = self.session.get_inputs()[0]
+        self.size = tuple(self.input.shape[2:4]) if all(isinstance(d, int) for d in self.input.shape[2:4]) else (112, 112)
+        # Some exports fix the batch dimension to 1
+        self.batch_size = batch_size if not isinstance(self.input.shape[0], int) else self.input.shape[0]
+        self.dim = self.session.get_outputs()[0].shape[-1]
+        self.distance_scale = MATCH_DISTANCE / threshold
+        self.mean = mean
+        self.scale = scale
+
+    def embed(self, faces):
+        """Embeddings for aligned RGB face crops, computed batch_size at a time."""
+        out = []
+        for start in range(0, len(faces), self.batch_size):
+            chunk = faces[start:start + self.batch_size]
+            batch = ((np.stack(chunk).astype(np.float32) - self.mean) * self.scale).transpose(0, 3, 1, 2)
+            if isinstance(self.input.shape[0], int) and len(chunk) < self.batch_size:
+                batch = np.concatenate([batch, np.zeros((self.batch_size - len(chunk), *batch.shape[1:]), np.float32)])
+            result = self.session.run(None, {self.input.name: np.ascontiguousarray(batch)})[0]
+            out.append(result[:len(chunk)].reshape(len(chunk), -1))
+        if not out:
+            return []
+        embeddings = np.concatenate(out)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-12
+        return list(embeddings * self.distance_scale)
+
+    def face_encodings(self, rgb, boxes, landmarks=None):
+        landmarks = landmarks or [None] * len(boxes)
+        return self.embed([align(rgb, box, marks, self.size) for box, marks in zip(boxes, landmarks)])
+
+
+EMBEDDERS = {"dlib": DlibEmbedder, "onnx": OnnxEmbedder}
+
+
+def get_embedder(name=None):
+    """The embedder named by `name` or FACE_EMBEDDER (dlib, onnx); dlib by default."""
+    name = (name or os.getenv("FACE_EMBEDDER", "dlib")).lower()
+    if name not in EMBEDDERS:
+        raise ValueError(f"Unknown face embedder {name!r}; choose one of {', '.join(EMBEDDERS)}")
+    return EMBEDDERS[name]()
+
+
+def fetch_model(path=ONNX_MODEL, url=ONNX_URL):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    urllib.request.urlretrieve(url, path)
+    print(f"Saved embedding model to {path}")
+
+
+# Benchmark faces: 200x200 RGB crops with the face box at BENCH_BOX
+BENCH_SIZE = 200
+BENCH_BOX = (25, 175, 175, 25)
+
+
+def load_faces(image_dir):
+    """(crops, landmarks) for every face face_recognition finds in `image_dir`, re-framed onto BENCH_BOX."""
+    import cv2
+    import face_recognition
+
+    crops, landmarks = [], []
+    for filename in sorted(os.listdir(image_dir)):
+        image = cv2.imread(os.path.join(image_dir, filename))
+        if image is None:
+            continue
+        rgb = np.ascontiguousarray(image[:, :, ::-1])
+        boxes = face_recognition.face_locations(rgb)
+        for (top, right, bottom, left), marks in zip(boxes, face_recognition.face_landmarks(rgb, boxes, model="small")):
+            ratio = (BENCH_BOX[2] - BENCH_BOX[0]) / (bottom - top)
+            matrix = np.float32([[ratio, 0, BENCH_BOX[3] - left * ratio], [0, ratio, BENCH_BOX[0] - top * ratio]])
+            crops.append(cv2.warpAffine(rgb, matrix, (BENCH_SIZE, BENCH_SIZE), borderMode=cv2.BORDER_REPLICATE))
+            landmarks.append({k: [(x * ratio + matrix[0, 2], y * ratio + matrix[1, 2]) for x, y in v] for k, v in marks.items()})
+    return crops, landmarks
+
+
+def _measure(backend, faces_path, **options):
+    """One backend in this process: import time, peak memory and embeddings/sec on the prepared faces."""
+    start = time.perf_counter()
+    if backend == "deepface":
+        from deepface import DeepFace
+    elif backend == "dlib":
+        import face_recognition
+    else:
+        import onnxruntime
+    import_s = time.perf_counter() - start
+
+    data = np.load(faces_path, allow_pickle=True)
+    crops, landmarks = list(data["crops"]), list(data["landmarks"])
+    top, right, bottom, left = BENCH_BOX
+    if backend == "deepface":
+        faces = [crop[top:bottom, left:right, ::-1] for crop in crops]  # DeepFace takes BGR
+        run = lambda: [DeepFace.represent(img_path=face, detector_backend="skip") for face in faces]
+    elif backend == "dlib":
+        embedder = DlibEmbedder()
+        run = lambda: [embedder.face_encodings(crop, [BENCH_BOX]) for crop in crops]
+    else:
+        embedder = OnnxEmbedder(**options)
+        aligned = [align(crop, BENCH_BOX, marks, embedder.size) for crop, marks in zip(crops, landmarks)]
+        run = lambda: embedder.embed(aligned)
+    run()  # Warm-up: model loading, graph optimisation
+    start = time.perf_counter()
+    run()
+    per_sec = len(crops) / (time.perf_counter() - start)
+    with open("/proc/self/status") as status:  # ru_maxrss would carry over the parent's peak across exec
+        peak_kb = next(int(line.split()[1]) for line in status if line.startswith("VmHWM"))
+    return {"import_s": round(import_s, 2), "per_sec": round(per_sec, 1), "peak_mb": round(peak_kb / 1024)}
+
+
+def benchmark(image_dir="imgs", n=64):
+    """
+    Compares the backends on `n` faces from `image_dir`, each backend in a
+    fresh process so import time and peak memory are its own. ONNX runs cover
+    thread counts, batching and int8. Faces are found, cropped and aligned
+    before timing starts; only embedding is timed.
+    """
+    import json
+    import subprocess
+    import sys
+    import tempfile
+
+    crops, landmarks = load_faces(image_dir)
+    if not crops:
+        print(f"No faces found in {image_dir}")
+        return
+    print(f"{len(crops)} faces from {image_dir}, repeated to {n}; {os.cpu_count()} cores")
+    crops, landmarks = (crops * (n // len(crops) + 1))[:n], (landmarks * (n // len(landmarks) + 1))[:n]
+
+    runs = [("dlib", {}), ("deepface", {})]
+    for threads in sorted({1, os.cpu_count() or 1}):
+        for batch_size in (1, 16):
+            runs.append(("onnx", {"threads": threads, "batch_size": batch_size}))
+        runs.append(("onnx", {"threads": threads, "batch_size": 16, "int8": True}))
+    with tempfile.TemporaryDirectory() as tmp:
+        faces_path = os.path.join(tmp, "faces.npz")
+        np.savez(faces_path, crops=np.stack(crops), landmarks=np.array(landmarks, dtype=object))
+        for backend, options in runs:
+            code = f"import json, face_embeddings; print(json.dumps(face_embeddings._measure({backend!r}, {faces_path!r}, **{options!r})))"
+            proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+            label = f"{backend:8s} {' '.join(f'{k}={v}' for k, v in options.items()):34s}"
+            if proc.returncode:
+                error = proc.stderr.strip().splitlines()
+                print(f"{label} failed: {error[-1] if error else proc.returncode}")
+                continue
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(f"{label} import {result['import_s']:5.2f}s  {result['per_sec']:7.1f} embeddings/s  peak {result['peak_mb']:5d} MB")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:2] == ["fetch-model"]:
+        fetch_model()
+    elif sys.argv[1:2] == ["quantize"]:
+        # python face_embeddings.py quantize [image_dir]: static int8 model calibrated on these faces
+        crops, landmarks = load_faces(sys.argv[2] if len(sys.argv) > 2 else "imgs")
+        quantize(ONNX_MODEL, [align(crop, BENCH_BOX, marks) for crop, marks in zip(crops, landmarks)])
+    else:
+        # python face_embeddings.py [image_dir]
+        benchmark(*sys.argv[1:2])
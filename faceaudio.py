@@ -2,15 +2,19 @@ import threading
 from time import sleep
 import time
 import random
+import os
 from video import video
+from summarizer import Summarizer, make_backend
+from vad import calibrate_recognizer
+from event_bus import EventBus, FaceEntered, FaceLeft, TranscriptSegment, SummaryReady
 
 
-# Global variables
-face_id = "empty"
-stop_flag = False  # Flag to signal threads to stop
+# Video and audio threads talk through the event bus instead of shared globals
+bus = EventBus()
+stop_event = threading.Event()  # Set to signal threads to stop
 
-# Lock to synchronize access to the global variable
-lock = threading.Lock()
+# Runs offline by default; set SUMMARIZER_BACKEND=gemini to use the remote model
+summarizer = Summarizer(backend=make_backend(os.getenv("SUMMARIZER_BACKEND", "local")))
 
 
 # Function to set the global variable from a thread
@@ -113,85 +117,59 @@ lock = threading.Lock()
 #     cv2.destroyAllWindows()
 
 
-# Function to use the global variable from another thread
+# Records while a face is in view, reacting to face events as soon as they are published
 def audio():
-    global face_id
-    prompt = """Analyze the following conversation between two persons, 
-    Identify the relationship between them (e.g., friends, 
-    coworkers, family members, client-professional) based on the tone, topics 
-    discussed, and interaction style. Then, provide a concise summary of the 
-    conversation, highlighting the main topics, sentiments expressed, and any
-    key decisions or conclusions reached by the persons.
-
-    return json object with keys:
-    - relationship: string
-    - summary: string
-
-    example1: 
-
-    Hey! My weekend was fantastic I went to Paris with my family! 
-    The city was as beautiful as ever, with its stunning architecture and lively atmosphere. 
-    I invited our younger brother to join us, but unfortunately, he was caught 
-    up with work and couldn’t make it. My wife and kids were thrilled, 
-    though we explored so many iconic spots, from the Eiffel Tower to cozy 
-    little cafés along the Seine. Watching their excitement as they took in the 
-    sights was priceless. It was truly a memorable trip! How was your weekend?
-
-    now, the following is what you need to analyse and return a response for:"""
-    transcript = ""
     import speech_recognition as sr
-    from collections import deque
 
     r = sr.Recognizer()
-    is_recording = False
-    ini_person = 0
-    queue = deque(maxlen=3)
+    events = bus.subscribe(FaceEntered, FaceLeft)
+    person = None  # Face currently being recorded
+    transcript = ""
     try:
-        while not stop_flag:  # Check if stop_flag is set
-            print("Face ID", face_id)
-            queue.append(face_id)
-            if face_id != "empty":
-                if not is_recording:
-                    print("Recording Started.")
-                    is_recording = True
-                    ini_person = face_id
-                    transcript = ""
-                else:
-                    try:
-                        with sr.Microphone() as source:
-                            r.energy_threshold = 300
-                            audio = r.listen(source)
-                            text = r.recognize_google(audio)
-                            text = text.lower()
-                            transcript += text
-                            print(f"You said: {text}")
-                    except sr.RequestError as e:
-                        print(
-                            "Error connecting to the recognition service; {0}".format(e)
-                        )
-                    except sr.UnknownValueError:
-                        pass
-            else:
-                if len(queue) == 3 and all(value == "empty" for value in queue):
-                    if is_recording:
-                        is_recording = False
-                        print("Recording Stopped.")
-                        added_prompt = prompt + transcript
-                        thread = threading.Thread(
-                            target=summarize, args=(added_prompt,)
-                        )
-                        thread.start()
-            sleep(1)
+        while not stop_event.is_set():
+            # Block briefly while idle; between utterances just drain what arrived
+            event = events.get(timeout=0 if person else 0.5)
+            while event is not None:
+                if isinstance(event, FaceEntered) and person is None:
+                    print("Recording Started.", event.face_id)
+                    person, transcript = event.face_id, ""
+                elif isinstance(event, FaceLeft) and event.face_id == person:
+                    print("Recording Stopped.", person)
+                    threading.Thread(target=summarize, args=(person, transcript)).start()
+                    person = None
+                event = events.get(timeout=0)
+
+            if person is None:
+                continue
+            try:
+                with sr.Microphone() as source:
+                    calibrate_recognizer(r, source)  # Once, from ambient noise
+                    start = time.time()
+                    # Short phrases keep the loop responsive to FaceLeft
+                    audio = r.listen(source, timeout=1, phrase_time_limit=10)
+                    text = r.recognize_google(audio).lower()
+                    transcript += text + " "
+                    bus.publish(TranscriptSegment(person, text, start, time.time()))
+                    print(f"You said: {text}")
+            except sr.WaitTimeoutError:
+                pass
+            except sr.RequestError as e:
+                print(
+                    "Error connecting to the recognition service; {0}".format(e)
+                )
+            except sr.UnknownValueError:
+                pass
     except KeyboardInterrupt:
         print("Audio thread interrupted and stopped.")
+    finally:
+        events.close()
 
 
-def summarize(transcript):
+def summarize(person, transcript):
     print("Starting summarizer.")
-    api_time = random.randint(1, 5)
-    print(f"Calling GPT with {transcript}. Going to take {api_time}.")
-    sleep(api_time)
-    print("GPT Responded.")
+    summary = summarizer.summarize(transcript)
+    print(f"Summary: {summary}")
+    bus.publish(SummaryReady(person, summary))
     mongo_time = random.randint(1, 5)
     print(f"Updating MongoDB with GPT Response. Going to take {mongo_time}.")
     sleep(mongo_time)
@@ -200,9 +178,8 @@ def summarize(transcript):
 
 
 def main():
-    global stop_flag
     # Create threads
-    thread1 = threading.Thread(target=video)
+    thread1 = threading.Thread(target=video, args=(bus, stop_event))
     thread2 = threading.Thread(target=audio)
 
     # Start both threads
@@ -214,7 +191,7 @@ def main():
         while True:
             sleep(1)  # Keep the main thread alive
     except KeyboardInterrupt:
-        stop_flag = True  # Set stop_flag to true to stop the threads
+        stop_event.set()  # Signal the threads to stop
         print("\nProgram interrupted by user with Ctrl + C")
 
     # Wait for both threads to finish
@@ -6,12 +6,14 @@ import {
   Clock, 
   MessageSquare, 
   UserCircle,
-  Camera
+  Camera,
+  MapPin,
+  X
 } from 'lucide-react'
 
 const Layout = () => {
   const location = useLocation()
-  const { user, email } = useUser()
+  const { user, email, zoneAlert, dismissZoneAlert } = useUser()
 
   const navigation = [
     { name: 'Dashboard', href: '/', icon: LayoutDashboard },
@@ -90,6 +92,32 @@ const Layout = () => {
       {/* Main Content */}
       <div className="pl-64">
         <main className="p-8">
+          {/* Pushed by /geofence/exit; shown on every page */}
+          {zoneAlert && (
+            <div className="card mb-6 flex items-center justify-between border border-red-500">
+              <div className="flex items-center gap-3">
+                <MapPin className="w-6 h-6 text-red-500" />
+                <p className="text-gray-100">
+                  {zoneAlert.name || zoneAlert.email} left {zoneAlert.zone} —{' '}
+                  {zoneAlert.lat != null && zoneAlert.lon != null ? (
+                    <a
+                      href={`https://maps.google.com/?q=${zoneAlert.lat},${zoneAlert.lon}`}
+                      target="_blank"
+                      rel="noreferrer"
+                      className="underline hover:text-red-300"
+                    >
+                      last known location
+                    </a>
+                  ) : (
+                    'location unavailable'
+                  )}
+                </p>
+              </div>
+              <button onClick={dismissZoneAlert} className="text-gray-400 hover:text-gray-100">
+                <X className="w-5 h-5" />
+              </button>
+            </div>
+          )}
           <Outlet />
         </main>
       </div>
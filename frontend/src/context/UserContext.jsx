@@ -1,5 +1,5 @@
 import { createContext, useContext, useState, useEffect } from 'react'
-import { getUser } from '../services/api'
+import { getUser, subscribeEvents } from '../services/api'
 
 const UserContext = createContext()
 
@@ -17,6 +17,9 @@ export const UserProvider = ({ children }) => {
   const [email, setEmail] = useState(() => {
     return localStorage.getItem('userEmail') || ''
   })
+  const [dueReminder, setDueReminder] = useState(null)
+  const [lastRecognition, setLastRecognition] = useState(null)
+  const [zoneAlert, setZoneAlert] = useState(null)
 
   useEffect(() => {
     if (email) {
@@ -26,6 +29,25 @@ export const UserProvider = ({ children }) => {
     }
   }, [email])
 
+  // One push stream per signed-in user instead of polling the backend
+  useEffect(() => {
+    if (!email) return
+    return subscribeEvents(email, {
+      reminder: setDueReminder,
+      recognition: setLastRecognition,
+      summary_ready: () => loadUser(),
+      // Appended in place; a plain message doesn't need the whole user refetched
+      message_added: ({ relation_id, message }) =>
+        setUser((current) => current && {
+          ...current,
+          relations: (current.relations || []).map((rel) =>
+            rel.id === relation_id ? { ...rel, messages: [...(rel.messages || []), message] } : rel
+          ),
+        }),
+      zone_exit: setZoneAlert,
+    })
+  }, [email])
+
   const loadUser = async () => {
     try {
       setLoading(true)
@@ -52,7 +74,21 @@ export const UserProvider = ({ children }) => {
   }
 
   return (
-    <UserContext.Provider value={{ user, loading, email, setUserEmail, loadUser, updateUser }}>
+    <UserContext.Provider
+      value={{
+        user,
+        loading,
+        email,
+        setUserEmail,
+        loadUser,
+        updateUser,
+        dueReminder,
+        dismissReminder: () => setDueReminder(null),
+        lastRecognition,
+        zoneAlert,
+        dismissZoneAlert: () => setZoneAlert(null),
+      }}
+    >
       {children}
     </UserContext.Provider>
   )
@@ -62,11 +62,22 @@ const Conversations = () => {
     return groups
   }, {})
 
-  const toggleExpand = (id) => {
+  const toggleExpand = async (conv) => {
     setExpandedConversations(prev => ({
       ...prev,
-      [id]: !prev[id]
+      [conv.id]: !prev[conv.id]
     }))
+
+    // Old transcripts are archived server-side; fetch one the first time it's opened
+    if (conv.archived && conv.transcript === undefined) {
+      try {
+        const data = await getAllConversations(email, conv.relation_id, conv.id)
+        const transcript = data.conversations?.[0]?.transcript || ''
+        setConversations(prev => prev.map(c => (c.id === conv.id ? { ...c, transcript } : c)))
+      } catch (err) {
+        console.error('Error fetching transcript:', err)
+      }
+    }
   }
 
   const formatTime = (timestamp) => {
@@ -166,7 +177,7 @@ const Conversations = () => {
                       <div key={conv.id} className="card">
                         <div
                           className="flex items-start justify-between cursor-pointer"
-                          onClick={() => toggleExpand(conv.id)}
+                          onClick={() => toggleExpand(conv)}
                         >
                           <div className="flex items-start gap-4">
                             <div className="w-10 h-10 rounded-full bg-primary-600 flex items-center justify-center">
@@ -1,11 +1,30 @@
+import { useState, useEffect } from 'react'
 import { useUser } from '../context/UserContext'
-import { Users, Clock, MessageSquare, Camera, AlertCircle, CheckCircle } from 'lucide-react'
+import { getDashboardSummary } from '../services/api'
+import { Users, Clock, MessageSquare, Camera, AlertCircle, CheckCircle, Star } from 'lucide-react'
 import { Link } from 'react-router-dom'
 
 const Dashboard = () => {
-  const { user, loading, email } = useUser()
+  const { user, email } = useUser()
+  const [summary, setSummary] = useState(null)
+  const [missing, setMissing] = useState(false)
 
-  if (loading) {
+  // One small request computed server-side, independent of the full user load;
+  // refetched (usually from the server's cache) whenever the user reloads
+  useEffect(() => {
+    if (!email) return
+    getDashboardSummary(email)
+      .then((data) => {
+        setSummary(data)
+        setMissing(false)
+      })
+      .catch((error) => {
+        console.error('Failed to load dashboard:', error)
+        setMissing(error.response?.status === 404)
+      })
+  }, [email, user])
+
+  if (email && !missing && !summary) {
     return (
       <div className="flex flex-col items-center justify-center h-64 gap-4">
         <img
@@ -18,7 +37,7 @@ const Dashboard = () => {
     )
   }
 
-  if (!user) {
+  if (!email || missing) {
     return (
       <div className="max-w-2xl mx-auto">
         <div className="card text-center py-12">
@@ -39,42 +58,34 @@ const Dashboard = () => {
     )
   }
 
-  const relations = user.relations || []
-  const reminders = user.reminders || []
-  const registeredRelations = relations.filter(r => r.isRegistered)
-  const unregisteredRelations = relations.filter(r => !r.isRegistered)
-
-  // Count total conversations from new format
-  const totalConversations = relations.reduce((sum, rel) => {
-    return sum + (rel.conversations?.length || 0) + (rel.messages?.length || 0)
-  }, 0)
+  const { counts, unregistered, relations } = summary
 
   const stats = [
     {
       name: 'Family Members',
-      value: relations.length,
-      subtext: `${registeredRelations.length} registered`,
+      value: counts.relations,
+      subtext: `${counts.registered} registered`,
       icon: Users,
       color: 'bg-blue-500',
       href: '/relations',
     },
     {
       name: 'Active Reminders',
-      value: reminders.length,
+      value: counts.reminders,
       icon: Clock,
       color: 'bg-green-500',
       href: '/reminders',
     },
     {
       name: 'Conversations',
-      value: totalConversations,
+      value: counts.conversations,
       icon: MessageSquare,
       color: 'bg-purple-500',
       href: '/conversations',
     },
     {
       name: 'Face Recognition',
-      value: registeredRelations.length,
+      value: counts.registered,
       subtext: 'faces registered',
       icon: Camera,
       color: 'bg-orange-500',
@@ -82,29 +93,18 @@ const Dashboard = () => {
     },
   ]
 
-  const upcomingReminders = reminders
-    .map(r => ({
-      ...r,
-      timeObj: new Date(`2000-01-01T${r.time}:00`)
-    }))
-    .sort((a, b) => a.timeObj - b.timeObj)
-    .slice(0, 3)
-
-  // Get recent conversations
-  const recentConversations = relations
-    .flatMap(rel => (rel.conversations || []).map(conv => ({
-      ...conv,
-      relationName: rel.name,
-      relationship: rel.relationship
-    })))
-    .sort((a, b) => new Date(b.timestamp || 0) - new Date(a.timestamp || 0))
-    .slice(0, 3)
+  const upcomingReminders = summary.next_reminders
+  const recentConversations = summary.recent_conversations.map(conv => ({
+    ...conv,
+    relationName: conv.relation_name,
+  }))
+  const topVisitors = summary.top_visitors
 
   return (
     <div>
       <div className="mb-8">
         <h1 className="text-3xl font-bold text-gray-100 mb-2">
-          Welcome back, {user.name}!
+          Welcome back, {summary.name}!
         </h1>
         <p className="text-gray-400">
           Here's an overview of your care management
@@ -112,16 +112,16 @@ const Dashboard = () => {
       </div>
 
       {/* Alert for unregistered relations */}
-      {unregisteredRelations.length > 0 && (
+      {unregistered.length > 0 && (
         <div className="mb-6 p-4 bg-orange-900/30 border border-orange-700 rounded-lg">
           <div className="flex items-start gap-3">
             <AlertCircle className="w-5 h-5 text-orange-400 mt-0.5" />
             <div className="flex-1">
               <p className="text-orange-300 font-medium">
-                {unregisteredRelations.length} relation(s) need face registration
+                {unregistered.length} relation(s) need face registration
               </p>
               <p className="text-orange-400/80 text-sm mt-1">
-                {unregisteredRelations.map(r => r.name).join(', ')} - Go to{' '}
+                {unregistered.join(', ')} - Go to{' '}
                 <Link to="/face-recognition" className="underline hover:text-orange-300">
                   Face Recognition
                 </Link>{' '}
@@ -177,7 +177,7 @@ const Dashboard = () => {
           </div>
           {relations.length > 0 ? (
             <div className="space-y-3">
-              {relations.slice(0, 4).map((relation) => (
+              {relations.map((relation) => (
                 <div
                   key={relation.id}
                   className="flex items-center gap-3 p-3 bg-gray-700 rounded-lg"
@@ -254,6 +254,37 @@ const Dashboard = () => {
           )}
         </div>
 
+        {/* Most Frequent Visitors */}
+        <div className="card lg:col-span-2">
+          <div className="flex items-center justify-between mb-4">
+            <h2 className="text-xl font-bold text-gray-100">Most Frequent Visitors</h2>
+          </div>
+          {topVisitors.length > 0 ? (
+            <div className="grid grid-cols-1 md:grid-cols-3 lg:grid-cols-5 gap-4">
+              {topVisitors.map((visitor) => (
+                <div
+                  key={visitor.id}
+                  className="flex items-center gap-3 p-3 bg-gray-700 rounded-lg"
+                >
+                  <div className="w-10 h-10 rounded-full bg-yellow-600 flex items-center justify-center">
+                    <Star className="w-5 h-5 text-white" />
+                  </div>
+                  <div className="flex-1">
+                    <p className="font-medium text-gray-100">{visitor.name}</p>
+                    <p className="text-sm text-gray-400">
+                      {visitor.count.value} visits · {visitor.this_week} this week
+                    </p>
+                  </div>
+                </div>
+              ))}
+            </div>
+          ) : (
+            <p className="text-gray-400 text-center py-4">
+              No visits recorded yet
+            </p>
+          )}
+        </div>
+
         {/* Recent Conversations */}
         <div className="card lg:col-span-2">
           <div className="flex items-center justify-between mb-4">
@@ -215,7 +215,10 @@ const FaceRecognition = () => {
           ? transcript.substring(0, 97) + '...'
           : transcript || 'Brief conversation'
 
-        await addConversation(email, currentRecognizedFace.id, transcript, summary)
+        const duration = listeningStartTimeRef.current
+          ? (Date.now() - listeningStartTimeRef.current) / 1000
+          : null
+        await addConversation(email, currentRecognizedFace.id, transcript, summary, duration)
         await loadFaceDescriptors() // Refresh to get updated lastSummary
         console.log('Conversation saved:', summary)
       } catch (err) {
@@ -4,7 +4,7 @@ import { addReminder, deleteReminder } from '../services/api'
 import { Clock, Plus, Trash2, X, Bell } from 'lucide-react'
 
 const Reminders = () => {
-  const { user, email, loadUser: refreshUser } = useUser()
+  const { user, email, loadUser: refreshUser, dueReminder, dismissReminder } = useUser()
   const [showModal, setShowModal] = useState(false)
   const [showDeleteModal, setShowDeleteModal] = useState(false)
   const [reminderToDelete, setReminderToDelete] = useState(null)
@@ -104,6 +104,20 @@ const Reminders = () => {
         </button>
       </div>
 
+      {dueReminder && (
+        <div className="card mb-6 flex items-center justify-between border border-amber-500">
+          <div className="flex items-center gap-3">
+            <Bell className="w-6 h-6 text-amber-500" />
+            <p className="text-gray-100">
+              {formatTime(dueReminder.time)} — {dueReminder.message}
+            </p>
+          </div>
+          <button onClick={dismissReminder} className="text-gray-400 hover:text-gray-100">
+            <X className="w-5 h-5" />
+          </button>
+        </div>
+      )}
+
       {reminders.length === 0 ? (
         <div className="card text-center py-12">
           <div className="flex flex-col items-center gap-4 mb-4">
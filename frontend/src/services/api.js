@@ -39,6 +39,12 @@ export const getReminders = async (email) => {
   return response.data
 }
 
+// Counts, next reminders, recent conversations and frequent visitors in one request
+export const getDashboardSummary = async (email) => {
+  const response = await api.get('/dashboard/summary', { params: { email } })
+  return response.data
+}
+
 // ============== NEW API FUNCTIONS ==============
 
 // Face Registration
@@ -57,12 +63,13 @@ export const getFaceDescriptors = async (email) => {
 }
 
 // Conversation Management
-export const addConversation = async (email, relationId, transcript, summary) => {
+export const addConversation = async (email, relationId, transcript, summary, duration = null) => {
   const response = await api.post('/conversation/add', {
     email,
     relation_id: relationId,
     transcript,
-    summary
+    summary,
+    duration
   })
   return response.data
 }
@@ -74,13 +81,23 @@ export const getLatestConversation = async (email, relationId) => {
   return response.data
 }
 
-export const getAllConversations = async (email, relationId = null) => {
+// Pass conversationId to get one conversation with its transcript, even once archived
+export const getAllConversations = async (email, relationId = null, conversationId = null) => {
   const params = { email }
   if (relationId) params.relation_id = relationId
+  if (conversationId) params.conversation_id = conversationId
   const response = await api.get('/conversations/all', { params })
   return response.data
 }
 
+// Visits per week, conversation lengths and time since the last visit
+export const getRelationStats = async (email, relationId, weeks = 12) => {
+  const response = await api.get('/relation/stats', {
+    params: { email, relation_id: relationId, weeks }
+  })
+  return response.data
+}
+
 // Delete Operations
 export const deleteRelation = async (email, relationId) => {
   const response = await api.delete('/relation/delete', {
@@ -106,6 +123,16 @@ export const updateRelation = async (email, relationId, updates) => {
   return response.data
 }
 
+// Server push: reminder, recognition, summary_ready, message_added and zone_exit events for one user.
+// Returns a function that closes the stream.
+export const subscribeEvents = (email, handlers) => {
+  const source = new EventSource(`${API_BASE_URL}/events?email=${encodeURIComponent(email)}`)
+  Object.entries(handlers).forEach(([event, handler]) => {
+    source.addEventListener(event, (e) => handler(JSON.parse(e.data)))
+  })
+  return () => source.close()
+}
+
 export default api
 
 
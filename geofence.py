@@ -0,0 +1,174 @@
+import csv
+import math
+import random
+import time
+from dataclasses import dataclass
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+@dataclass
+class Zone:
+    name: str
+    lat: float
+    lon: float
+    radius_km: float
+
+    def as_dict(self) -> dict:
+        return {"name": self.name, "lat": self.lat, "lon": self.lon, "radius_km": self.radius_km}
+
+
+def haversine_km(lats, lons, zone_lats, zone_lons) -> np.ndarray:
+    """
+    Great-circle distances from every point to every zone centre, as a
+    (points, zones) array. Spherical, so within ~0.5% of the geodesic
+    distance, which is well below GPS/IP location error.
+    """
+    lat1 = np.radians(np.asarray(lats, dtype=np.float64))[:, None]
+    lon1 = np.radians(np.asarray(lons, dtype=np.float64))[:, None]
+    lat2 = np.radians(np.asarray(zone_lats, dtype=np.float64))[None, :]
+    lon2 = np.radians(np.asarray(zone_lons, dtype=np.float64))[None, :]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class GeofenceEngine:
+    """
+    Tracks one person against many zones.
+
+    A zone is only left once the distance exceeds radius + `hysteresis_km`
+    and only re-entered below radius - `hysteresis_km`, so location jitter
+    near the boundary doesn't flap between enter and exit. The band is capped
+    at a quarter of each zone's radius so small zones can still be entered.
+    `update` returns the transitions as ("enter" | "exit", zone) pairs.
+    """
+
+    def __init__(self, zones, hysteresis_km=0.05):
+        self.zones = list(zones)
+        self.hysteresis_km = hysteresis_km
+        self._lats = np.array([z.lat for z in self.zones])
+        self._lons = np.array([z.lon for z in self.zones])
+        self._radii = np.array([z.radius_km for z in self.zones])
+        self._bands = np.minimum(hysteresis_km, self._radii / 4)
+        self.inside = None  # Bool per zone; set from the first fix without reporting transitions
+        self.margin_km = 0.0  # Distance to the nearest boundary after the last update
+
+    def update(self, lat, lon):
+        return self.update_many([lat], [lon])[0]
+
+    def update_many(self, lats, lons):
+        """Feeds a track of fixes in order; returns one transition list per fix."""
+        if not self.zones:
+            return [[] for _ in lats]
+        distances = haversine_km(lats, lons, self._lats, self._lons)
+        enter = distances < self._radii - self._bands
+        leave = distances > self._radii + self._bands
+        results = []
+        for i in range(len(distances)):
+            if self.inside is None:
+                self.inside = distances[i] <= self._radii
+                results.append([])
+                continue
+            entered = enter[i] & ~self.inside
+            left = leave[i] & self.inside
+            self.inside = (self.inside | entered) & ~left
+            results.append([("enter", self.zones[j]) for j in np.flatnonzero(entered)]
+                           + [("exit", self.zones[j]) for j in np.flatnonzero(left)])
+        self.margin_km = float(np.min(np.abs(distances[-1] - self._radii)))
+        return results
+
+    def next_interval(self, min_seconds=5, max_seconds=300, speed_kmh=30.0) -> float:
+        """
+        Seconds until the next fix is worth taking: the time needed to reach
+        the nearest boundary at `speed_kmh`, clamped. Deep inside (or far
+        outside) a zone this backs off to `max_seconds`.
+        """
+        if not self.zones:
+            return max_seconds
+        return max(min_seconds, min(max_seconds, self.margin_km / speed_kmh * 3600))
+
+
+class IPLocationSource:
+    """Coarse location from the public IP address (a network call per fix)."""
+
+    def read(self):
+        import geocoder
+        return geocoder.ip("me").latlng
+
+
+class ReplayLocationSource:
+    """Replays recorded fixes, from a list of (lat, lon) or a CSV with lat,lon columns."""
+
+    def __init__(self, points, loop=False):
+        self.points = list(points)
+        self.loop = loop
+        self._index = 0
+
+    @classmethod
+    def from_csv(cls, path, loop=False):
+        with open(path, newline="") as f:
+            return cls([(float(row["lat"]), float(row["lon"])) for row in csv.DictReader(f)], loop)
+
+    def read(self):
+        if self._index >= len(self.points):
+            if not self.loop or not self.points:
+                return None
+            self._index = 0
+        point = self.points[self._index]
+        self._index += 1
+        return point
+
+
+class SimulatedWalk:
+    """Random walk from a starting point, for trying zones out without moving."""
+
+    def __init__(self, lat, lon, step_km=0.05, seed=None):
+        self.lat, self.lon = lat, lon
+        self.step_km = step_km
+        self._rng = random.Random(seed)
+
+    def read(self):
+        bearing = self._rng.uniform(0, 2 * math.pi)
+        self.lat += self.step_km / 111.32 * math.cos(bearing)
+        self.lon += self.step_km / (111.32 * math.cos(math.radians(self.lat))) * math.sin(bearing)
+        return [self.lat, self.lon]
+
+
+def track(engine, source, on_exit=None, on_enter=None, stop_event=None, sleep=time.sleep, **interval):
+    """
+    Polls `source` and reports transitions until the source runs out or
+    `stop_event` is set. The wait between fixes comes from
+    `engine.next_interval(**interval)`.
+    """
+    while stop_event is None or not stop_event.is_set():
+        location = source.read()
+        if location is None:
+            print("Could not retrieve location.")
+            return
+        for kind, zone in engine.update(*location):
+            callback = on_exit if kind == "exit" else on_enter
+            print(f"{'Left' if kind == 'exit' else 'Entered'} zone {zone.name}")
+            if callback is not None:
+                callback(zone, location)
+        sleep(engine.next_interval(**interval))
+
+
+if __name__ == "__main__":
+    # Benchmark: vectorized distance check against per-pair geopy
+    import geopy.distance
+
+    rng = np.random.default_rng(0)
+    lats, lons = 40.35 + rng.uniform(-0.1, 0.1, 10_000), -74.66 + rng.uniform(-0.1, 0.1, 10_000)
+    zlats, zlons = 40.35 + rng.uniform(-0.1, 0.1, 20), -74.66 + rng.uniform(-0.1, 0.1, 20)
+    start = time.perf_counter()
+    distances = haversine_km(lats, lons, zlats, zlons)
+    fast = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(200):
+        for j in range(len(zlats)):
+            geopy.distance.distance((lats[i], lons[i]), (zlats[j], zlons[j])).km
+    slow = (time.perf_counter() - start) * len(lats) / 200
+    error = max(abs(distances[i, j] - geopy.distance.distance((lats[i], lons[i]), (zlats[j], zlons[j])).km)
+                for i in range(50) for j in range(len(zlats)))
+    print(f"{distances.size} point-zone checks: haversine {fast * 1000:.1f} ms, geopy ~{slow * 1000:.0f} ms; max error {error * 1000:.1f} m")
@@ -1,5 +1,6 @@
 import speech_recognition as sr
 import pyttsx3
+from vad import calibrate_recognizer
 
 r = sr.Recognizer()
 
@@ -13,10 +14,8 @@ def SpeakText(command):
 while True:
     try:
         with sr.Microphone() as source:
-            # Adjust for ambient noise
-            print("Adjusting for ambient noise... please wait.")
-            r.adjust_for_ambient_noise(source, duration=0.2)
-            r.energy_threshold = 1000
+            # Adjust for ambient noise once, not before every utterance
+            calibrate_recognizer(r, source)
             audio = r.listen(source)
             text = r.recognize_google(audio)
             text = text.lower()
@@ -0,0 +1,106 @@
+from ingest import INGEST_TTL
+
+# Every endpoint looks a user up by email; the unique index also makes
+# create_user's upsert safe when two clients register the same email at once.
+# The multikey indexes serve the queries that reach inside embedded arrays.
+# Lookups by relation always include the email, so email_unique already
+# narrows them to one document; an (email, relations.id) index would only
+# add write cost.
+INDEXES = [
+    ("users", "email_unique", [("email", 1)], {"unique": True}),
+    ("users", "conversation_timestamp", [("relations.conversations.timestamp", 1)], {"sparse": True}),
+    ("users", "reminder_time", [("reminders.time", 1)], {"sparse": True}),  # Scheduler load: users with reminders
+    # One compressed segment per user, relation and month (see archive.py)
+    ("transcript_archive", "segment_unique", [("email", 1), ("relation_id", 1), ("month", 1)], {"unique": True}),
+    # Client event ids already applied by /ingest/batch (see ingest.claim), forgotten after INGEST_TTL
+    ("ingested_events", "event_unique", [("email", 1), ("event_id", 1)], {"unique": True}),
+    ("ingested_events", "event_ttl", [("at", 1)], {"expireAfterSeconds": INGEST_TTL}),
+]
+DROPPED = [("users", "relation_id")]  # Created by earlier versions
+
+
+def ensure_indexes(db):
+    """
+    Creates any missing index and drops the ones in DROPPED; existing ones
+    are left as they are, so this is cheap to run on every startup. Returns
+    the names created or already present.
+    """
+    from pymongo.errors import OperationFailure
+
+    for collection, name in DROPPED:
+        if name in db[collection].index_information():
+            db[collection].drop_index(name)
+            print(f"Dropped index {name}")
+
+    done = []
+    for collection, name, keys, options in INDEXES:
+        try:
+            db[collection].create_index(keys, name=name, **options)
+            done.append(name)
+        except OperationFailure as e:
+            if name == "email_unique" and e.code == 11000:
+                duplicates = [d["_id"] for d in db.users.aggregate([
+                    {"$group": {"_id": "$email", "n": {"$sum": 1}}},
+                    {"$match": {"n": {"$gt": 1}}},
+                    {"$limit": 20},
+                ])]
+                print(f"Unique email index not created, duplicate users exist: {duplicates}")
+            else:
+                print(f"Index {name} not created: {e}")
+    return done
+
+
+if __name__ == "__main__":
+    # Benchmark: lookups against 100k users with and without the indexes.
+    # Uses a scratch database on MONGODB_URL and drops it afterwards.
+    import random
+    import time
+    from mongo import get_db, close_db
+
+    db = get_db().client["recall_index_bench"]
+    db.users.drop()
+    rng = random.Random(0)
+    n_users = 100_000
+    start = time.perf_counter()
+    for base in range(0, n_users, 5000):
+        db.users.insert_many([{
+            "name": f"User {i}",
+            "email": f"user{i}@example.com",
+            "broadcastList": [],
+            "relations": [{
+                "id": str(r), "name": f"Person {r}", "relationship": "Friend", "messages": [],
+                "count": {"value": 1},
+                "conversations": [{"id": str(c), "timestamp": f"2026-{rng.randrange(1, 11):02d}-{rng.randrange(1, 29):02d}T10:00:00",
+                                   "transcript": "", "summary": "Talked about the weather"} for c in range(3)],
+            } for r in range(3)],
+            "reminders": [{"id": 1, "time": f"{rng.randrange(24):02d}:00", "message": "Take medicine"}] if i % 10 == 0 else [],
+        } for i in range(base, min(base + 5000, n_users))], ordered=False)
+    print(f"Inserted {n_users} users in {time.perf_counter() - start:.1f}s")
+
+    emails = [f"user{rng.randrange(n_users)}@example.com" for _ in range(500)]
+    queries = {  # name -> (filter for an email, result limit)
+        "user by email": (lambda e: {"email": e}, 1),
+        "relation by id": (lambda e: {"email": e, "relations.id": "2"}, 1),
+        "conversations since": (lambda e: {"relations.conversations.timestamp": {"$gte": "2026-10-28"}}, 100),
+        "users with reminders": (lambda e: {"reminders.time": {"$exists": True}}, 100),
+    }
+
+    def run(label):
+        for name, (make_filter, limit) in queries.items():
+            samples = []
+            for email in emails:
+                t = time.perf_counter()
+                list(db.users.find(make_filter(email), {"_id": 1}).limit(limit))
+                samples.append(time.perf_counter() - t)
+            samples.sort()
+            stats = db.users.find(make_filter(emails[0]), {"_id": 1}).limit(limit).explain()["executionStats"]
+            print(f"{label:>8} {name:21s} p50 {samples[len(samples) // 2] * 1000:7.2f} ms  "
+                  f"p99 {samples[int(len(samples) * 0.99)] * 1000:7.2f} ms  {stats['totalDocsExamined']} docs examined")
+
+    run("no index")
+    start = time.perf_counter()
+    ensure_indexes(db)
+    print(f"Built indexes in {time.perf_counter() - start:.1f}s")
+    run("indexed")
+    db.client.drop_database("recall_index_bench")
+    close_db()
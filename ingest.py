@@ -0,0 +1,96 @@
+import datetime
+from relation_stats import conversation_update
+
+MAX_INGEST_BATCH = 5000
+INGEST_TTL = 30 * 24 * 3600  # Seconds a client event id is remembered in ingested_events; covers a device offline for weeks
+EVENT_TYPES = ("relation", "message", "conversation", "count")
+
+
+def validate(event) -> str:
+    """Returns an error message for a malformed event, or None."""
+    if not isinstance(event, dict) or not event.get("id"):
+        return "every event needs an id"
+    if event.get("type") not in EVENT_TYPES:
+        return f"unknown event type {event.get('type')!r}; use one of: {', '.join(EVENT_TYPES)}"
+    data = event.get("data")
+    if not isinstance(data, dict):
+        return f"event {event['id']} has no data"
+    relation_id = data["relation"].get("id") if event["type"] == "relation" and isinstance(data.get("relation"), dict) else data.get("relation_id")
+    if not relation_id:
+        return f"event {event['id']} has no relation id"
+    return None
+
+
+def relation_id(event: dict) -> str:
+    data = event["data"]
+    return data["relation"]["id"] if event["type"] == "relation" else data["relation_id"]
+
+
+def claim(db, email: str, event_ids) -> set:
+    """
+    Records `event_ids` in ingested_events and returns the ones that weren't
+    there yet. The unique (email, event_id) index makes this the point where
+    two racing syncs of the same batch are told apart: each id is claimed by
+    exactly one of them.
+    """
+    from pymongo.errors import BulkWriteError
+
+    if not event_ids:
+        return set()
+    now = datetime.datetime.now(datetime.timezone.utc)
+    try:
+        db.ingested_events.insert_many([{"email": email, "event_id": i, "at": now} for i in event_ids], ordered=False)
+        return set(event_ids)
+    except BulkWriteError as e:
+        if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+            raise
+        duplicates = {event_ids[error["index"]] for error in e.details["writeErrors"]}
+        return set(event_ids) - duplicates
+
+
+def release(db, email: str, event_ids):
+    """Forgets claimed ids whose writes failed, so a resent batch applies them."""
+    db.ingested_events.delete_many({"email": email, "event_id": {"$in": list(event_ids)}})
+
+
+def build_ops(email: str, event: dict):
+    """
+    The Mongo updates for one client event. Replays are filtered out by
+    claim() beforehand; only relation events are idempotent on their own.
+    """
+    from pymongo import UpdateOne
+
+    data = event["data"]
+    ts = event.get("ts") or datetime.datetime.now().timestamp()
+    when = datetime.datetime.fromtimestamp(ts).isoformat()
+    user = {"email": email}
+
+    if event["type"] == "relation":
+        relation = data["relation"]
+        fields = {f"relations.$[r].{k}": v for k, v in relation.items() if k != "id"}
+        ops = [UpdateOne({**user, "relations.id": {"$ne": relation["id"]}},
+                         {"$push": {"relations": {**relation, "conversations": [], "messages": []}}})]
+        if fields:
+            ops.append(UpdateOne(user, {"$set": fields}, array_filters=[{"r.id": relation["id"]}]))
+        return ops
+
+    filters = [{"r.id": data["relation_id"]}]
+    if event["type"] == "message":
+        update = {"$push": {"relations.$[r].messages": data.get("message", "")}}
+    elif event["type"] == "conversation":
+        conversation = {
+            "id": str(ts),
+            "timestamp": when,
+            "transcript": data.get("transcript", ""),
+            "summary": data.get("summary", ""),
+        }
+        if isinstance(data.get("duration"), (int, float)):
+            conversation["duration"] = data["duration"]
+        update = conversation_update(conversation)
+    else:  # count
+        update = {
+            "$max": {"relations.$[r].count.last": when},  # Replayed offline events can arrive late
+            "$inc": {"relations.$[r].count.value": 1},
+            "$min": {"relations.$[r].count.first": when},
+        }
+    return [UpdateOne(user, update, array_filters=filters)]
@@ -0,0 +1,129 @@
+import math
+import re
+from collections import Counter
+from summarizer import SummarizerBackend
+
+SUMMARY_WORDS = 20
+WINDOW_WORDS = 12  # Speech recognition output has no punctuation, so score fixed word windows
+
+STOPWORDS = set("""
+a about above after again all am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from
+further had has have having he her here hers herself him himself his how i if in into
+is it its itself just me more most my myself no nor not now of off on once only or
+other our ours ourselves out over own same she should so some such than that the their
+theirs them themselves then there these they this those through to too under until up
+very was we were what when where which while who whom why will with would you your
+yours yourself yourselves yeah okay oh um uh like really well got get going go know
+""".split())
+
+NAME_PATTERNS = [
+    re.compile(r"\bmy name is (\w+)"),
+    re.compile(r"\bi am (\w+) your\b"),
+    re.compile(r"\bit'?s (\w+) your\b"),
+    re.compile(r"\bthis is (\w+)\b"),
+]
+
+# Words the visitor uses for the patient -> how the visitor is related to them
+RELATIONSHIP_CUES = [
+    (("dad", "daddy", "father", "mom", "mommy", "mum", "mother"), "child"),
+    (("grandpa", "grandma", "granddad", "grandmother", "grandfather", "nana"), "grandchild"),
+    (("honey", "darling", "sweetheart"), "spouse"),
+    (("brother", "sister", "sis", "bro"), "sibling"),
+    (("doctor", "nurse", "medication", "appointment", "prescription", "dose"), "client-professional"),
+    (("office", "project", "meeting", "boss", "colleague"), "coworker"),
+    (("buddy", "mate", "pal", "friend"), "friend"),
+]
+
+NOT_NAMES = STOPWORDS | {"here", "just", "so", "really", "sorry", "fine", "good", "great"}
+
+
+def tokenize(text: str):
+    return re.findall(r"[a-z']+", text.lower())
+
+
+def extract_name(text: str) -> str:
+    lowered = text.lower()
+    for pattern in NAME_PATTERNS:
+        match = pattern.search(lowered)
+        if match and match.group(1) not in NOT_NAMES:
+            return match.group(1).capitalize()
+    return "no_name"
+
+
+def extract_relationship(words) -> str:
+    counts = Counter(words)
+    best, best_hits = "acquaintances", 0
+    for cues, relationship in RELATIONSHIP_CUES:
+        hits = sum(counts[cue] for cue in cues)
+        if hits > best_hits:
+            best, best_hits = relationship, hits
+    return best
+
+
+def windows(words, size=WINDOW_WORDS):
+    return [words[i:i + size] for i in range(0, len(words), size)]
+
+
+class ExtractiveBackend(SummarizerBackend):
+    """
+    CPU-only, network-free summarizer producing the same Summary schema as
+    Gemini. The summary is built from the highest TF-IDF word windows of the
+    transcript; name and relationship come from simple conversational cues.
+    Each transcript is scored on its own, so its summary doesn't depend on
+    what it was batched with.
+    """
+
+    name = "extractive-v2"
+
+    def __init__(self, summary_words=SUMMARY_WORDS):
+        self.summary_words = summary_words
+
+    def summarize_batch(self, transcripts):
+        summaries = []
+        for transcript in transcripts:
+            words = tokenize(transcript)
+            summaries.append({
+                "name": extract_name(transcript),
+                "Relationship": extract_relationship(words),
+                "convo_summary": self._summary(windows(words)),
+            })
+        return summaries
+
+    def _summary(self, doc_windows):
+        # Document frequency over the transcript's own windows: words that recur
+        # in every window (filler) score low, ones specific to a few score high
+        df = Counter()
+        for window in doc_windows:
+            df.update(set(window))
+        total = len(doc_windows) or 1
+
+        def score(window):
+            content = [w for w in window if w not in STOPWORDS]
+            if not content:
+                return 0.0
+            return sum(math.log(1 + total / df[w]) for w in content) / math.sqrt(len(window))
+
+        ranked = sorted(range(len(doc_windows)), key=lambda i: (-score(doc_windows[i]), i))
+        chosen, length = [], 0
+        for i in ranked:
+            if length >= self.summary_words:
+                break
+            chosen.append(i)
+            length += len(doc_windows[i])
+        words = [w for i in sorted(chosen) for w in doc_windows[i]][:self.summary_words]
+        if not words:
+            return "Nothing was discussed."
+        text = " ".join(words)
+        return text[0].upper() + text[1:] + "."
+
+
+if __name__ == "__main__":
+    sample = [
+        "hi dad it's john your son how are you feeling today we went to the park with the kids "
+        "and they loved the ducks the weather was lovely and we had ice cream afterwards",
+        "good morning I am here to check your medication the doctor changed your dose last week "
+        "so please take one tablet after breakfast and one after dinner",
+    ]
+    for summary in ExtractiveBackend().summarize_batch(sample):
+        print(summary)
@@ -1,15 +1,73 @@
-from fastapi import FastAPI, Request, HTTPException
-from mongo import mongoDB
-import os
+from contextlib import asynccontextmanager
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Query
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from mongo import get_db, close_db
+from indexes import ensure_indexes
+from relation_stats import conversation_update, summarize as relation_summary
+from archive import fetch as fetch_transcript, start_compaction, COMPACT_INTERVAL
+from dashboard import TTLCache, pipeline as dashboard_pipeline, summarize as dashboard_summary
+from reminder_scheduler import ReminderScheduler, get_zone, first_day, load_from_mongo, watch_mongo
+from push import PushHub
+from notify import email_enabled, notify_zone_exit
+from ingest import MAX_INGEST_BATCH, build_ops, claim, relation_id, release, validate
+from metrics import registry, MetricsMiddleware, profiler_from_env
+from json_response import ORJSONResponse, ORJSONRoute
+from schemas import (
+    UserOut, FaceDescriptorsOut, ConversationsOut, RemindersOut,
+    CreateUserIn, AddRelationIn, AddMessageIn, AddReminderIn, RecognitionIn, ZoneIn, ZoneExitIn,
+    RegisterFaceIn, AddConversationIn, IngestBatchIn, DeleteRelationIn, DeleteReminderIn, UpdateRelationIn,
+)
 import datetime
-from bson.objectid import ObjectId
-from bson.errors import InvalidId
+import os
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
 
 load_dotenv()
 
-app = FastAPI()
+# Server-sent events to every open dashboard/recognition client, per user
+hub = PushHub()
+
+
+def deliver_reminder(email, reminder):
+    hub.publish(email, "reminder", reminder)
+
+
+# Dashboard replies per user; writes below invalidate, the TTL covers other processes
+dashboard_cache = TTLCache(ttl=float(os.getenv("DASHBOARD_CACHE_TTL", "30")))
+
+# Fires every user's reminders from one thread, sleeping until the next one is due
+scheduler = ReminderScheduler(on_due=deliver_reminder)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Connect on startup rather than at import so reloads and tests start fast
+    db = get_db()
+    ensure_indexes(db)
+    hub.bind()
+    scheduler.start(loader=load_from_mongo(db))  # Loads in the background
+    watch_mongo(db, scheduler)  # Picks up reminders changed by other processes
+    if COMPACT_INTERVAL > 0:
+        start_compaction(db)  # Moves old transcripts to the compressed archive
+    yield
+    scheduler.stop()
+    close_db()
+
+
+app = FastAPI(lifespan=lifespan)
+app.router.route_class = ORJSONRoute
+
+# Full user documents run to megabytes; level 1 gets most of the size win at a fraction of the CPU
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=int(os.getenv("GZIP_LEVEL", "1")))
+# Per-route latency and size histograms; PROFILE_SLOW_MS also samples stacks of slow requests
+profiler = profiler_from_env()
+app.add_middleware(MetricsMiddleware, service="backend", profiler=profiler)
+registry.gauge("dashboard_cache_hits_total", "Dashboard summary cache hits", lambda: dashboard_cache.hits, kind="counter")
+registry.gauge("dashboard_cache_misses_total", "Dashboard summary cache misses", lambda: dashboard_cache.misses, kind="counter")
+registry.gauge("sse_connections", "Open server-sent event streams", lambda: hub.connections())
+registry.gauge("scheduled_reminders", "Reminders waiting in the scheduler", lambda: len(scheduler))
 
 # CORS configuration for your frontend
 origins = [
@@ -27,11 +85,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(RequestValidationError)
+async def validation_error(request, exc):
+    # Bad input has always been a 400 for the dashboard and devices; the input isn't echoed back
+    errors = [{"loc": e["loc"], "msg": e["msg"], "type": e["type"]} for e in exc.errors()]
+    return JSONResponse(status_code=400, content={"detail": errors})
+
 # HELPER FUNCTION: Now requires an email to find the correct user
 def get_user_by_email(email: str):
     if not email:
         raise HTTPException(status_code=400, detail="Email is required")
-    user = mongoDB.users.find_one({"email": email})
+    user = get_db().users.find_one({"email": email})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -40,41 +104,54 @@ def get_user_by_email(email: str):
 async def root():
     return {"message": "API is running"}
 
-@app.get("/get-user")
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/slow")
+def slow_requests():
+    """Recent requests slower than PROFILE_SLOW_MS, with their hottest functions"""
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Set PROFILE_SLOW_MS to profile slow requests")
+    return {"threshold_ms": profiler.threshold * 1000, "requests": list(profiler.reports)}
+
+@app.get("/get-user", response_model=UserOut)
 def return_user(email: str):
     # This route now dynamically finds the user based on the email passed in the URL
     user = get_user_by_email(email)
-    user["_id"] = str(user["_id"])  # Convert ObjectId to string for JSON
-    return user
+    return ORJSONResponse(user)  # Encodes the ObjectId itself; skips jsonable_encoder on large documents
 
 @app.post("/create-user")
-async def create_user(request: Request):
-    data = await request.json()
-    name = data.get("name")
-    email = data.get("email")
-    broadcastList = data.get("broadcastList", [])
+async def create_user(data: CreateUserIn):
+    name = data.name
+    email = data.email
+    broadcastList = data.broadcastList
+
+    from pymongo.errors import DuplicateKeyError  # Imported here; pymongo loads with the first connection
 
     try:
-        # Check if user already exists
-        if mongoDB.users.find_one({"email": email}):
-            return {"message": "User already exists"}
-            
-        result = mongoDB.users.insert_one(
-            {"name": name, "email": email, "broadcastList": broadcastList, "relations": [], "reminders": []}
+        # The unique email index makes this atomic; concurrent signups can't create duplicates
+        result = get_db().users.update_one(
+            {"email": email},
+            {"$setOnInsert": {"name": name, "email": email, "broadcastList": broadcastList, "relations": [], "reminders": []}},
+            upsert=True,
         )
+        if result.upserted_id is None:
+            return {"message": "User already exists"}
         return {
             "message": "User created successfully",
-            "user_id": str(result.inserted_id)
+            "user_id": str(result.upserted_id)
         }
+    except DuplicateKeyError:  # Lost an upsert race to the same email
+        return {"message": "User already exists"}
     except Exception as e:
         print(f"Error: {e}")
         return {"error": "User not created"}
 
 @app.post("/add-relation")
-async def add_relation(request: Request):
-    data = await request.json()
-    email = data.get("email")  # Identify user by email
-    new_relation = data.get("relation")
+async def add_relation(data: AddRelationIn):
+    email = data.email  # Identify user by email
+    new_relation = data.relation.model_dump()
 
     user = get_user_by_email(email)
     relations = user.get("relations", [])
@@ -85,20 +162,20 @@ async def add_relation(request: Request):
         updated_relations.append(new_relation)
 
     try:
-        mongoDB.users.update_one(
+        get_db().users.update_one(
             {"email": email},
             {"$set": {"relations": updated_relations}},
         )
+        dashboard_cache.invalidate(email)
         return {"message": "Relation added successfully"}
     except Exception as e:
         return {"error": str(e)}
 
 @app.post("/message/add")
-async def add_message(request: Request):
-    data = await request.json()
-    email = data.get("email")
-    message = data.get("message", "")
-    relation_id = data.get("relation_id")
+async def add_message(data: AddMessageIn):
+    email = data.email
+    message = data.message
+    relation_id = data.relation_id
 
     user = get_user_by_email(email)
     relations = user.get("relations", [])
@@ -110,53 +187,112 @@ async def add_message(request: Request):
             relation["messages"] = messages
 
     try:
-        mongoDB.users.update_one(
+        get_db().users.update_one(
             {"email": email}, {"$set": {"relations": relations}}
         )
+        dashboard_cache.invalidate(email)
+        hub.publish(email, "message_added", {"relation_id": relation_id, "message": message})
         return {"message": "Message added successfully"}
     except Exception as e:
         return {"error": "Message not added"}
 
 @app.post("/reminder/add")
-async def add_user_reminder(request: Request):
-    data = await request.json()
-    email = data.get("email")
-    reminder_time = data.get("time")
-    message = data.get("message")
-
-    try:
-        # Validate time format
-        datetime.datetime.strptime(reminder_time, "%H:%M")
-        
-        user = get_user_by_email(email)
-        new_id = len(user.get("reminders", [])) + 1
-        new_reminder = {"id": new_id, "time": reminder_time, "message": message}
-
-        mongoDB.users.update_one(
-            {"email": email}, {"$push": {"reminders": new_reminder}}
-        )
-        return {"message": f"Reminder set for {reminder_time}"}
-    except ValueError:
-        return {"error": "Invalid time format. Use HH:MM"}
+async def add_user_reminder(data: AddReminderIn):
+    # Time, repeat and timezone are validated by AddReminderIn
+    email = data.email
+    reminder_time = data.time
+    message = data.message
+    repeat = data.repeat
+    timezone = data.timezone
 
-@app.get("/reminder/get")
+    user = get_user_by_email(email)
+    # Ids must stay unique after deletes, since the scheduler keys on them
+    new_id = max((r["id"] for r in user.get("reminders", [])), default=0) + 1
+    new_reminder = {"id": new_id, "time": reminder_time, "message": message, "repeat": repeat}
+    if timezone:
+        new_reminder["timezone"] = timezone
+    if repeat == "once":
+        new_reminder["date"] = first_day(reminder_time, get_zone(timezone or user.get("timezone"))).isoformat()
+    elif repeat == "weekly":
+        weekday = data.weekday
+        if weekday is None:
+            weekday = first_day(reminder_time, get_zone(timezone or user.get("timezone"))).weekday()
+        new_reminder["weekday"] = weekday
+
+    get_db().users.update_one(
+        {"email": email}, {"$push": {"reminders": new_reminder}}
+    )
+    dashboard_cache.invalidate(email)
+    scheduler.schedule(email, new_reminder, timezone or user.get("timezone"))
+    return {"message": f"Reminder set for {reminder_time}", "id": new_id}
+
+@app.get("/events")
+async def stream_events(email: str):
+    """Server-sent events for one user: reminder, recognition, summary_ready, message_added and zone_exit"""
+    get_user_by_email(email)
+    return StreamingResponse(
+        hub.stream(email),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/recognition")
+async def report_recognition(data: RecognitionIn):
+    """Forward a recognition result from a camera device to the user's open clients"""
+    delivered = hub.publish(data.email, "recognition", data.model_dump(exclude={"email"}))
+    return {"delivered": delivered}
+
+
+@app.get("/reminder/get", response_model=RemindersOut, response_model_exclude_none=True)
 async def get_user_reminders(email: str):
     user = get_user_by_email(email)
     return {"reminders": user.get("reminders", [])}
 
 
+@app.post("/zone/add")
+async def add_zone(data: ZoneIn):
+    """Add or replace a named safe zone (home, day-care, pharmacy...)"""
+    email = data.email
+    zone = data.model_dump(exclude={"email"})
+
+    get_user_by_email(email)
+    get_db().users.update_one({"email": email}, {"$pull": {"zones": {"name": zone["name"]}}})
+    get_db().users.update_one({"email": email}, {"$push": {"zones": zone}})
+    return {"message": f"Zone {zone['name']} saved"}
+
+
+@app.get("/zone/get")
+async def get_user_zones(email: str):
+    user = get_user_by_email(email)
+    return {"zones": user.get("zones", [])}
+
+
+@app.post("/geofence/exit")
+async def report_zone_exit(data: ZoneExitIn, background_tasks: BackgroundTasks):
+    """
+    Tell the user's caregivers that they left a zone: pushed to the user's own
+    open dashboards (and any contact signed in to theirs), and emailed to
+    everyone on the broadcastList
+    """
+    email = data.email
+    user = get_user_by_email(email)
+    event = {"email": email, "name": user.get("name"), "zone": data.zone, "lat": data.lat, "lon": data.lon}
+    recipients = user.get("broadcastList", [])
+    pushed = sum(hub.publish(to, "zone_exit", event) for to in dict.fromkeys([email, *recipients]))
+    if recipients and email_enabled():
+        background_tasks.add_task(notify_zone_exit, recipients, event)
+    return {"recipients": len(recipients), "pushed": pushed, "emailed": bool(recipients and email_enabled())}
+
+
 # ============== NEW ENDPOINTS FOR FACE RECOGNITION & CONVERSATIONS ==============
 
 @app.post("/register-face")
-async def register_face(request: Request):
+async def register_face(data: RegisterFaceIn):
     """Store face descriptor (128-dimensional embedding) for a relation"""
-    data = await request.json()
-    email = data.get("email")
-    relation_id = data.get("relation_id")
-    face_descriptor = data.get("face_descriptor")  # Array of 128 floats
-    
-    if not face_descriptor or len(face_descriptor) != 128:
-        raise HTTPException(status_code=400, detail="Invalid face descriptor. Must be 128-dimensional array.")
+    email = data.email
+    relation_id = data.relation_id
+    face_descriptor = data.face_descriptor.tolist()  # Validated as 128 finite floats
     
     user = get_user_by_email(email)
     relations = user.get("relations", [])
@@ -173,16 +309,17 @@ async def register_face(request: Request):
         raise HTTPException(status_code=404, detail="Relation not found")
     
     try:
-        mongoDB.users.update_one(
+        get_db().users.update_one(
             {"email": email}, 
             {"$set": {"relations": relations}}
         )
+        dashboard_cache.invalidate(email)
         return {"message": "Face registered successfully", "relation_id": relation_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/get-face-descriptors")
+@app.get("/get-face-descriptors", response_model=FaceDescriptorsOut)
 def get_face_descriptors(email: str):
     """Get all registered face descriptors for matching during face recognition"""
     user = get_user_by_email(email)
@@ -212,20 +349,16 @@ def get_face_descriptors(email: str):
                 "photo": rel.get("photo")
             })
     
-    return {"descriptors": descriptors, "unregistered": unregistered}
+    return ORJSONResponse({"descriptors": descriptors, "unregistered": unregistered})
 
 
 @app.post("/conversation/add")
-async def add_conversation(request: Request):
+async def add_conversation(data: AddConversationIn):
     """Add a conversation session with transcript and AI-generated summary"""
-    data = await request.json()
-    email = data.get("email")
-    relation_id = data.get("relation_id")
-    transcript = data.get("transcript", "")
-    summary = data.get("summary", "")
-    
-    if not transcript and not summary:
-        raise HTTPException(status_code=400, detail="Transcript or summary required")
+    email = data.email
+    relation_id = data.relation_id
+    transcript = data.transcript
+    summary = data.summary
     
     conversation = {
         "id": str(datetime.datetime.now().timestamp()),
@@ -233,40 +366,82 @@ async def add_conversation(request: Request):
         "transcript": transcript,
         "summary": summary
     }
-    
-    user = get_user_by_email(email)
-    relations = user.get("relations", [])
-    
-    relation_found = False
-    for relation in relations:
-        if relation["id"] == relation_id:
-            conversations = relation.get("conversations", [])
-            conversations.append(conversation)
-            relation["conversations"] = conversations
-            relation["lastSummary"] = summary  # Quick access field for display
-            
-            # Update interaction count
-            count = relation.get("count", {"value": 0})
-            count["value"] = count.get("value", 0) + 1
-            count["last"] = datetime.datetime.now().isoformat()
-            if "first" not in count:
-                count["first"] = datetime.datetime.now().isoformat()
-            relation["count"] = count
-            
-            relation_found = True
-            break
-    
-    if not relation_found:
-        raise HTTPException(status_code=404, detail="Relation not found")
-    
+    if data.duration is not None:
+        conversation["duration"] = data.duration
+
+    # One in-place update: appends the conversation and bumps the relation's count and rollups
     try:
-        mongoDB.users.update_one(
-            {"email": email}, 
-            {"$set": {"relations": relations}}
+        result = get_db().users.update_one(
+            {"email": email, "relations.id": relation_id},
+            conversation_update(conversation),
+            array_filters=[{"r.id": relation_id}],
         )
-        return {"message": "Conversation added", "summary": summary, "conversation_id": conversation["id"]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if not result.matched_count:
+        get_user_by_email(email)  # 404s for an unknown user
+        raise HTTPException(status_code=404, detail="Relation not found")
+
+    dashboard_cache.invalidate(email)
+    hub.publish(email, "summary_ready", {"relation_id": relation_id, "summary": summary, "conversation_id": conversation["id"]})
+    return {"message": "Conversation added", "summary": summary, "conversation_id": conversation["id"]}
+
+
+@app.post("/ingest/batch")
+async def ingest_batch(data: IngestBatchIn):
+    """
+    Apply an ordered batch of events captured offline by a device
+    (relation, message, conversation, count) in one bulk write. Events carry
+    client ids, so re-sending a batch after a timeout applies nothing twice.
+    Events for a relation that doesn't exist are not applied and are
+    returned under "unknown_relation".
+    """
+    from pymongo.errors import BulkWriteError
+
+    email = data.email
+    events = [event.model_dump() for event in data.events]
+    if len(events) > MAX_INGEST_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_INGEST_BATCH} events per batch")
+    # Same shape as request validation errors, so the device can dead-letter just these events
+    errors = [{"loc": ["body", "events", i], "msg": error, "type": "value_error"}
+              for i, event in enumerate(events) if (error := validate(event))]
+    if errors:
+        raise HTTPException(status_code=400, detail=errors)
+
+    db = get_db()
+    user = db.users.find_one({"email": email}, {"relations.id": 1})
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    known = {r["id"] for r in user.get("relations", [])}
+    unknown = []
+    for event in events:  # In order, so a relation created earlier in the batch is known to later events
+        if event["type"] == "relation":
+            known.add(relation_id(event))
+        elif relation_id(event) not in known:
+            unknown.append(event["id"])
+    skip = set(unknown)
+    claimed = claim(db, email, [e["id"] for e in events if e["id"] not in skip])
+    new_events = [e for e in events if e["id"] in claimed]
+    ops, owners = [], []  # owners[i]: position in new_events of the event ops[i] belongs to
+    for position, event in enumerate(new_events):
+        event_ops = build_ops(email, event)
+        ops.extend(event_ops)
+        owners.extend([position] * len(event_ops))
+    if ops:
+        try:
+            db.users.bulk_write(ops, ordered=True)
+        except BulkWriteError as e:
+            # Ordered: everything before the failing op was applied, so only the
+            # event it belongs to and the ones after it may be resent. Other
+            # errors release nothing, as it isn't known what was written.
+            failed = owners[e.details["writeErrors"][0]["index"]]
+            release(db, email, [event["id"] for event in new_events[failed:]])
+            raise
+        dashboard_cache.invalidate(email)
+        if any(e["type"] in ("message", "conversation") for e in new_events):
+            hub.publish(email, "summary_ready", {"relation_ids": sorted({
+                e["data"].get("relation_id") for e in new_events if e["type"] in ("message", "conversation")})})
+    return {"applied": len(new_events), "duplicates": len(events) - len(new_events) - len(unknown), "unknown_relation": unknown}
 
 
 @app.get("/conversation/latest")
@@ -295,9 +470,12 @@ def get_latest_conversation(email: str, relation_id: str):
     raise HTTPException(status_code=404, detail="Relation not found")
 
 
-@app.get("/conversations/all")
-def get_all_conversations(email: str, relation_id: str = None):
-    """Get all conversations, optionally filtered by relation"""
+@app.get("/conversations/all", response_model=ConversationsOut)
+def get_all_conversations(email: str, relation_id: str = None, conversation_id: str = None):
+    """
+    Get all conversations, optionally filtered by relation. Old transcripts
+    live in the archive and come back only for a single conversation_id.
+    """
     user = get_user_by_email(email)
     relations = user.get("relations", [])
     
@@ -308,6 +486,10 @@ def get_all_conversations(email: str, relation_id: str = None):
         
         conversations = relation.get("conversations", [])
         for conv in conversations:
+            if conversation_id and conv.get("id") != conversation_id:
+                continue
+            if conversation_id and conv.get("archived"):
+                conv = {**conv, "transcript": fetch_transcript(get_db(), email, relation["id"], conv) or ""}
             all_conversations.append({
                 "relation_id": relation["id"],
                 "relation_name": relation["name"],
@@ -317,18 +499,46 @@ def get_all_conversations(email: str, relation_id: str = None):
     
     # Sort by timestamp descending
     all_conversations.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-    return {"conversations": all_conversations}
+    return ORJSONResponse({"conversations": all_conversations})
+
+
+@app.get("/relation/stats")
+def get_relation_stats(email: str, relation_id: str, weeks: int = Query(12, ge=1, le=104), days: int = Query(14, ge=1, le=90)):
+    """Visits per week, conversation lengths and time since the last visit, from the relation's rollups"""
+    docs = list(get_db().users.aggregate([
+        {"$match": {"email": email}},
+        {"$project": {"_id": 0, "relation": {"$map": {
+            "input": {"$filter": {"input": {"$ifNull": ["$relations", []]}, "cond": {"$eq": ["$$this.id", relation_id]}}},
+            "as": "r",
+            "in": {"id": "$$r.id", "name": "$$r.name", "count": "$$r.count", "stats": "$$r.stats"},  # Not the conversations
+        }}}},
+    ]))
+    if not docs:
+        raise HTTPException(status_code=404, detail="User not found")
+    if not docs[0]["relation"]:
+        raise HTTPException(status_code=404, detail="Relation not found")
+    return relation_summary(docs[0]["relation"][0], weeks=weeks, days=days)
+
+
+@app.get("/dashboard/summary")
+def get_dashboard_summary(email: str):
+    """Counts, next reminders, recent conversations and frequent visitors in one query"""
+    summary = dashboard_cache.get(email)
+    if summary is None:
+        version = dashboard_cache.version(email)
+        docs = list(get_db().users.aggregate(dashboard_pipeline(email)))
+        if not docs:
+            raise HTTPException(status_code=404, detail="User not found")
+        summary = dashboard_summary(docs[0])
+        dashboard_cache.put(email, summary, version)
+    return ORJSONResponse(summary)
 
 
 @app.delete("/relation/delete")
-async def delete_relation(request: Request):
+async def delete_relation(data: DeleteRelationIn):
     """Delete a relation by ID"""
-    data = await request.json()
-    email = data.get("email")
-    relation_id = data.get("relation_id")
-    
-    if not relation_id:
-        raise HTTPException(status_code=400, detail="relation_id required")
+    email = data.email
+    relation_id = data.relation_id
     
     user = get_user_by_email(email)
     original_count = len(user.get("relations", []))
@@ -338,24 +548,21 @@ async def delete_relation(request: Request):
         raise HTTPException(status_code=404, detail="Relation not found")
     
     try:
-        mongoDB.users.update_one(
+        get_db().users.update_one(
             {"email": email}, 
             {"$set": {"relations": relations}}
         )
+        dashboard_cache.invalidate(email)
         return {"message": "Relation deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.delete("/reminder/delete")
-async def delete_reminder(request: Request):
+async def delete_reminder(data: DeleteReminderIn):
     """Delete a reminder by ID"""
-    data = await request.json()
-    email = data.get("email")
-    reminder_id = data.get("reminder_id")
-    
-    if reminder_id is None:
-        raise HTTPException(status_code=400, detail="reminder_id required")
+    email = data.email
+    reminder_id = data.reminder_id
     
     user = get_user_by_email(email)
     original_count = len(user.get("reminders", []))
@@ -365,25 +572,23 @@ async def delete_reminder(request: Request):
         raise HTTPException(status_code=404, detail="Reminder not found")
     
     try:
-        mongoDB.users.update_one(
+        get_db().users.update_one(
             {"email": email}, 
             {"$set": {"reminders": reminders}}
         )
+        dashboard_cache.invalidate(email)
+        scheduler.unschedule(email, reminder_id)
         return {"message": "Reminder deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/relation/update")
-async def update_relation(request: Request):
+async def update_relation(data: UpdateRelationIn):
     """Update a relation's details (name, relationship, photo)"""
-    data = await request.json()
-    email = data.get("email")
-    relation_id = data.get("relation_id")
-    updates = data.get("updates", {})
-    
-    if not relation_id:
-        raise HTTPException(status_code=400, detail="relation_id required")
+    email = data.email
+    relation_id = data.relation_id
+    updates = data.updates.model_dump(exclude_unset=True)
     
     user = get_user_by_email(email)
     relations = user.get("relations", [])
@@ -405,10 +610,11 @@ async def update_relation(request: Request):
         raise HTTPException(status_code=404, detail="Relation not found")
     
     try:
-        mongoDB.users.update_one(
+        get_db().users.update_one(
             {"email": email}, 
             {"$set": {"relations": relations}}
         )
+        dashboard_cache.invalidate(email)
         return {"message": "Relation updated successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,279 @@
+import bisect
+import collections
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import parse_qs
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+class Metrics:
+    """
+    Counters, histograms and callback gauges, rendered in the Prometheus text
+    format. Kept dependency-free so every process can expose /metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta = {}  # name -> (kind, help, buckets)
+        self._series = {}  # name -> {labels: Histogram | float}
+        self._callbacks = {}  # name -> fn() returning a number or {((label, value), ...): number}
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        self._meta.setdefault(name, ("histogram", help, buckets))
+
+    def counter(self, name, help):
+        self._meta.setdefault(name, ("counter", help, None))
+
+    def gauge(self, name, help, fn, kind="gauge"):
+        """Reports `fn()` at scrape time; use kind="counter" for running totals kept elsewhere."""
+        self._meta[name] = (kind, help, None)
+        self._callbacks[name] = fn
+
+    def observe(self, name, value, **labels):
+        _, _, buckets = self._meta[name]
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = Histogram(buckets)
+            hist.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    @contextmanager
+    def time(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            snapshot = {name: dict(series) for name, series in self._series.items()}
+        for name, (kind, help, _) in sorted(self._meta.items()):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            if name in self._callbacks:
+                try:
+                    value = self._callbacks[name]()
+                except Exception as e:
+                    print(f"Metric {name} failed: {e}")
+                    continue
+                values = value if isinstance(value, dict) else {(): value}
+                for labels, v in values.items():
+                    lines.append(f"{name}{_format_labels(labels)} {v}")
+                continue
+            for labels, value in sorted(snapshot.get(name, {}).items()):
+                if kind != "histogram":
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(value.buckets + ("+Inf",), value.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {value.sum}")
+                lines.append(f"{name}_count{_format_labels(labels)} {value.count}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Metrics()
+registry.histogram("http_request_seconds", "Request latency by route")
+registry.histogram("http_response_bytes", "Response body size by route", SIZE_BUCKETS)
+registry.counter("http_exceptions_total", "Unhandled exceptions by route and type")
+registry.histogram("mongo_command_seconds", "MongoDB command duration")
+registry.counter("mongo_command_failures_total", "Failed MongoDB commands")
+registry.histogram("llm_call_seconds", "Summarizer backend call duration")
+registry.histogram("llm_batch_size", "Transcripts per summarizer backend call", (1, 2, 4, 8, 16, 32))
+
+
+def command_listener(metrics=registry):
+    """A pymongo CommandListener timing every command by name and collection."""
+    from pymongo import monitoring
+
+    class MongoTimer(monitoring.CommandListener):
+        def __init__(self):
+            self._collections = {}
+
+        def started(self, event):
+            target = event.command.get(event.command_name)
+            collection = target if isinstance(target, str) else ""
+            self._collections[(event.request_id, event.connection_id)] = collection
+
+        def succeeded(self, event):
+            collection = self._collections.pop((event.request_id, event.connection_id), "")
+            metrics.observe("mongo_command_seconds", event.duration_micros / 1e6, command=event.command_name, collection=collection)
+
+        def failed(self, event):
+            collection = self._collections.pop((event.request_id, event.connection_id), "")
+            metrics.observe("mongo_command_seconds", event.duration_micros / 1e6, command=event.command_name, collection=collection)
+            metrics.inc("mongo_command_failures_total", command=event.command_name, collection=collection)
+
+    return MongoTimer()
+
+
+# Stacks keep only application frames, so reports point at this repo's code
+_LIBRARY_PREFIXES = tuple({os.path.dirname(os.__file__), sys.prefix, sys.base_prefix, "<"})
+
+
+class SlowRequestProfiler:
+    """
+    Opt-in sampling profiler for slow requests.
+
+    While any request is in flight, a background thread samples the
+    application frames of every thread each `interval` seconds. When a
+    request takes longer than `threshold` seconds, the samples taken during
+    it are summarized into the functions that appeared most often and kept in
+    `reports`, together with the route and the user email from the query
+    string, so tail latency can be traced to specific users' documents.
+    Overlapping requests can show up in each other's reports.
+    """
+
+    def __init__(self, threshold, interval=0.005, keep=50, max_samples=20000):
+        self.threshold = threshold
+        self.interval = interval
+        self.reports = collections.deque(maxlen=keep)
+        self._samples = collections.deque(maxlen=max_samples)
+        self._active = 0
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def begin(self):
+        with self._cond:
+            self._active += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="slow-profiler", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return time.perf_counter()
+
+    def end(self, started, scope, route, status, size):
+        finished = time.perf_counter()
+        with self._cond:
+            self._active -= 1
+        if finished - started < self.threshold:
+            return None
+        counts = collections.Counter()
+        for ts, stack in list(self._samples):
+            if started <= ts <= finished:
+                counts.update(set(stack))
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        report = {
+            "route": route,
+            "method": scope.get("method"),
+            "email": query.get("email", [None])[0],
+            "status": status,
+            "seconds": round(finished - started, 4),
+            "bytes": size,
+            "top": counts.most_common(15),
+        }
+        self.reports.append(report)
+        print(f"Slow request {report['method']} {route} ({report['email']}): {report['seconds']}s, {size} bytes")
+        return report
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            with self._cond:
+                while self._active == 0:
+                    self._cond.wait()
+            now = time.perf_counter()
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < 40:
+                    code = frame.f_code
+                    if not code.co_filename.startswith(_LIBRARY_PREFIXES):
+                        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                if stack:  # Threads that are only in library code (idle workers, the event loop) are skipped
+                    self._samples.append((now, tuple(stack)))
+            time.sleep(self.interval)
+
+
+def profiler_from_env():
+    """A SlowRequestProfiler when PROFILE_SLOW_MS is set, else None."""
+    threshold = os.getenv("PROFILE_SLOW_MS")
+    return SlowRequestProfiler(float(threshold) / 1000) if threshold else None
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency and response size per route template
+    (so /get-user?email=... is one series, not one per user). Event streams
+    are counted but left out of the latency histogram since they stay open.
+    """
+
+    def __init__(self, app, service, metrics=registry, profiler=None):
+        self.app = app
+        self.service = service
+        self.metrics = metrics
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        token = self.profiler.begin() if self.profiler else None
+        state = {"status": 500, "bytes": 0, "stream": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                state["stream"] = any(k == b"content-type" and v.startswith(b"text/event-stream") for k, v in message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                state["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        route = "unmatched"
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            route = getattr(scope.get("route"), "path", route)
+            self.metrics.inc("http_exceptions_total", service=self.service, route=route, type=type(e).__name__)
+            raise
+        finally:
+            route = getattr(scope.get("route"), "path", route)
+            labels = {"service": self.service, "method": scope["method"], "route": route, "status": state["status"]}
+            if not state["stream"]:
+                self.metrics.observe("http_request_seconds", time.perf_counter() - start, **labels)
+            self.metrics.observe("http_response_bytes", state["bytes"], **labels)
+            if token is not None:
+                self.profiler.end(token, scope, route, state["status"], state["bytes"])
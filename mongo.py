@@ -1,14 +1,30 @@
-from pymongo import MongoClient
 import os
-import certifi
 from dotenv import load_dotenv
 
 load_dotenv()
 
 MONGODB_URL = os.getenv("MONGODB_URL")
 
-mongoClient = MongoClient(MONGODB_URL, tlsCAFile=certifi.where())
-mongoDB = mongoClient["recall"]
+mongoClient = None
+
+
+def get_db():
+    """Returns the "recall" database, creating the client (and importing pymongo) on first use."""
+    global mongoClient
+    if mongoClient is None:
+        import certifi
+        from pymongo import MongoClient
+        from metrics import command_listener
+
+        mongoClient = MongoClient(MONGODB_URL, tlsCAFile=certifi.where(), event_listeners=[command_listener()])
+    return mongoClient["recall"]
+
+
+def close_db():
+    global mongoClient
+    if mongoClient is not None:
+        mongoClient.close()
+        mongoClient = None
 
 
 """
@@ -0,0 +1,55 @@
+import os
+import smtplib
+from email.message import EmailMessage
+
+# Outgoing email for contacts who don't have the app open (the broadcastList),
+# configured by SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD and SMTP_FROM.
+# Read on every send, so values from .env apply whenever it is loaded.
+# Unset SMTP_HOST disables it.
+
+
+def email_enabled() -> bool:
+    return bool(os.getenv("SMTP_HOST") and (os.getenv("SMTP_FROM") or os.getenv("SMTP_USER")))
+
+
+def send_email(recipients, subject: str, body: str) -> int:
+    """Sends one message to each recipient over a single SMTP connection; returns how many were accepted."""
+    if not email_enabled() or not recipients:
+        return 0
+    user, sender = os.getenv("SMTP_USER"), os.getenv("SMTP_FROM") or os.getenv("SMTP_USER")
+    sent = 0
+    try:
+        with smtplib.SMTP(os.getenv("SMTP_HOST"), int(os.getenv("SMTP_PORT", "587")), timeout=15) as smtp:
+            smtp.starttls()
+            if user:
+                smtp.login(user, os.getenv("SMTP_PASSWORD", ""))
+            for recipient in recipients:
+                message = EmailMessage()
+                message["From"], message["To"], message["Subject"] = sender, recipient, subject
+                message.set_content(body)
+                try:
+                    smtp.send_message(message)
+                    sent += 1
+                except smtplib.SMTPException as e:
+                    print(f"Email to {recipient} failed: {e}")
+    except (OSError, smtplib.SMTPException) as e:
+        print(f"Email delivery failed: {e}")
+    return sent
+
+
+def zone_exit_email(event: dict):
+    """(subject, body) telling a contact that `event["name"]` left a safe zone."""
+    name = event.get("name") or event["email"]
+    subject = f"{name} left {event['zone']}"
+    if event.get("lat") is not None and event.get("lon") is not None:
+        location = f"Last known location: https://maps.google.com/?q={event['lat']},{event['lon']}"
+    else:
+        location = "Location unavailable"
+    body = f"{name} has left the safe zone \"{event['zone']}\".\n\n{location}\n"
+    return subject, body
+
+
+def notify_zone_exit(recipients, event: dict) -> int:
+    sent = send_email(recipients, *zone_exit_email(event))
+    print(f"Zone exit for {event['email']} emailed to {sent}/{len(recipients)} contacts")
+    return sent
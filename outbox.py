@@ -0,0 +1,164 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+DEFAULT_PATH = os.getenv("OUTBOX_PATH", "outbox.db")
+MAX_BATCH = 5000  # Must not exceed the backend's MAX_INGEST_BATCH
+
+
+class Outbox:
+    """
+    Durable, ordered queue of events captured on the device.
+
+    Events are committed to SQLite before anything is sent, so nothing is
+    lost while offline or across restarts. Each event gets a client id that
+    the backend uses to ignore replays, which makes re-sending after a
+    timeout safe. Rows are deleted only once the backend acknowledges them.
+    Events the backend rejects, or can't apply because their relation doesn't
+    exist, are moved to the dead_letter table instead of being retried forever.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT UNIQUE NOT NULL, "
+            "type TEXT NOT NULL, ts REAL NOT NULL, data TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS dead_letter ("
+            "seq INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, type TEXT NOT NULL, ts REAL NOT NULL, "
+            "data TEXT NOT NULL, status INTEGER NOT NULL, error TEXT NOT NULL, failed_at REAL NOT NULL)"
+        )
+
+    def add(self, type: str, data: dict) -> str:
+        """Appends an event and returns its client event id."""
+        event_id = str(uuid.uuid4())
+        with self._lock:
+            self._conn.execute("INSERT INTO events (id, type, ts, data) VALUES (?, ?, ?, ?)",
+                               (event_id, type, time.time(), json.dumps(data)))
+        self._wake.set()
+        return event_id
+
+    def pending(self, limit=MAX_BATCH):
+        with self._lock:
+            rows = self._conn.execute("SELECT seq, id, type, ts, data FROM events ORDER BY seq LIMIT ?", (limit,)).fetchall()
+        return [(seq, {"id": id, "type": type, "ts": ts, "data": json.loads(data)}) for seq, id, type, ts, data in rows]
+
+    def ack(self, upto_seq: int):
+        with self._lock:
+            self._conn.execute("DELETE FROM events WHERE seq <= ?", (upto_seq,))
+
+    def dead_letter(self, rejected, status: int):
+        """
+        Copies rejected events, given as (seq, error) pairs, to dead_letter;
+        they leave `events` with the next ack.
+        """
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO dead_letter (seq, id, type, ts, data, status, error, failed_at) "
+                "SELECT seq, id, type, ts, data, ?, ?, ? FROM events WHERE seq = ?",
+                [(status, error, time.time(), seq) for seq, error in rejected])
+        print(f"Moved {len(rejected)} rejected events to the dead-letter table ({status}: {rejected[0][1]})")
+
+    def dead_letters(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT id, type, ts, data, status, error FROM dead_letter ORDER BY seq").fetchall()
+        return [{"id": id, "type": type, "ts": ts, "data": json.loads(data), "status": status, "error": error}
+                for id, type, ts, data, status, error in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    @staticmethod
+    def _event_errors(response, size: int) -> dict:
+        """
+        {position in batch: error} when a 400/422 rejects individual events,
+        i.e. every error's loc is ["body", "events", <index>, ...]. Empty for
+        anything else, including errors in the envelope (email, events list).
+        """
+        if response.status_code not in (400, 422):
+            return {}
+        try:
+            detail = response.json().get("detail")
+        except ValueError:
+            return {}
+        if not isinstance(detail, list) or not detail:
+            return {}
+        errors = {}
+        for error in detail:
+            loc = list(error.get("loc") or []) if isinstance(error, dict) else []
+            if loc[:2] != ["body", "events"] or len(loc) < 3 or not isinstance(loc[2], int) or not 0 <= loc[2] < size:
+                return {}
+            errors.setdefault(loc[2], str(error.get("msg", "invalid event"))[:500])
+        return errors
+
+    def _send(self, session, backend_url: str, email: str, batch) -> int:
+        """
+        Posts `batch` and returns how many events the backend applied. Events
+        the backend rejects individually (malformed, or for a relation it
+        doesn't know) are dead-lettered and the rest resent. Any other error,
+        including 404 for an unknown user and 413, raises so the whole batch
+        is retried later.
+        """
+        response = session.post(f"{backend_url}/ingest/batch", timeout=30,
+                                json={"email": email, "events": [event for _, event in batch]})
+        errors = self._event_errors(response, len(batch))
+        if errors:
+            self.dead_letter([(batch[i][0], error) for i, error in sorted(errors.items())], response.status_code)
+            rest = [row for i, row in enumerate(batch) if i not in errors]
+            return self._send(session, backend_url, email, rest) if rest else 0
+        response.raise_for_status()
+        unknown = set(response.json().get("unknown_relation", []))
+        if unknown:
+            self.dead_letter([(seq, f"unknown relation {event['data'].get('relation_id')}")
+                              for seq, event in batch if event["id"] in unknown], response.status_code)
+        return len(batch) - len(unknown)
+
+    def flush(self, backend_url: str, email: str, session=None, batch_size=MAX_BATCH) -> int:
+        """Sends everything pending in ordered batches; returns how many events were applied."""
+        import requests
+        session = session or requests
+        sent = 0
+        while True:
+            batch = self.pending(batch_size)
+            if not batch:
+                return sent
+            sent += self._send(session, backend_url, email, batch)
+            self.ack(batch[-1][0])
+
+    def start_sync(self, backend_url: str, email: str, interval=30, max_backoff=600) -> threading.Thread:
+        """
+        Flushes on a daemon thread whenever events are added, retrying with
+        exponential backoff while the backend is unreachable or refusing the batch.
+        """
+        import requests
+
+        def run():
+            session = requests.Session()
+            backoff = interval
+            while True:
+                try:
+                    sent = self.flush(backend_url, email, session)
+                    if sent:
+                        print(f"Synced {sent} events")
+                    backoff = interval
+                    self._wake.wait(interval)
+                    self._wake.clear()
+                except requests.RequestException as e:
+                    print(f"Sync failed, {len(self)} events kept for retry: {e}")
+                    time.sleep(backoff)  # New events don't cut the backoff short while offline
+                    backoff = min(backoff * 2, max_backoff)
+
+        thread = threading.Thread(target=run, name="outbox-sync", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import threading
+
+HEARTBEAT_SECONDS = 15  # Keeps proxies from closing idle streams
+
+
+class PushHub:
+    """
+    Per-user fan-out of Server-Sent Events.
+
+    Each connected client gets a small bounded asyncio queue. An event is
+    encoded once and the same bytes are handed to every connection of that
+    user, so fan-out cost is one queue put per connection. Slow clients drop
+    their oldest events instead of holding memory. `publish` is safe to call
+    from any thread (e.g. the reminder scheduler).
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._clients = {}  # email -> set of asyncio.Queue
+        self._lock = threading.Lock()
+        self._loop = None
+
+    def bind(self, loop=None):
+        """Attaches the hub to the server's event loop (call at startup)."""
+        self._loop = loop or asyncio.get_running_loop()
+
+    def connections(self, email=None) -> int:
+        with self._lock:
+            if email is not None:
+                return len(self._clients.get(email, ()))
+            return sum(len(queues) for queues in self._clients.values())
+
+    def publish(self, email: str, event: str, data) -> int:
+        """Sends an event to every open stream of `email`; returns how many received it."""
+        with self._lock:
+            queues = list(self._clients.get(email, ()))
+        if not queues or self._loop is None:
+            return 0
+        message = f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n".encode("utf-8")
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._deliver(queues, message)
+        else:
+            self._loop.call_soon_threadsafe(self._deliver, queues, message)
+        return len(queues)
+
+    @staticmethod
+    def _deliver(queues, message):
+        for q in queues:
+            if q.full():
+                q.get_nowait()
+            q.put_nowait(message)
+
+    async def stream(self, email: str):
+        """Async generator of SSE bytes for one client, until it disconnects."""
+        q = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._clients.setdefault(email, set()).add(q)
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                try:
+                    yield await asyncio.wait_for(q.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+        finally:
+            with self._lock:
+                queues = self._clients.get(email)
+                if queues is not None:
+                    queues.discard(q)
+                    if not queues:
+                        del self._clients[email]
@@ -0,0 +1,101 @@
+import threading
+import time
+
+
+class RecordingSession:
+    """A single conversation recording with its own timestamped transcript."""
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.started_at = time.time()
+        self.stopped_at = None
+        self.segments = []  # [{"start": float, "end": float, "text": str}, ...]
+        self.rolling_summary = None  # Summary dict covering segments[:folded]
+        self.folded = 0
+        self.fold_lock = threading.Lock()
+        self.folding = False
+
+    def add_segment(self, text: str, start: float, end: float):
+        self.segments.append({"start": start, "end": end, "text": text})
+
+    def transcript(self) -> str:
+        return " ".join(segment["text"] for segment in self.segments)
+
+    def unfolded(self):
+        """Segments not yet covered by the rolling summary."""
+        return self.segments[self.folded:]
+
+    def summary_input(self, segments) -> str:
+        """Text to summarize: the rolling summary so far followed by new segments."""
+        text = " ".join(segment["text"] for segment in segments)
+        if not self.rolling_summary:
+            return text
+        return (
+            f"Summary of the conversation so far (name: {self.rolling_summary['name']}, "
+            f"relationship: {self.rolling_summary['Relationship']}): {self.rolling_summary['convo_summary']}\n"
+            f"The conversation continued: {text}"
+        )
+
+    def __repr__(self):
+        return f"RecordingSession({self.id}, {len(self.segments)} segments)"
+
+
+class SessionManager:
+    """
+    Tracks overlapping recording sessions that share a single microphone.
+
+    One capture loop feeds recognized speech into `fan_out`, which appends the
+    segment to every session that was open while it was spoken. Starting or
+    stopping one id never affects the others.
+    """
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+
+    def start(self, session_id: str) -> bool:
+        """Opens a session. Returns False if one is already open for this id."""
+        with self._lock:
+            if session_id in self._sessions:
+                return False
+            self._sessions[session_id] = RecordingSession(session_id)
+            self._active.set()
+            return True
+
+    def stop(self, session_id: str):
+        """Closes a session and returns it, or None if it was not open."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if not self._sessions:
+                self._active.clear()
+        if session:
+            session.stopped_at = time.time()
+        return session
+
+    def get(self, session_id: str):
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def active_ids(self):
+        with self._lock:
+            return list(self._sessions)
+
+    def has_active(self) -> bool:
+        return self._active.is_set()
+
+    def wait_for_active(self, timeout=None) -> bool:
+        """Blocks the capture loop until at least one session is open."""
+        return self._active.wait(timeout)
+
+    def fan_out(self, text: str, start: float, end: float):
+        """
+        Appends a recognized segment to every open session that overlaps it.
+
+        Returns the sessions the segment was attributed to.
+        """
+        with self._lock:
+            targets = [s for s in self._sessions.values() if s.started_at <= end]
+            for session in targets:
+                session.add_segment(text, start, end)
+        return targets
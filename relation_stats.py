@@ -0,0 +1,209 @@
+import datetime
+
+# Per-relation interaction rollups, stored next to `count` on each relation:
+#
+#   "stats": {
+#       "total": {"n": 12, "words": 5400, "seconds": 3600, "timed": 10},
+#       "days":  {"2026-10-18": {"n": 2, "words": 800, ...}, ...},
+#       "weeks": {"2026-W42": {"n": 5, "words": 2100, ...}, ...},
+#   }
+#
+# "timed" counts the conversations that came with a duration, so averages
+# aren't dragged down by ones recorded without one.
+
+DAY_BUCKETS = 90  # Daily buckets older than this are dropped by prune(), which runs with transcript compaction
+FIELDS = ("n", "words", "seconds", "timed")
+
+
+def day_key(when: datetime.datetime) -> str:
+    return when.date().isoformat()
+
+
+def week_key(when) -> str:
+    year, week, _ = when.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def _values(conversation: dict) -> dict:
+    seconds = conversation.get("duration")
+    return {
+        "n": 1,
+        "words": len((conversation.get("transcript") or "").split()),
+        "seconds": seconds or 0,
+        "timed": 1 if seconds is not None else 0,
+    }
+
+
+def conversation_update(conversation: dict, prefix="relations.$[r]") -> dict:
+    """
+    The update that appends `conversation` to the relation matched by
+    `prefix` and folds it into that relation's count and rollups: a fixed
+    number of field updates, whatever the size of the history.
+    """
+    when = datetime.datetime.fromisoformat(conversation["timestamp"])
+    inc = {f"{prefix}.count.value": 1}
+    for bucket in ("total", f"days.{day_key(when)}", f"weeks.{week_key(when)}"):
+        for field, value in _values(conversation).items():
+            inc[f"{prefix}.stats.{bucket}.{field}"] = value
+    return {
+        "$push": {f"{prefix}.conversations": conversation},
+        "$set": {f"{prefix}.lastSummary": conversation.get("summary", "")},
+        "$inc": inc,
+        "$min": {f"{prefix}.count.first": conversation["timestamp"]},
+        "$max": {f"{prefix}.count.last": conversation["timestamp"]},  # Replayed offline events can arrive late
+    }
+
+
+def rebuild(relation: dict) -> dict:
+    """Rollups computed from scratch from a relation's conversations, for relations that predate them."""
+    stats = {"total": dict.fromkeys(FIELDS, 0), "days": {}, "weeks": {}}
+    for conversation in relation.get("conversations", []):
+        try:
+            when = datetime.datetime.fromisoformat(conversation["timestamp"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        for bucket in (stats["total"], stats["days"].setdefault(day_key(when), dict.fromkeys(FIELDS, 0)),
+                       stats["weeks"].setdefault(week_key(when), dict.fromkeys(FIELDS, 0))):
+            for field, value in _values(conversation).items():
+                bucket[field] += value
+    return stats
+
+
+def prune_update(relation: dict, today: datetime.date, prefix="relations.$[r]") -> dict:
+    """An $unset for daily buckets older than DAY_BUCKETS days (weekly ones are kept), or {}."""
+    cutoff = (today - datetime.timedelta(days=DAY_BUCKETS)).isoformat()
+    stale = [day for day in (relation.get("stats") or {}).get("days", {}) if day < cutoff]
+    return {"$unset": {f"{prefix}.stats.days.{day}": "" for day in stale}} if stale else {}
+
+
+def _bucket(buckets: dict, key: str) -> dict:
+    bucket = buckets.get(key) or {}
+    return {field: bucket.get(field, 0) for field in FIELDS}
+
+
+def summarize(relation: dict, now=None, weeks=12, days=14) -> dict:
+    """Stats for one relation from its rollups; reads `weeks` + `days` buckets, never the conversations."""
+    now = now or datetime.datetime.now()
+    stats = relation.get("stats") or {}
+    total = _bucket(stats, "total")
+    count = relation.get("count") or {}
+    today = now.date()
+
+    day_keys = [day_key(now - datetime.timedelta(days=i)) for i in reversed(range(days))]
+    week_keys = [week_key(today - datetime.timedelta(weeks=i)) for i in reversed(range(weeks))]
+    daily = [{"day": key, **_bucket(stats.get("days", {}), key)} for key in day_keys]
+    weekly = [{"week": key, **_bucket(stats.get("weeks", {}), key)} for key in week_keys]
+
+    last = count.get("last")
+    try:
+        days_since_last = round((now - datetime.datetime.fromisoformat(last)).total_seconds() / 86400, 1) if last else None
+    except (TypeError, ValueError):
+        days_since_last = None
+
+    return {
+        "relation_id": relation.get("id"),
+        "name": relation.get("name"),
+        "visits": count.get("value", 0),
+        "first": count.get("first"),
+        "last": last,
+        "days_since_last": days_since_last,
+        "conversations": total["n"],
+        "words": total["words"],
+        "seconds": total["seconds"],
+        "avg_words": round(total["words"] / total["n"], 1) if total["n"] else None,
+        "avg_seconds": round(total["seconds"] / total["timed"], 1) if total["timed"] else None,
+        "visits_per_week": round(sum(w["n"] for w in weekly) / weeks, 2) if weeks else None,
+        "weekly": weekly,
+        "daily": daily,
+    }
+
+
+def prune(db, today=None) -> int:
+    """
+    Drops daily buckets older than DAY_BUCKETS from every relation. Reads
+    only the daily bucket keys, so it is cheap enough to run with each
+    compaction pass. Returns the number of relations pruned.
+    """
+    from pymongo import UpdateOne
+
+    today = today or datetime.date.today()
+    ops = []
+    pruned = 0
+    for user in db.users.find({"relations.stats.days": {"$exists": True}}, {"relations.id": 1, "relations.stats.days": 1}):
+        for relation in user.get("relations", []):
+            if update := prune_update(relation, today):
+                ops.append(UpdateOne({"_id": user["_id"]}, update, array_filters=[{"r.id": relation["id"]}]))
+        if len(ops) >= 1000:
+            db.users.bulk_write(ops, ordered=False)
+            pruned += len(ops)
+            ops = []
+    if ops:
+        db.users.bulk_write(ops, ordered=False)
+        pruned += len(ops)
+    return pruned
+
+
+def backfill(db):
+    """
+    Builds rollups for relations that don't have them yet and prunes old
+    daily buckets. Reads every conversation once, so it is meant to run once
+    after deploying: python relation_stats.py backfill
+    """
+    from pymongo import UpdateOne
+
+    today = datetime.date.today()
+    ops = []
+    for user in db.users.find({}, {"email": 1, "relations.id": 1, "relations.stats": 1, "relations.conversations": 1}):
+        for relation in user.get("relations", []):
+            filters = [{"r.id": relation["id"]}]
+            if "stats" not in relation:
+                ops.append(UpdateOne({"_id": user["_id"]}, {"$set": {"relations.$[r].stats": rebuild(relation)}}, array_filters=filters))
+            elif prune := prune_update(relation, today):
+                ops.append(UpdateOne({"_id": user["_id"]}, prune, array_filters=filters))
+        if len(ops) >= 1000:
+            db.users.bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        db.users.bulk_write(ops, ordered=False)
+    print("Relation stats backfilled")
+
+
+if __name__ == "__main__":
+    import random
+    import sys
+    import time
+
+    if sys.argv[1:] == ["backfill"]:
+        from mongo import get_db, close_db
+        backfill(get_db())
+        close_db()
+        sys.exit()
+
+    # Benchmark: stats for one relation from the rollups vs scanning its
+    # conversations, as the history grows
+    rng = random.Random(0)
+    words = "the a we went to park doctor lunch garden family grandson talked about weather medicine called visit".split()
+    now = datetime.datetime(2026, 10, 18, 12)
+    for n in (100, 1000, 10000):
+        conversations = [{"id": str(i), "timestamp": (now - datetime.timedelta(minutes=rng.randrange(365 * 24 * 60))).isoformat(),
+                          "transcript": " ".join(rng.choice(words) for _ in range(120)), "summary": "", "duration": rng.uniform(30, 900)}
+                         for i in range(n)]
+        conversations.sort(key=lambda c: c["timestamp"])
+        relation = {"id": "1", "name": "Bob", "conversations": conversations,
+                    "count": {"value": n, "first": conversations[0]["timestamp"], "last": conversations[-1]["timestamp"]}}
+
+        start = time.perf_counter()
+        for _ in range(10):
+            relation["stats"] = rebuild(relation)
+        scan = (time.perf_counter() - start) / 10
+        start = time.perf_counter()
+        for _ in range(1000):
+            summarize(relation, now)
+        read = (time.perf_counter() - start) / 1000
+        start = time.perf_counter()
+        for _ in range(1000):
+            update = conversation_update(conversations[-1])
+        insert = (time.perf_counter() - start) / 1000
+        print(f"{n:>6} conversations: scan {scan * 1000:7.2f} ms | rollup read {read * 1e6:5.0f} us, "
+              f"{len(relation['stats']['days'])} day / {len(relation['stats']['weeks'])} week buckets | "
+              f"insert update {insert * 1e6:4.0f} us, {len(update['$inc'])} fields")
@@ -1,90 +1,113 @@
-import geopy.distance
-import geocoder
+import os
 import time
-import random
-import time
-from datetime import datetime, time as datetime_time
+from datetime import datetime, timedelta, time as datetime_time
 from typing import List
-import threading
-
-
-def is_in_zone(center_lat, center_lon, radius_km, current_lat, current_lon):
-    """Checks if a point is within a given radius from the center."""
-    center = (center_lat, center_lon)
-    current = (current_lat, current_lon)
-    distance = geopy.distance.distance(center, current).km
-    return distance <= radius_km
-
-def get_current_location():
-    """Gets the current location using geocoder."""
-    g = geocoder.ip('me')  # Use IP-based geolocation, you can replace this with GPS if available
-    return g.latlng  # Returns [latitude, longitude]
-
-
-# def get_current_location(center_lat, center_lon, variation=0.05):
-#     """Simulate changing location within a range of the initial location."""
-#     # Generate random lat, lon within the variation range
-#     lat = center_lat + random.uniform(-variation, variation)
-#     lon = center_lon + random.uniform(-variation, variation)
-#     return [lat, lon]
-
-
-def track_zone_exit(radius_km, update_interval_seconds=5):
-    """Tracks when the user leaves a specified zone, with center as current location."""
-    
-    # Get current location and set it as the center of the zone
-    location = get_current_location()
-    
+import itertools
+from reminder_scheduler import ReminderScheduler
+from geofence import GeofenceEngine, IPLocationSource, ReplayLocationSource, SimulatedWalk, Zone, track
+
+LOCAL_TZ = datetime.now().astimezone().tzinfo  # Reminder times here are in the device's local time
+BACKEND_URL = os.getenv("BACKEND_URL", "https://recall-backend-5rw5.onrender.com")
+
+
+def get_location_source(kind=None):
+    """IP geolocation by default; LOCATION_SOURCE=replay:<csv> or simulate:<lat>,<lon> for testing."""
+    kind = kind or os.getenv("LOCATION_SOURCE", "ip")
+    if kind.startswith("replay:"):
+        return ReplayLocationSource.from_csv(kind[len("replay:"):])
+    if kind.startswith("simulate:"):
+        lat, lon = (float(v) for v in kind[len("simulate:"):].split(","))
+        return SimulatedWalk(lat, lon)
+    return IPLocationSource()
+
+
+def load_zones(email):
+    """The user's saved zones (home, day-care, pharmacy...) from the backend."""
+    import requests
+    response = requests.get(f"{BACKEND_URL}/zone/get", params={"email": email}, timeout=10)
+    return [Zone(**z) for z in response.json().get("zones", [])]
+
+
+def broadcast_exit(email):
+    """Returns an on_exit callback that alerts the user's broadcastList through the backend."""
+    import requests
+
+    def on_exit(zone, location):
+        try:
+            response = requests.post(f"{BACKEND_URL}/geofence/exit", timeout=10, json={
+                "email": email, "zone": zone.name, "lat": location[0], "lon": location[1]})
+            result = response.json()
+            print(f"Zone exit pushed to {result.get('pushed', 0)} open dashboards"
+                  f"{', emailing ' + str(result.get('recipients', 0)) + ' contacts' if result.get('emailed') else ''}")
+        except Exception as e:
+            print(f"Could not send zone exit: {e}")
+    return on_exit
+
+
+def track_zone_exit(radius_km, update_interval_seconds=5, source=None):
+    """Tracks when the user leaves a zone centred on their current location."""
+    source = source or get_location_source()
+    location = source.read()
     if location is None:
         print("Could not retrieve location. Please try again.")
         return
-    
+
     center_lat, center_lon = location
     print(f"Setting zone center to current location: {center_lat}, {center_lon}")
+    engine = GeofenceEngine([Zone("start", center_lat, center_lon, radius_km)])
+    engine.update(center_lat, center_lon)
 
-    # Keep track of whether the user has exited the zone
-    in_zone = True
-    
     while True:
-        # Get current location again to check if the user has moved
-        location = get_current_location()
-
-        
-        
+        location = source.read()
         if location is None:
             print("Could not retrieve location. Please try again.")
-            break
-        
-        current_lat, current_lon = location
-        print(f"Current location: {current_lat}, {current_lon}")
-
-        if is_in_zone(center_lat, center_lon, radius_km, current_lat, current_lon):
-            if not in_zone:
-                print("You have re-entered the zone!")
-                in_zone = True
-            else:
-                print("Still inside the zone.")
-        else:
-            if in_zone:
-                print("You have left the zone!")
-                in_zone = False
-                return "Exited zone"  # Return when the user leaves the zone
-        
-        time.sleep(update_interval_seconds)
+            return
+        if any(kind == "exit" for kind, _ in engine.update(*location)):
+            print("You have left the zone!")
+            return "Exited zone"
+        # Poll less often the further the user is from the edge
+        time.sleep(engine.next_interval(min_seconds=update_interval_seconds))
+
+
+def track_zones(email, zones=None, source=None, stop_event=None):
+    """Watches all of a user's zones and alerts their broadcastList on every exit."""
+    zones = zones if zones is not None else load_zones(email)
+    engine = GeofenceEngine(zones)
+    track(engine, source or get_location_source(), on_exit=broadcast_exit(email), stop_event=stop_event)
 
 
 # Reminder class
 class Reminder:
+    _ids = itertools.count(1)
+
     def __init__(self, reminder_time: datetime_time, message: str):
+        self.id = next(Reminder._ids)
         self.time = reminder_time
         self.message = message
 
+    def as_dict(self) -> dict:
+        today = datetime.now()
+        day = today.date() if self.time > today.time() else today.date() + timedelta(days=1)
+        return {"id": self.id, "time": self.time.strftime("%H:%M"), "message": self.message,
+                "repeat": "once", "date": day.isoformat()}
+
     def __repr__(self):
         return f"Reminder at {self.time}: {self.message}"
 
 # In-memory storage for reminders
 reminders: List[Reminder] = []
 
+def notify(owner: str, reminder: dict):
+    """Called by the scheduler when a reminder is due; removes it once notified."""
+    for i, r in enumerate(reminders):
+        if r.id == reminder["id"]:
+            reminders.pop(i)
+            break
+    print(f"Reminder: {reminder['message']} at {reminder['time']}")  # This can be replaced with a different notification mechanism (e.g., email, pop-up)
+
+# Sleeps until the next reminder is due instead of checking every minute
+scheduler = ReminderScheduler(on_due=notify)
+
 def add_reminder(reminder_time: str, message: str) -> str:
     """
     Adds a new reminder.
@@ -100,6 +123,7 @@ def add_reminder(reminder_time: str, message: str) -> str:
         reminder_time_obj = datetime.strptime(reminder_time, "%H:%M").time()
         reminder = Reminder(reminder_time_obj, message)
         reminders.append(reminder)
+        scheduler.schedule("local", reminder.as_dict(), LOCAL_TZ)
         return f"Reminder set for {reminder_time} - '{message}'"
     except ValueError:
         return "Invalid time format. Please use HH:MM in 24-hour format."
@@ -128,44 +152,15 @@ def delete_reminder(reminder_time: str) -> str:
         for i, reminder in enumerate(reminders):
             if reminder.time == reminder_time_obj:
                 removed_reminder = reminders.pop(i)
+                scheduler.unschedule("local", removed_reminder.id)
                 return f"Deleted reminder: {removed_reminder}"
         return "Reminder not found."
     except ValueError:
         return "Invalid time format. Please use HH:MM in 24-hour format."
 
-def check_reminders() -> List[str]:
-    """
-    Checks for reminders due at the current time and returns notifications.
-    Removes the reminders once they are due.
-    
-    Returns:
-        List[str]: List of reminder notifications due at the current time.
-    """
-    notifications = []
-    now = datetime.now().time().replace(second=0, microsecond=0)  # Current time without seconds and microseconds
-    # Find and remove reminders that match the current time
-    due_reminders = [reminder for reminder in reminders if reminder.time == now]
-    for reminder in due_reminders:
-        notifications.append(f"Reminder: {reminder.message} at {reminder.time}")
-        reminders.remove(reminder)  # Remove the reminder once notified
-    return notifications
-
-def reminder_loop():
-    """
-    Runs a loop that checks reminders every minute.
-    This will continuously check for reminders due at the current time and notify the user.
-    """
-    while True:
-        notifications = check_reminders()
-        if notifications:
-            for notification in notifications:
-                print(notification)  # This can be replaced with a different notification mechanism (e.g., email, pop-up)
-        time.sleep(60)  # Wait for 60 seconds (1 minute) before checking again
-
-# Start the reminder loop in a separate thread so it runs continuously
+# Start the reminder scheduler in a separate thread so it runs continuously
 def start_reminder_service():
-    reminder_thread = threading.Thread(target=reminder_loop, daemon=True)
-    reminder_thread.start()
+    scheduler.start()
 
 
 
@@ -179,5 +174,8 @@ if __name__ == "__main__":
     print(add_reminder("09:00", "Take morning medication"))
     print(add_reminder("22:39", "Attend online meeting"))
 
-    result = track_zone_exit(radius_km)
-    print(result)  # This will print "Exited zone" once the user leaves the zone
\ No newline at end of file
+    if os.getenv("USER_EMAIL"):
+        track_zones(os.getenv("USER_EMAIL"))  # Every saved zone, alerting the broadcastList
+    else:
+        result = track_zone_exit(radius_km)
+        print(result)  # This will print "Exited zone" once the user leaves the zone
\ No newline at end of file
@@ -0,0 +1,287 @@
+import datetime
+import functools
+import heapq
+import itertools
+import os
+import threading
+import time
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+DEFAULT_TZ = os.getenv("REMINDER_TZ", "UTC")
+REPEATS = ("daily", "weekdays", "weekly", "once")
+
+
+@functools.lru_cache(maxsize=2048)
+def parse_time(value: str) -> datetime.time:
+    """Parses HH:MM (cached; there are only 1440 distinct values). Raises ValueError."""
+    hours, sep, minutes = value.partition(":")
+    if not sep or len(hours) > 2 or len(minutes) > 2 or not hours.isdigit() or not minutes.isdigit():
+        raise ValueError(f"Invalid time format: {value}. Use HH:MM")
+    return datetime.time(int(hours), int(minutes))
+
+
+def get_zone(name=None) -> ZoneInfo:
+    """Raises ValueError for unknown timezone names."""
+    try:
+        return ZoneInfo(name or DEFAULT_TZ)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone: {name}")
+
+
+def next_fire(reminder: dict, after: datetime.datetime, tz: datetime.tzinfo):
+    """
+    Next time strictly after `after` that a reminder is due, as a UTC timestamp.
+
+    `reminder` is the stored dict: "time" is HH:MM in the reminder's timezone and
+    "repeat" is one of REPEATS (daily when missing). "once" reminders remember
+    the day they were created for via "date" (YYYY-MM-DD), if present; "weekly"
+    ones fire on "weekday" (0 is Monday), else on the weekday of "date", else
+    on the first day they can fire.
+    """
+    at = parse_time(reminder["time"])
+    repeat = reminder.get("repeat", "daily")
+    local_after = after.astimezone(tz)
+
+    if repeat == "once" and reminder.get("date"):
+        day = datetime.date.fromisoformat(reminder["date"])
+        fire = datetime.datetime.combine(day, at, tzinfo=tz)
+        return fire.timestamp() if fire > after else None
+
+    weekday = reminder.get("weekday")
+    if repeat == "weekly" and weekday is None and reminder.get("date"):
+        weekday = datetime.date.fromisoformat(reminder["date"]).weekday()
+
+    day = local_after.date()
+    for _ in range(8):
+        fire = datetime.datetime.combine(day, at, tzinfo=tz)
+        if fire > after and (repeat != "weekdays" or day.weekday() < 5):
+            if repeat == "weekly" and weekday is not None and day.weekday() != weekday:
+                day += datetime.timedelta(days=1)
+                continue
+            return fire.timestamp()
+        day += datetime.timedelta(days=1)
+    return None
+
+
+def first_day(at: str, tz: datetime.tzinfo, now=None) -> datetime.date:
+    """The local day a reminder at `at` (HH:MM) created at `now` first fires: today, or tomorrow if that time has passed."""
+    today = datetime.datetime.fromtimestamp(now or time.time(), tz)
+    return today.date() if parse_time(at) > today.time() else today.date() + datetime.timedelta(days=1)
+
+
+class ReminderScheduler:
+    """
+    Fires reminders for every user from one thread.
+
+    Due times live in a min-heap, so the thread sleeps exactly until the next
+    reminder instead of polling, and adds/removes wake it only when they change
+    what is due first. Removed or rescheduled entries are skipped lazily when
+    they reach the top of the heap. `on_due(owner, reminder)` is called for
+    each reminder as it fires; recurring reminders are then rescheduled.
+    """
+
+    def __init__(self, on_due=None):
+        self.on_due = on_due or (lambda owner, reminder: print(f"Reminder for {owner}: {reminder['message']} at {reminder['time']}"))
+        self._heap = []  # (fire_ts, seq, key)
+        self._entries = {}  # (owner, reminder_id) -> (seq, reminder, tz)
+        self._owners = {}  # owner -> {reminder_id, ...}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    def schedule(self, owner: str, reminder: dict, tz=None, now=None):
+        """Adds or replaces a reminder. `tz` is a timezone name or tzinfo."""
+        zone = tz if isinstance(tz, datetime.tzinfo) else get_zone(tz or reminder.get("timezone"))
+        after = datetime.datetime.fromtimestamp(now or time.time(), datetime.timezone.utc)
+        fire = next_fire(reminder, after, zone)
+        if fire is not None and reminder.get("repeat") == "weekly" and reminder.get("weekday") is None and not reminder.get("date"):
+            # Older weekly reminders stored no day: pin the first one so rescheduling keeps it
+            reminder = {**reminder, "weekday": datetime.datetime.fromtimestamp(fire, zone).weekday()}
+        key = (owner, reminder["id"])
+        with self._cond:
+            if fire is None:
+                self._forget(key)
+                return None
+            seq = next(self._seq)
+            self._entries[key] = (seq, reminder, zone)
+            self._owners.setdefault(owner, set()).add(reminder["id"])
+            heapq.heappush(self._heap, (fire, seq, key))
+            if self._heap[0][1] == seq:
+                self._cond.notify()
+        return fire
+
+    def _forget(self, key):
+        entry = self._entries.pop(key, None)
+        ids = self._owners.get(key[0])
+        if ids is not None:
+            ids.discard(key[1])
+            if not ids:
+                del self._owners[key[0]]
+        return entry
+
+    def unschedule(self, owner: str, reminder_id) -> bool:
+        with self._cond:
+            return self._forget((owner, reminder_id)) is not None
+
+    def replace_owner(self, owner: str, reminders, tz=None):
+        """Reschedules all of one user's reminders (e.g. after their document changed)."""
+        with self._cond:
+            for reminder_id in list(self._owners.get(owner, ())):
+                self._forget((owner, reminder_id))
+        for reminder in reminders:
+            try:
+                self.schedule(owner, reminder, tz)
+            except (KeyError, ValueError) as e:
+                print(f"Skipping invalid reminder {reminder} for {owner}: {e}")
+
+    def next_due(self):
+        """(timestamp, owner, reminder) of the next live reminder, or None."""
+        with self._cond:
+            self._drop_stale()
+            if not self._heap:
+                return None
+            fire, _, key = self._heap[0]
+            return fire, key[0], self._entries[key][1]
+
+    def _drop_stale(self):
+        while self._heap:
+            _, seq, key = self._heap[0]
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == seq:
+                return
+            heapq.heappop(self._heap)
+
+    def _pop_due(self, now):
+        due = []
+        with self._cond:
+            while True:
+                self._drop_stale()
+                if not self._heap or self._heap[0][0] > now:
+                    return due
+                _, _, key = heapq.heappop(self._heap)
+                _, reminder, zone = self._forget(key)
+                due.append((key[0], reminder, zone))
+
+    def run_pending(self, now=None) -> int:
+        """Fires every reminder due at `now` and reschedules recurring ones."""
+        now = now or time.time()
+        due = self._pop_due(now)
+        for owner, reminder, zone in due:
+            try:
+                self.on_due(owner, reminder)
+            except Exception as e:
+                print(f"Reminder delivery failed for {owner}: {e}")
+            if reminder.get("repeat", "daily") != "once":
+                self.schedule(owner, reminder, zone, now=now)
+        return len(due)
+
+    def start(self, loader=None):
+        """Starts the scheduler thread; `loader(self)` runs on it first (e.g. a Mongo load)."""
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, args=(loader,), name="reminders", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, loader):
+        if loader is not None:
+            try:
+                loader(self)
+            except Exception as e:
+                print(f"Loading reminders failed: {e}")
+        while self._running:
+            self.run_pending()
+            with self._cond:
+                self._drop_stale()
+                timeout = self._heap[0][0] - time.time() if self._heap else None
+                if self._running and (timeout is None or timeout > 0):
+                    self._cond.wait(timeout)
+
+
+def load_from_mongo(db):
+    """Loader for ReminderScheduler.start that schedules every user's reminders."""
+    def load(scheduler):
+        start = time.time()
+        for user in db.users.find({"reminders.time": {"$exists": True}}, {"email": 1, "reminders": 1, "timezone": 1}):
+            scheduler.replace_owner(user["email"], user.get("reminders", []), user.get("timezone"))
+        print(f"Scheduled {len(scheduler)} reminders in {time.time() - start:.2f}s")
+    return load
+
+
+# Only inserts/replaces and the updates that touch reminders or the timezone
+# reach the scheduler, with the looked-up document cut down to what it reads:
+# transcript appends and count/stats bumps never leave the server.
+CHANGE_PIPELINE = [
+    {"$match": {"$or": [
+        {"operationType": {"$in": ["insert", "replace"]}},
+        {"operationType": "update", "updateDescription.removedFields": {"$in": ["reminders", "timezone"]}},
+        {"operationType": "update", "$expr": {"$gt": [{"$size": {"$filter": {
+            "input": {"$objectToArray": {"$ifNull": ["$updateDescription.updatedFields", {}]}},
+            "as": "field",
+            "cond": {"$regexMatch": {"input": "$$field.k", "regex": r"^(reminders|timezone)(\.|$)"}},
+        }}}, 0]}},
+    ]}},
+    {"$project": {"operationType": 1, "fullDocument.email": 1, "fullDocument.reminders": 1, "fullDocument.timezone": 1}},
+]
+
+
+def watch_mongo(db, scheduler):
+    """
+    Follows reminder changes made by other processes through a Mongo change
+    stream (needs a replica set, as on Atlas). Returns the thread, or None when
+    change streams aren't available.
+    """
+    from pymongo.errors import PyMongoError
+
+    def run():
+        try:
+            with db.users.watch(CHANGE_PIPELINE, full_document="updateLookup") as stream:
+                for change in stream:
+                    user = change.get("fullDocument")
+                    if user and "email" in user:
+                        scheduler.replace_owner(user["email"], user.get("reminders", []), user.get("timezone"))
+        except PyMongoError as e:
+            print(f"Reminder change stream stopped: {e}")
+
+    thread = threading.Thread(target=run, name="reminder-watch", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    # Benchmark: 100k users x 3 reminders, then a simulated day of firing
+    import random
+
+    fired = 0
+
+    def count(owner, reminder):
+        global fired
+        fired += 1
+
+    scheduler = ReminderScheduler(on_due=count)
+    rng = random.Random(0)
+    zones = [ZoneInfo(z) for z in ("UTC", "America/New_York", "Asia/Kolkata", "Europe/London")]
+    start = time.process_time()
+    for user in range(100_000):
+        zone = rng.choice(zones)
+        for rid in range(1, 4):
+            scheduler.schedule(f"user{user}@example.com", {"id": rid, "time": f"{rng.randrange(24):02d}:{rng.randrange(60):02d}", "message": "Take medicine"}, zone)
+    load = time.process_time() - start
+    now = time.time()
+    start = time.process_time()
+    for minute in range(24 * 60):
+        scheduler.run_pending(now + 60 * (minute + 1))
+    day = time.process_time() - start
+    print(f"Scheduled {len(scheduler)} reminders in {load:.2f}s CPU; fired {fired} over a simulated day in {day:.2f}s CPU")
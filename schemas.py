@@ -0,0 +1,235 @@
+from typing import Annotated, List, Literal, Optional
+import numpy as np
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, StringConstraints, field_validator, model_validator
+from reminder_scheduler import get_zone, parse_time
+
+# Response models for the API. Stored documents may carry extra fields
+# (e.g. from older clients), which are passed through rather than dropped.
+
+
+class Count(BaseModel):
+    value: int = 0
+    first: Optional[str] = None
+    last: Optional[str] = None
+
+
+class Conversation(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    id: str
+    timestamp: str
+    transcript: str = ""
+    summary: str = ""
+
+
+class Relation(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    id: str
+    name: str
+    relationship: str = "Unknown"
+    photo: Optional[str] = None
+    isRegistered: bool = False
+    faceDescriptor: Optional[List[float]] = None
+    lastSummary: Optional[str] = None
+    messages: List[str] = []
+    count: Count = Count()
+    conversations: List[Conversation] = []
+
+
+class Reminder(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    id: int
+    time: str
+    message: Optional[str] = None
+    repeat: str = "daily"
+    timezone: Optional[str] = None
+    date: Optional[str] = None
+
+
+class Zone(BaseModel):
+    name: str
+    lat: float
+    lon: float
+    radius_km: float
+
+
+class UserOut(BaseModel):
+    model_config = ConfigDict(extra="allow", populate_by_name=True)
+
+    id: str = Field(alias="_id")
+    name: Optional[str] = None
+    email: str
+    broadcastList: List[str] = []
+    relations: List[Relation] = []
+    reminders: List[Reminder] = []
+    zones: List[Zone] = []
+
+
+class RegisteredFace(BaseModel):
+    id: str
+    name: str
+    relationship: str = "Unknown"
+    photo: Optional[str] = None
+    faceDescriptor: List[float]
+    lastSummary: str = "First time meeting"
+    count: Count = Count()
+
+
+class UnregisteredFace(BaseModel):
+    id: str
+    name: str
+    relationship: str = "Unknown"
+    photo: Optional[str] = None
+
+
+class FaceDescriptorsOut(BaseModel):
+    descriptors: List[RegisteredFace]
+    unregistered: List[UnregisteredFace]
+
+
+class ConversationEntry(Conversation):
+    relation_id: str
+    relation_name: str
+    relationship: str = "Unknown"
+
+
+class ConversationsOut(BaseModel):
+    conversations: List[ConversationEntry]
+
+
+class RemindersOut(BaseModel):
+    reminders: List[Reminder]
+
+
+# Request models. FastAPI validates bodies against these before a handler
+# runs, so malformed input is rejected with a 400 and never reaches Mongo.
+
+Email = Annotated[str, StringConstraints(strip_whitespace=True, min_length=3, max_length=254, pattern=r"^[^@\s]+@[^@\s]+$")]
+RelationId = Annotated[str, StringConstraints(min_length=1, max_length=200)]
+FiniteFloat = Annotated[float, Field(allow_inf_nan=False)]
+# A face embedding: exactly 128 finite floats, handed to the handler as a float64 numpy array
+FaceDescriptor = Annotated[List[FiniteFloat], Field(min_length=128, max_length=128), AfterValidator(np.asarray)]
+
+
+class CreateUserIn(BaseModel):
+    name: Optional[str] = None
+    email: Email
+    broadcastList: List[str] = []
+
+
+class RelationIn(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    id: RelationId
+    name: str
+
+
+class AddRelationIn(BaseModel):
+    email: Email
+    relation: RelationIn
+
+
+class AddMessageIn(BaseModel):
+    email: Email
+    relation_id: RelationId
+    message: str = ""
+
+
+class AddReminderIn(BaseModel):
+    email: Email
+    time: str
+    message: str
+    repeat: Literal["daily", "weekdays", "weekly", "once"] = "daily"
+    timezone: Optional[str] = None
+    weekday: Optional[int] = Field(None, ge=0, le=6)  # Weekly reminders: 0 is Monday; defaults to the first day it fires
+
+    @field_validator("time")
+    @classmethod
+    def check_time(cls, value):
+        parse_time(value)  # Raises ValueError for anything but HH:MM
+        return value
+
+    @field_validator("timezone")
+    @classmethod
+    def check_timezone(cls, value):
+        if value is not None:
+            get_zone(value)
+        return value
+
+
+class RecognitionIn(BaseModel):
+    model_config = ConfigDict(extra="allow")  # Forwarded to clients as-is
+
+    email: Email
+    relation_id: RelationId
+
+
+class ZoneIn(BaseModel):
+    email: Email
+    name: Annotated[str, StringConstraints(min_length=1, max_length=100)]
+    lat: Annotated[float, Field(ge=-90, le=90)]
+    lon: Annotated[float, Field(ge=-180, le=180)]
+    radius_km: Annotated[float, Field(gt=0, le=100)] = 0.2
+
+
+class ZoneExitIn(BaseModel):
+    email: Email
+    zone: Annotated[str, StringConstraints(min_length=1)]
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+
+
+class RegisterFaceIn(BaseModel):
+    email: Email
+    relation_id: RelationId
+    face_descriptor: FaceDescriptor
+
+
+class AddConversationIn(BaseModel):
+    email: Email
+    relation_id: RelationId
+    transcript: str = ""
+    summary: str = ""
+    duration: Optional[Annotated[float, Field(ge=0, le=86400)]] = None  # Seconds
+
+    @model_validator(mode="after")
+    def check_content(self):
+        if not self.transcript and not self.summary:
+            raise ValueError("Transcript or summary required")
+        return self
+
+
+class IngestEvent(BaseModel):
+    id: Annotated[str, StringConstraints(min_length=1)]
+    type: Literal["relation", "message", "conversation", "count"]
+    ts: Optional[float] = None
+    data: dict
+
+
+class IngestBatchIn(BaseModel):
+    email: Email
+    events: List[IngestEvent] = []
+
+
+class DeleteRelationIn(BaseModel):
+    email: Email
+    relation_id: RelationId
+
+
+class DeleteReminderIn(BaseModel):
+    email: Email
+    reminder_id: int
+
+
+class RelationUpdates(BaseModel):
+    name: Optional[str] = None
+    relationship: Optional[str] = None
+    photo: Optional[str] = None
+
+
+class UpdateRelationIn(BaseModel):
+    email: Email
+    relation_id: RelationId
+    updates: RelationUpdates = RelationUpdates()
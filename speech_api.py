@@ -1,178 +1,208 @@
 import os
-import speech_recognition as sr
+from contextlib import asynccontextmanager
 from typing import Annotated
 from dotenv import load_dotenv
-import google.generativeai as genai
 from pydantic import BaseModel, Field
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
-import uvicorn
+from fastapi.responses import JSONResponse, PlainTextResponse
 import time
 import threading
-import requests
-import json
+from recording_sessions import SessionManager
+from event_bus import EventBus, FaceEntered, FaceLeft, TranscriptSegment, SummaryReady, serve_bridge
+from summary_jobs import SummaryJobQueue, QueueFull
+from summarizer import Summarizer, SummaryCache, RollingSummarizer, make_backend
+from metrics import registry, MetricsMiddleware, profiler_from_env
 
-# Initialize FastAPI app
-app = FastAPI()
+load_dotenv()  # This loads the variables from .env
 
-url = "https://recall-backend-5rw5.onrender.com/message/add"
+BACKEND_URL = os.getenv("BACKEND_URL", "https://recall-backend-5rw5.onrender.com")
+url = f"{BACKEND_URL}/message/add"
+USER_EMAIL = os.getenv("USER_EMAIL")  # Whose relations summaries are added to
 
 headers = {
     "Content-Type": "application/json"  # adjust as needed
 }
 
-# Configure Google Generative AI API
-load_dotenv()  # This loads the variables from .env
-api_key = os.getenv("GOOGLE_API_KEY") #
-genai.configure(api_key=api_key)
-
-input_text = """Analyze the following conversation between two persons, 
-Identify the relationship between them (e.g., friend, 
-coworker, family member, client-professional) topics 
-discussed, and interaction style. Provide a summary of 20 words.
-
-example1: 
-
-Hey! My weekend was fantastic I went to Paris with my family! My wife and kids were thrilled, 
-though we explored so many iconic spots, from the Eiffel Tower to cozy 
-little cafés along the Seine.
-
-response:
-{
-    "name": "no_name",
-    "relationship": "friend",
-    "summary": "He had a fantastic weekend in Paris with his family. They explored iconic spots from the Eiffel Tower to cozy little cafés along the Seine."
-}
-
-example2:
-
-Hey! My name is John. My day was amazing. I took the family out for a fun city adventure! My wife and kids were so excited as we hopped from one spot to another. How was yours dad?
-
-response:
-{
-    "name": "John",
-    "relationship": "Son",
-    "summary": "John had an amazing day with his family. They went on a fun city adventure hopping from one spot to another."
-}
-If you can't identify the relationship, just say 'acquaintances' and use they/them pronouns. If you can't identify the name, just say 'no_name'.
-CONVERSATION: 
-"""
-
-
 # Define models
 Relation = Annotated[
     str,
     Field(min_length=1, max_length=1, description="A description of the relationship between two people having a conversation. For example, 'friends', 'colleagues', 'family', etc. Use third person and past tense.")
 ]
 
-class Summary(BaseModel):
-    name: str
-    Relationship: str
-    convo_summary: str
-
 class RequestData(BaseModel):
     Task: str
     id: str
 
-# Define function to interact with Google Generative AI API
-def get_gemini_response(input_text):
-    model = genai.GenerativeModel('gemini-1.5-flash')
-    response = model.generate_content(input_text, generation_config=genai.GenerationConfig(
-        response_mime_type="application/json", response_schema=Summary, max_output_tokens=100,
-    ))
-    return response.text
-
-# Speech recognition setup
-r = sr.Recognizer()
-recordings = {}  # Dictionary to track recordings by id
-is_recording = False  # Global variable to track recording state
-recording_event = threading.Event()  # Event to control recording state in the thread
+# Created at startup (see lifespan) so importing this module has no side effects
+http = None  # Keep-alive connection to the backend, shared by summary workers
+summarizer = None
+rolling = None
+summary_jobs = None
+
+sessions = SessionManager()  # Overlapping recordings sharing one microphone
+# Local processes (e.g. FaceRecognition.py) can drive recordings over the event bus
+# instead of HTTP; set EVENT_BUS_PORT to accept bridge connections
+bus = EventBus()
+
+def summarize_and_push(session_id, session):
+    """Summarize a stopped session and send it to the backend (runs on a worker thread)"""
+    print("Transcript:", session.transcript())
+    ai_response = rolling.finish(session)
+
+    if USER_EMAIL:
+        message = {"email": USER_EMAIL, "relation_id": session_id, "message": ai_response['convo_summary']}
+        response = http.post(url, json=message, headers=headers, timeout=10)
+        response.raise_for_status()  # 5xx and connection errors are retried by the job queue
+        print("Data sent to backend")
+    else:
+        print("USER_EMAIL not set; summary not sent to backend")
+    print(ai_response)
+    bus.publish(SummaryReady(session_id, ai_response))
+    return ai_response
 
 # Function for continuous listening and speech recognition
 def listen_and_recognize():
-    global is_recording
+    import speech_recognition as sr
+    from vad import calibrate_recognizer
+
+    r = sr.Recognizer()
     while True:
-        if is_recording:
+        if sessions.has_active():
             try:
                 with sr.Microphone() as source:
-                    r.energy_threshold = 300
+                    calibrate_recognizer(r, source)  # Once, from ambient noise
                     print("Listening...")
+                    start = time.time()
                     audio = r.listen(source, timeout=5)  # Listen for a maximum of 5 seconds
+                    end = time.time()
                     text = r.recognize_google(audio)
                     print(f"You said: {text}")
-                    
-                    if current_id in recordings:
-                        recordings[current_id] += text.lower() + " "
+
+                    # One capture, attributed to every open session
+                    for session in sessions.fan_out(text.lower(), start, end):
+                        rolling.on_segment(session)
+                        bus.publish(TranscriptSegment(session.id, text.lower(), start, end))
+            except sr.WaitTimeoutError:
+                continue
             except sr.RequestError as e:
                 print(f"Error connecting to the recognition service: {e}")
             except sr.UnknownValueError:
                 continue
         else:
-            recording_event.wait()  # Wait until is_recording is set to True
+            sessions.wait_for_active()  # Wait until a recording is started
+
+def on_face_entered(event):
+    if sessions.start(event.face_id):
+        print(f"Recording started for id: {event.face_id}")
+
+def on_face_left(event):
+    session = sessions.stop(event.face_id)
+    if session is None or not session.segments:
+        return
+    print(f"Recording stopped for id: {event.face_id}")
+    try:
+        summary_jobs.submit(event.face_id, session)
+    except QueueFull:
+        print(f"Summarizer busy, dropped summary for id: {event.face_id}")
+
+def startup():
+    global http, summarizer, rolling, summary_jobs
+    import requests
+
+    backend_kind = os.getenv("SUMMARIZER_BACKEND", "gemini")
+    if backend_kind == "gemini":
+        # Configure Google Generative AI API
+        import google.generativeai as genai
+        genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+
+    http = requests.Session()
+    # Pluggable summarizer: SUMMARIZER_BACKEND=gemini (default), local (offline, CPU-only) or stub (tests)
+    summary_cache = SummaryCache(os.getenv("SUMMARY_CACHE_DIR", ".summary_cache"), max_entries=1000)
+    summarizer = Summarizer(backend=make_backend(backend_kind), cache=summary_cache)
+    registry.gauge("summary_cache_hits_total", "Summary cache hits", lambda: summary_cache.hits, kind="counter")
+    registry.gauge("summary_cache_misses_total", "Summary cache misses", lambda: summary_cache.misses, kind="counter")
+    # Long recordings are folded into a rolling summary every N segments
+    rolling = RollingSummarizer(summarizer, every=int(os.getenv("ROLLING_SUMMARY_EVERY", "20")))
+    summary_jobs = SummaryJobQueue(summarize_and_push, workers=2, max_pending=32)
+    summary_jobs.start()
+    registry.gauge("summary_jobs_pending", "Summary jobs waiting for a worker", lambda: summary_jobs.pending())
+
+    # Start the speech recognition thread (set SPEECH_CAPTURE=0 to run without a microphone)
+    if os.getenv("SPEECH_CAPTURE", "1") != "0":
+        threading.Thread(target=listen_and_recognize, name="speech", daemon=True).start()
+
+    bus.on(FaceEntered, on_face_entered)
+    bus.on(FaceLeft, on_face_left)
+    if os.getenv("EVENT_BUS_PORT"):
+        serve_bridge(bus, port=int(os.getenv("EVENT_BUS_PORT")))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup()
+    yield
+    summary_jobs.shutdown()
 
-# Start the speech recognition thread
-recognition_thread = threading.Thread(target=listen_and_recognize, daemon=True)
-recognition_thread.start()
+# Initialize FastAPI app
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware, service="speech", profiler=profiler_from_env())
 
 # FastAPI endpoint to receive POST request and trigger recording
 @app.post("/trigger-recording")
 async def trigger_recording(data: RequestData):
-    global recordings, is_recording, recording_event, current_id
-
     # Handle "start" task
     if data.Task.lower() == "start_recording":
-        if data.id in recordings:
+        if not sessions.start(data.id):
             return {"message": f"Recording already in progress for id: {data.id}"}
 
-        recordings[data.id] = ""  # Initialize recording for this id
-        current_id = data.id  # Store the current id for tracking
-        is_recording = True  # Set the flag to True to start recording
-        recording_event.set()  # Notify the thread to start recording
-
         print(f"Recording started for id: {data.id}")
         return {"message": f"Recording started for id: {data.id}"}
 
     # Handle "stop" task
     elif data.Task.lower() == "stop_recording":
-        if data.id not in recordings or not recordings[data.id]:
+        session = sessions.stop(data.id)
+        if session is None or not session.segments:
             return {"message": f"No recording in progress for id: {data.id}"}
 
-        is_recording = False  # Stop the recording
-        recording_event.clear()  # Notify the thread to stop recording
         print(f"Recording stopped for id: {data.id}")
 
-        final_input = input_text + recordings[data.id]
-        print("Prompt:", final_input)
-        # Generate AI response and clear recording for this id
-        ai_response = get_gemini_response(final_input)
-        ai_response = json.loads(ai_response)
-        
-        payload = {
-            "id": data.id,
-            "name": ai_response['name'],
-            "relationship": ai_response['Relationship'],
-            "summary": ai_response['convo_summary']
-        }
-        message={"relation_id":data.id,"message": payload}
-        response = requests.post(url, json=message, headers=headers)
-        if response.status_code == 200:
-            print("Data sent to backend")
-        else:
-            print("Error sending data to backend")
-        print(ai_response)
-        del recordings[data.id]  # Clear recording data
+        # Summarize in the background so the event loop is never blocked on Gemini/backend
+        try:
+            job_id = summary_jobs.submit(data.id, session)
+        except QueueFull:
+            raise HTTPException(status_code=503, detail="Summarizer busy, retry later", headers={"Retry-After": "5"})
 
-        # Return the AI-generated response
-        return JSONResponse(content={"id": data.id, "ai_response": ai_response})
+        return JSONResponse(
+            status_code=202,
+            content={"id": data.id, "job_id": job_id, "status": "queued", "segments": session.segments},
+        )
 
     else:
         raise HTTPException(status_code=400, detail="Invalid task")
 
+@app.get("/summary-job/{job_id}")
+async def get_summary_job(job_id: str):
+    """Status (and once done, the AI response) of a queued summarization"""
+    job = summary_jobs.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/recordings")
+async def list_recordings():
+    """List the ids of every recording currently in progress"""
+    return {"active": sessions.active_ids()}
+
 @app.get("/")
 async def root():
     return {"message": "Speech API is active on port 8001"}
 
 
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 # Run FastAPI app
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="127.0.0.1", port=8001)
\ No newline at end of file
@@ -0,0 +1,364 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List
+from pydantic import BaseModel
+from metrics import registry
+
+MODEL_NAME = "gemini-1.5-flash"
+PROMPT_VERSION = "1"  # Bump when SUMMARY_PROMPT changes so old cache entries are ignored
+
+SUMMARY_PROMPT = """Analyze the following conversation between two persons,
+Identify the relationship between them (e.g., friend,
+coworker, family member, client-professional) topics
+discussed, and interaction style. Provide a summary of 20 words.
+
+example1:
+
+Hey! My weekend was fantastic I went to Paris with my family! My wife and kids were thrilled,
+though we explored so many iconic spots, from the Eiffel Tower to cozy
+little cafés along the Seine.
+
+response:
+{
+    "name": "no_name",
+    "relationship": "friend",
+    "summary": "He had a fantastic weekend in Paris with his family. They explored iconic spots from the Eiffel Tower to cozy little cafés along the Seine."
+}
+
+example2:
+
+Hey! My name is John. My day was amazing. I took the family out for a fun city adventure! My wife and kids were so excited as we hopped from one spot to another. How was yours dad?
+
+response:
+{
+    "name": "John",
+    "relationship": "Son",
+    "summary": "John had an amazing day with his family. They went on a fun city adventure hopping from one spot to another."
+}
+If you can't identify the relationship, just say 'acquaintances' and use they/them pronouns. If you can't identify the name, just say 'no_name'.
+CONVERSATION:
+"""
+
+# Returned without calling the LLM when there is nothing worth summarizing
+TRIVIAL_SUMMARY = {"name": "no_name", "Relationship": "acquaintances", "convo_summary": "Brief greeting, nothing else was discussed."}
+MIN_WORDS = 4
+
+
+class Summary(BaseModel):
+    name: str
+    Relationship: str
+    convo_summary: str
+
+
+def normalize_transcript(transcript: str) -> str:
+    return " ".join(transcript.lower().split())
+
+
+def is_trivial(transcript: str, min_words=MIN_WORDS) -> bool:
+    return len(normalize_transcript(transcript).split()) < min_words
+
+
+class SummaryCache:
+    """
+    On-disk content-hash cache of LLM summaries, one JSON file per transcript.
+
+    Entries are evicted least-recently-used (by file mtime, refreshed on every
+    hit) once more than `max_entries` are stored.
+    """
+
+    def __init__(self, directory, max_entries=1000):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._count = len(self._files())
+
+    def key(self, transcript: str, model=MODEL_NAME) -> str:
+        content = f"{model}\0{PROMPT_VERSION}\0{normalize_transcript(transcript)}"
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _files(self):
+        return [f for f in os.listdir(self.directory) if f.endswith(".json")]
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)  # Mark as recently used
+            self.hits += 1
+            return value
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        path = self._path(key)
+        is_new = not os.path.exists(path)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        os.replace(tmp, path)
+        with self._lock:
+            self._count += is_new
+            if self._count > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        paths = [self._path(f[:-5]) for f in self._files()]
+        paths.sort(key=lambda p: os.path.getmtime(p))
+        for path in paths[:len(paths) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._count = min(len(paths), self.max_entries)
+
+
+_gemini_model = None
+_gemini_lock = threading.Lock()
+
+
+def _get_gemini_model():
+    """
+    Builds the Gemini model once, with the static few-shot prompt as a cached
+    context when the provider supports it (falls back to a system instruction,
+    e.g. when the prompt is below the minimum cacheable size).
+    """
+    global _gemini_model
+    import google.generativeai as genai
+
+    with _gemini_lock:
+        if _gemini_model is not None:
+            return _gemini_model
+        try:
+            import datetime
+            from google.generativeai import caching
+
+            cached = caching.CachedContent.create(
+                model=f"models/{MODEL_NAME}-001",
+                system_instruction=SUMMARY_PROMPT,
+                ttl=datetime.timedelta(hours=12),
+            )
+            _gemini_model = genai.GenerativeModel.from_cached_content(cached_content=cached)
+            print("Using cached context for summary prompt")
+        except Exception as e:
+            print(f"Context caching unavailable, sending prompt as system instruction: {e}")
+            _gemini_model = genai.GenerativeModel(MODEL_NAME, system_instruction=SUMMARY_PROMPT)
+        return _gemini_model
+
+
+def get_gemini_response(transcript: str) -> str:
+    """Ask Gemini for a Summary of a transcript. Returns the raw JSON text."""
+    import google.generativeai as genai
+
+    model = _get_gemini_model()
+    response = model.generate_content(transcript, generation_config=genai.GenerationConfig(
+        response_mime_type="application/json", response_schema=Summary, max_output_tokens=100,
+    ))
+    return response.text
+
+
+BATCH_PROMPT = """Summarize each of the following {count} conversations independently, following the
+instructions above. Return a JSON list with exactly one object per conversation, in the same order.
+"""
+
+
+class SummarizerBackend:
+    """
+    Turns a batch of transcripts into Summary dicts (`name`, `Relationship`,
+    `convo_summary`), one per transcript and in the same order. `name` is part
+    of the cache key, so it should change whenever the output would.
+    """
+
+    name = "base"
+
+    def summarize_batch(self, transcripts: List[str]) -> List[dict]:
+        raise NotImplementedError
+
+
+class GeminiBackend(SummarizerBackend):
+    name = MODEL_NAME
+
+    def summarize_batch(self, transcripts):
+        if len(transcripts) == 1:
+            return [json.loads(get_gemini_response(transcripts[0]))]
+        import google.generativeai as genai
+
+        parts = [BATCH_PROMPT.format(count=len(transcripts))]
+        for i, transcript in enumerate(transcripts, 1):
+            parts.append(f"CONVERSATION {i}:\n{transcript}\n")
+        response = _get_gemini_model().generate_content("\n".join(parts), generation_config=genai.GenerationConfig(
+            response_mime_type="application/json", response_schema=list[Summary],
+            max_output_tokens=100 * len(transcripts),
+        ))
+        summaries = json.loads(response.text)
+        if len(summaries) != len(transcripts):
+            # The model merged or dropped conversations; fall back to one call each
+            return [json.loads(get_gemini_response(t)) for t in transcripts]
+        return summaries
+
+
+class CallableBackend(SummarizerBackend):
+    """Adapts a plain `llm(transcript) -> json str` function, e.g. a test stub."""
+
+    def __init__(self, llm, name=None):
+        self.llm = llm
+        self.name = name or getattr(llm, "__name__", "callable")
+
+    def summarize_batch(self, transcripts):
+        return [json.loads(self.llm(t)) for t in transcripts]
+
+
+def make_backend(kind: str) -> SummarizerBackend:
+    """Builds a backend by name: "gemini" (default), "local" or "stub"."""
+    if kind == "local":
+        from local_summarizer import ExtractiveBackend
+        return ExtractiveBackend()
+    if kind == "stub":
+        from summary_jobs import stub_llm
+        return CallableBackend(stub_llm)
+    return GeminiBackend()
+
+
+class _Batcher:
+    """
+    Groups concurrent calls into one backend invocation. The first caller waits
+    `max_wait` seconds for others to join, then runs batches of up to
+    `max_batch` until nothing is pending; everyone else just waits for a result.
+    """
+
+    def __init__(self, fn, max_batch=8, max_wait=0.05):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending = []
+        self._lock = threading.Lock()
+        self._leader = False
+
+    def submit(self, item):
+        future = Future()
+        with self._lock:
+            self._pending.append((item, future))
+            lead = not self._leader
+            self._leader = True
+        if lead:
+            if self.max_batch > 1:
+                time.sleep(self.max_wait)
+            self._drain()
+        return future.result()
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._leader = False
+                    return
+                batch = self._pending[:self.max_batch]
+                self._pending = self._pending[self.max_batch:]
+            items = [item for item, _ in batch]
+            try:
+                results = self.fn(items)
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+
+class Summarizer:
+    """
+    Summarizes transcripts through a SummarizerBackend, skipping trivial
+    transcripts and reusing cached results for repeated ones. Identical
+    transcripts summarized concurrently (e.g. a group visit fanned out to
+    several sessions) only reach the backend once, and different ones arriving
+    together are sent as a single batch.
+    """
+
+    def __init__(self, backend=None, cache=None, max_batch=8, max_wait=0.05):
+        self.backend = backend or GeminiBackend()
+        self.cache = cache
+        self._batcher = _Batcher(self._call_backend, max_batch=max_batch, max_wait=max_wait)
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    def _call_backend(self, transcripts):
+        registry.observe("llm_batch_size", len(transcripts), backend=self.backend.name)
+        with registry.time("llm_call_seconds", backend=self.backend.name):
+            return self.backend.summarize_batch(transcripts)
+
+    def summarize(self, transcript: str) -> dict:
+        if is_trivial(transcript):
+            return dict(TRIVIAL_SUMMARY)
+        if self.cache is None:
+            return self._batcher.submit(transcript)
+
+        key = self.cache.key(transcript, model=self.backend.name)
+        with self._inflight_lock:
+            key_lock = self._inflight.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                summary = self.cache.get(key)
+                if summary is None:
+                    summary = self._batcher.submit(transcript)
+                    self.cache.put(key, summary)
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+        return summary
+
+
+class RollingSummarizer:
+    """
+    Folds long recordings into a rolling summary while they are still going.
+
+    Every `every` new segments, the session's rolling summary and those segments
+    are summarized again in the background, so stopping a long visit only has
+    to summarize the short tail recorded since the last fold.
+    """
+
+    def __init__(self, summarizer: Summarizer, every=20, workers=1):
+        self.summarizer = summarizer
+        self.every = every
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rolling-summary")
+
+    def on_segment(self, session):
+        """Call after a segment is added; schedules a fold when enough have piled up."""
+        if session.folding or len(session.unfolded()) < self.every:
+            return
+        session.folding = True
+        self._executor.submit(self._fold, session)
+
+    def _fold(self, session):
+        try:
+            with session.fold_lock:
+                self._fold_locked(session)
+        except Exception as e:
+            print(f"Rolling summary for {session.id} failed, will retry at stop: {e}")
+        finally:
+            session.folding = False
+
+    def _fold_locked(self, session):
+        upto = len(session.segments)
+        segments = session.segments[session.folded:upto]
+        if not segments:
+            return
+        session.rolling_summary = self.summarizer.summarize(session.summary_input(segments))
+        session.folded = upto
+
+    def finish(self, session) -> dict:
+        """Final summary of a stopped session; waits for any fold in progress."""
+        with session.fold_lock:
+            tail = session.unfolded()
+            if session.rolling_summary and is_trivial(" ".join(s["text"] for s in tail)):
+                return dict(session.rolling_summary)
+            return self.summarizer.summarize(session.summary_input(tail))
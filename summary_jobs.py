@@ -0,0 +1,135 @@
+import json
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class QueueFull(Exception):
+    """Raised when too many summaries are already waiting to be processed."""
+
+
+def stub_llm(transcript: str) -> str:
+    """Offline stand-in for Gemini that returns a fixed Summary-shaped reply."""
+    words = transcript.split()
+    return json.dumps({
+        "name": "no_name",
+        "Relationship": "acquaintances",
+        "convo_summary": " ".join(words[:20]),
+    })
+
+
+def _client_error(e: Exception) -> bool:
+    """True for an HTTP 4xx from requests' raise_for_status(): the request itself is wrong."""
+    status = getattr(getattr(e, "response", None), "status_code", None)
+    return status is not None and status < 500
+
+
+class SummaryJobQueue:
+    """
+    Bounded worker pool that turns finished transcripts into summaries.
+
+    `handler(session_id, payload)` does the actual work (LLM call, backend
+    push) on a worker thread and returns a JSON-serializable result. Failures
+    are retried with exponential backoff, except HTTP 4xx responses, which
+    would only be rejected again; `submit` raises QueueFull instead of
+    letting the backlog grow without limit.
+    """
+
+    def __init__(self, handler, workers=2, max_pending=32, max_retries=3, backoff=1.0, keep_finished=256):
+        self.handler = handler
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.keep_finished = keep_finished
+        self.max_pending = max_pending
+        # One extra slot per worker for its shutdown sentinel, so shutdown never blocks on a full queue
+        self._queue = queue.Queue(maxsize=max_pending + workers)
+        self._stopping = False
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"summary-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def shutdown(self):
+        """Lets the workers finish the jobs already queued, then stops them."""
+        with self._lock:
+            self._stopping = True
+        for _ in self._threads:
+            self._queue.put_nowait(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def submit(self, session_id: str, payload) -> str:
+        job_id = str(uuid.uuid4())
+        job = {
+            "job_id": job_id,
+            "id": session_id,
+            "status": "queued",
+            "attempts": 0,
+            "submitted_at": time.time(),
+            "result": None,
+            "error": None,
+        }
+        with self._lock:
+            if self._stopping:
+                raise QueueFull("Summary queue is shutting down")
+            if self._queue.qsize() >= self.max_pending:
+                raise QueueFull(f"{self.max_pending} summaries already pending")
+            self._jobs[job_id] = job
+            self._queue.put_nowait((job_id, payload))
+        return job_id
+
+    def status(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+            if fields.get("status") in ("done", "failed"):
+                self._trim()
+
+    def _trim(self):
+        finished = [k for k, j in self._jobs.items() if j["status"] in ("done", "failed")]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            job_id, payload = item
+            self._run(job_id, payload)
+            self._queue.task_done()
+
+    def _run(self, job_id, payload):
+        session_id = self.status(job_id)["id"]
+        for attempt in range(1, self.max_retries + 1):
+            self._update(job_id, status="running", attempts=attempt)
+            try:
+                result = self.handler(session_id, payload)
+                self._update(job_id, status="done", result=result, error=None)
+                return
+            except Exception as e:
+                print(f"Summary job {job_id} attempt {attempt} failed: {e}")
+                self._update(job_id, error=str(e))
+                if _client_error(e):
+                    break
+                if attempt < self.max_retries:
+                    time.sleep(self.backoff * 2 ** (attempt - 1))
+        self._update(job_id, status="failed")
@@ -0,0 +1,138 @@
+import os
+import queue
+import sys
+import threading
+import time
+import numpy as np
+
+SAMPLE_RATE = 16000  # Whisper's native rate
+DEFAULT_MODEL = os.getenv("WHISPER_MODEL", "openai/whisper-base")
+MODEL_SIZES = ["tiny", "base", "small", "medium", "large"]
+
+
+def load_whisper(model_name=DEFAULT_MODEL, quantize=False):
+    """
+    Builds the Whisper pipeline once. On CPU, `quantize=True` applies dynamic
+    int8 quantization to the Linear layers, which is most of Whisper's compute.
+    """
+    import torch
+    from transformers import pipeline
+
+    device = 0 if torch.cuda.is_available() else -1
+    asr = pipeline("automatic-speech-recognition", model=model_name, device=device)
+    if quantize and device == -1:
+        asr.model = torch.quantization.quantize_dynamic(asr.model, {torch.nn.Linear}, dtype=torch.qint8)
+    return asr
+
+
+class TranscriptionService:
+    """
+    Keeps one Whisper model loaded and transcribes 16 kHz float32 segments on a
+    background thread, so capture never waits on inference. Segments that queue
+    up while the model is busy are transcribed together as one batch.
+    """
+
+    def __init__(self, model_name=DEFAULT_MODEL, quantize=False, max_batch=8, on_text=None, asr=None):
+        self.model_name = model_name
+        self.max_batch = max_batch
+        self.on_text = on_text or (lambda text, segment: print("Transcription:", text))
+        self.asr = asr or load_whisper(model_name, quantize)
+        self.audio_seconds = 0.0
+        self.inference_seconds = 0.0
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="whisper", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, samples: np.ndarray):
+        """Queues a mono float32 segment at 16 kHz for transcription."""
+        self._queue.put(np.asarray(samples, dtype=np.float32))
+
+    def transcribe_batch(self, segments):
+        inputs = [{"raw": s, "sampling_rate": SAMPLE_RATE} for s in segments]
+        start = time.perf_counter()
+        results = self.asr(inputs, batch_size=len(inputs))
+        self.inference_seconds += time.perf_counter() - start
+        self.audio_seconds += sum(len(s) for s in segments) / SAMPLE_RATE
+        return [r["text"] for r in results]
+
+    def real_time_factor(self) -> float:
+        """Inference time divided by audio duration (below 1.0 keeps up with live audio)."""
+        return self.inference_seconds / self.audio_seconds if self.audio_seconds else 0.0
+
+    def _run(self):
+        while True:
+            segment = self._queue.get()
+            if segment is None:
+                return
+            batch = [segment]
+            stopping = False
+            while len(batch) < self.max_batch:
+                try:
+                    more = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if more is None:
+                    stopping = True
+                    break
+                batch.append(more)
+            try:
+                for text, seg in zip(self.transcribe_batch(batch), batch):
+                    self.on_text(text, seg)
+            except Exception as e:
+                print(f"Transcription failed: {e}")
+            if stopping:
+                return
+
+
+def load_fixtures(paths):
+    """Speech WAV files as 16 kHz float32 segments."""
+    from voice import read_wav
+
+    segments = []
+    for path in paths:
+        samples, rate = read_wav(path)
+        if rate != SAMPLE_RATE:
+            positions = np.arange(0, len(samples) / rate, 1 / SAMPLE_RATE)
+            samples = np.interp(positions, np.arange(len(samples)) / rate, samples).astype(np.float32)
+        segments.append(samples)
+    return segments
+
+
+def report_rtf(sizes, paths, quantize=False):
+    """
+    Prints CPU real-time factor for each Whisper size on recorded speech;
+    noise makes the decoder stop early or hallucinate, so it shows little of
+    the real cost.
+    """
+    segments = load_fixtures(paths)
+    print(f"{len(segments)} fixtures, {sum(len(s) for s in segments) / SAMPLE_RATE:.1f}s of speech")
+    for size in sizes:
+        name = size if "/" in size else f"openai/whisper-{size}"
+        start = time.perf_counter()
+        service = TranscriptionService(name, quantize=quantize, on_text=lambda *_: None)
+        load = time.perf_counter() - start
+        service.transcribe_batch(segments[:1])  # Warm-up
+        service.audio_seconds = service.inference_seconds = 0.0
+        texts = service.transcribe_batch(segments)
+        print(f"{name}{' int8' if quantize else ''}: load {load:.1f}s, RTF {service.real_time_factor():.2f}, "
+              f"{sum(len(t.split()) for t in texts)} words, e.g. {texts[0].strip()[:60]!r}")
+
+
+if __name__ == "__main__":
+    # python transcriber.py [--int8] [tiny base small] [speech.wav ...], fixtures default to wavs/
+    import glob
+
+    args = sys.argv[1:]
+    wavs = [a for a in args if a.endswith(".wav")] or sorted(glob.glob("wavs/*.wav"))
+    sizes = [a for a in args if a != "--int8" and not a.endswith(".wav")]
+    report_rtf(sizes or MODEL_SIZES[:3], wavs, quantize="--int8" in args)
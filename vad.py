@@ -0,0 +1,138 @@
+import numpy as np
+
+try:
+    import webrtcvad
+except ImportError:  # Optional: falls back to the energy detector
+    webrtcvad = None
+
+
+class EnergyVAD:
+    """
+    Frame energy detector whose threshold is calibrated once from ambient
+    noise: the first `calibration_frames` frames set the noise floor, and
+    speech is anything `ratio` times louder than it.
+    """
+
+    def __init__(self, calibration_frames=33, ratio=3.0, min_rms=0.003):
+        self.calibration_frames = calibration_frames
+        self.ratio = ratio
+        self.min_rms = min_rms
+        self.threshold = None
+        self._noise = []
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        rms = float(np.sqrt(np.mean(np.square(frame))))
+        if self.threshold is None:
+            self._noise.append(rms)
+            if len(self._noise) >= self.calibration_frames:
+                self.threshold = max(float(np.median(self._noise)) * self.ratio, self.min_rms)
+                print(f"VAD calibrated: noise floor {np.median(self._noise):.4f}, threshold {self.threshold:.4f}")
+            return False
+        return rms > self.threshold
+
+
+class WebRTCVAD:
+    """Google's WebRTC VAD (needs 10/20/30 ms frames at 8/16/32/48 kHz)."""
+
+    def __init__(self, rate, aggressiveness=2):
+        self.rate = rate
+        self.vad = webrtcvad.Vad(aggressiveness)
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        pcm = (np.clip(frame, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+        return self.vad.is_speech(pcm, self.rate)
+
+
+def default_vad(rate):
+    if webrtcvad is not None and rate in (8000, 16000, 32000, 48000):
+        return WebRTCVAD(rate)
+    return EnergyVAD()
+
+
+class SpeechSegmenter:
+    """
+    Splits a float32 audio stream into speech segments for recognition.
+
+    A segment opens after `min_speech_ms` of consecutive speech frames (with
+    `preroll_ms` of audio before it, so first syllables aren't clipped) and
+    closes after `hangover_ms` of non-speech, so short pauses don't split a
+    sentence. Silence never reaches downstream recognition.
+    """
+
+    def __init__(self, rate=16000, frame_ms=30, vad=None, min_speech_ms=90, hangover_ms=400, preroll_ms=150, max_segment_s=15):
+        self.rate = rate
+        self.frame = rate * frame_ms // 1000
+        self.vad = vad or default_vad(rate)
+        self.min_speech = max(1, min_speech_ms // frame_ms)
+        self.hangover = max(1, hangover_ms // frame_ms)
+        self.preroll = preroll_ms // frame_ms
+        self.max_frames = max_segment_s * 1000 // frame_ms
+        self.frames_total = 0
+        self.frames_emitted = 0
+        self._leftover = np.zeros(0, dtype=np.float32)
+        self._recent = []  # Frames before a segment opens (pre-roll + speech onset)
+        self._segment = []
+        self._speech_run = 0
+        self._silence_run = 0
+
+    def push(self, samples: np.ndarray):
+        """Feeds audio; returns the list of segments that finished during it."""
+        samples = np.concatenate((self._leftover, np.asarray(samples, dtype=np.float32)))
+        usable = len(samples) - len(samples) % self.frame
+        self._leftover = samples[usable:]
+        done = []
+        for frame in samples[:usable].reshape(-1, self.frame):
+            segment = self._step(frame)
+            if segment is not None:
+                done.append(segment)
+        return done
+
+    def flush(self):
+        """Closes any open segment (e.g. when capture stops)."""
+        return self._close() if self._segment else None
+
+    def passed_fraction(self) -> float:
+        """Share of audio forwarded to recognition so far."""
+        return self.frames_emitted / self.frames_total if self.frames_total else 0.0
+
+    def _step(self, frame):
+        self.frames_total += 1
+        speech = self.vad.is_speech(frame)
+
+        if not self._segment:
+            self._recent.append(frame)
+            self._speech_run = self._speech_run + 1 if speech else 0
+            if self._speech_run >= self.min_speech:
+                self._segment = self._recent[-(self.min_speech + self.preroll):]
+                self._recent = []
+                self._silence_run = 0
+            else:
+                del self._recent[:-(self.min_speech + self.preroll)]
+            return None
+
+        self._segment.append(frame)
+        self._silence_run = 0 if speech else self._silence_run + 1
+        if self._silence_run >= self.hangover or len(self._segment) >= self.max_frames:
+            return self._close()
+        return None
+
+    def _close(self):
+        segment = np.concatenate(self._segment)
+        self.frames_emitted += len(self._segment)
+        self._segment = []
+        self._speech_run = 0
+        self._silence_run = 0
+        return segment
+
+
+def calibrate_recognizer(recognizer, source, duration=1.0):
+    """
+    Sets a speech_recognition Recognizer's energy threshold from ambient noise
+    once, instead of hardcoding it or re-measuring before every utterance.
+    """
+    if getattr(recognizer, "_smriti_calibrated", False):
+        return
+    recognizer.adjust_for_ambient_noise(source, duration=duration)
+    recognizer.dynamic_energy_threshold = False
+    recognizer._smriti_calibrated = True
+    print(f"Energy threshold calibrated to {recognizer.energy_threshold:.0f}")
@@ -9,6 +9,10 @@ import base64
 import os
 from dotenv import load_dotenv
 import time
+from event_bus import FaceEntered, FaceLeft
+import face_quality
+import face_detectors
+import face_embeddings
 
 load_dotenv()
 
@@ -42,6 +46,38 @@ def create_embedding(img_path):
     return embedding
 
 
+# FACE_DETECTOR picks the backend (hog, haar, yunet); FACE_MIN_PX the smallest face to find
+detector = face_detectors.get_detector()
+
+
+def detect_face(frame):
+    """(crop, quality) for the largest face in the frame, or None if there is none."""
+    boxes = face_detectors.detect(detector, frame)
+    if not boxes:
+        return None
+    top, right, bottom, left = max(boxes, key=lambda b: (b[1] - b[3]) * (b[2] - b[0]))
+    return frame[top:bottom, left:right], face_quality.assess(frame, (top, right, bottom, left))
+
+
+# FACE_EMBEDDER=onnx swaps DeepFace for an ONNX Runtime model (see face_embeddings)
+embedder = face_embeddings.OnnxEmbedder() if os.getenv("FACE_EMBEDDER") == "onnx" else None
+
+
+def embed_face(crop):
+    if embedder is not None:
+        rgb = np.ascontiguousarray(crop[:, :, ::-1])
+        return np.asarray(embedder.face_encodings(rgb, [(0, crop.shape[1], crop.shape[0], 0)]), dtype="float32")
+    # The crop is already a face: skip DeepFace's own detection pass
+    embedding_objs = DeepFace.represent(img_path=crop, detector_backend="skip")
+    return np.array(embedding_objs[0]["embedding"], dtype="float32").reshape(1, -1)
+
+
+# Unknown faces are enrolled once, from the best of a few sightings. Squared L2
+# like the FAISS index; the threshold is the same as recognition's score > 0.7.
+enrollment = face_quality.EnrollmentTracks(
+    lambda a, b: float(((a - b) ** 2).sum()), threshold=1 / 0.7 - 1, min_sightings=2, max_wait=15)
+
+
 def update_database(id_database, index):
     id = str(uuid.uuid4())
     id_database[index.ntotal - 1] = id
@@ -51,8 +87,9 @@ def update_database(id_database, index):
     return id
 
 
-def add_person_to_index(frame, index):
-    embedding = create_embedding(frame)
+def add_person_to_index(frame, index, embedding=None):
+    if embedding is None:
+        embedding = create_embedding(frame)
     index.add(embedding)
     person_id = update_database(id_database, index)
 
@@ -64,6 +101,7 @@ def add_person_to_index(frame, index):
     # write_index(index, f"faiss_index")
 
     print(f"Added person with ID: {person_id}")
+    return person_id
 
 
 """
@@ -85,36 +123,62 @@ SAMPLING -----------------------------------------------------------------------
 
 
 def recognize_face_in_frame(frame, index):
+    """
+    Returns the id of the person in the frame, or None if there is no usable
+    face. Blurred, dark or too-small faces are skipped before the (slow)
+    embedding; new faces are enrolled once they have been seen a few times.
+    """
     try:
-        embedding = create_embedding(frame)
-
-        k = 1
-        distances, indices = index.search(embedding, k)
-        score = 1 / (1 + distances[0][0])
-
-        if score > 0.7:
-            person_id = id_database.get(indices[0][0])
-            if person_id:
-                print(f"Recognized: {person_id}, Score: {score}")
-            else:
+        detected = detect_face(frame)
+        if detected is None:
+            return None
+        crop, quality = detected
+        if not quality.ok:
+            print(f"Skipped face: {', '.join(quality.reasons)}")
+            return None
+        embedding = embed_face(crop)
+
+        person_id = None
+        if index.ntotal:
+            distances, indices = index.search(embedding, 1)
+            score = 1 / (1 + distances[0][0])
+            if score > 0.7:
+                person_id = id_database.get(indices[0][0])
+                if person_id:
+                    print(f"Recognized: {person_id}, Score: {score}")
+                    return person_id
                 print("High score, but Unknown Face Detected without id!")
-                add_person_to_index(frame, index)
-        else:
-            print("Unknown Face Detected with low score!")
-            add_person_to_index(frame, index)
+            else:
+                print("Unknown Face Detected with low score!")
+
+        # Every track that is ready gets enrolled, but only the one this face
+        # joined is the person in this frame
+        current = enrollment.add(embedding[0], quality, crop)
+        person_id = None
+        for track in enrollment.ready():
+            best, _, best_crop = track["best"]
+            new_id = add_person_to_index(best_crop, index, best.reshape(1, -1))
+            if track is current:
+                person_id = new_id
+        return person_id
 
     except Exception as e:
         print(f"Error during face recognition: {e}")
-        pass
+        return None
 
 
-def video():
+def video(bus=None, stop_event=None, absent_checks=2):
+    """
+    Runs the webcam loop. With an EventBus, publishes FaceEntered when a person
+    appears and FaceLeft once they have been missing for `absent_checks`
+    consecutive recognitions.
+    """
     global id_database
 
     # Generate an embedding from the first image to determine dimensionality
     # first_embedding_obj = DeepFace.represent(img_path="img1.jpg")
     # embedding_dim = len(first_embedding_obj[0]["embedding"])
-    embedding_dim = 4096
+    embedding_dim = 4096 if embedder is None else embedder.dim
 
     # Create the FAISS index
     index = faiss.IndexFlatL2(embedding_dim)
@@ -130,8 +194,10 @@ def video():
         exit()
 
     last_recognition_time = time.time()
+    present = None
+    missed = 0
 
-    while True:
+    while not (stop_event and stop_event.is_set()):
         ret, frame = video_capture.read()
         if not ret:
             break
@@ -139,17 +205,33 @@ def video():
         # Get current time
         current_time = time.time()
 
-        # Only perform recognition if 5 seconds have passed
+        # Only perform recognition if 3 seconds have passed
         if current_time - last_recognition_time >= 3:
-            recognize_face_in_frame(frame, index)
+            person_id = recognize_face_in_frame(frame, index)
             last_recognition_time = current_time
 
+            if bus is not None:
+                if person_id and person_id != present:
+                    if present:
+                        bus.publish(FaceLeft(present))
+                    present, missed = person_id, 0
+                    bus.publish(FaceEntered(person_id))
+                elif person_id:
+                    missed = 0
+                elif present:
+                    missed += 1
+                    if missed >= absent_checks:
+                        bus.publish(FaceLeft(present))
+                        present, missed = None, 0
+
         # Display the frame (this still happens every frame for smooth video)
         cv2.imshow("Video", frame)
 
         if cv2.waitKey(1) & 0xFF == ord("q"):
             break
 
+    if bus is not None and present:
+        bus.publish(FaceLeft(present))
     video_capture.release()
     cv2.destroyAllWindows()
 
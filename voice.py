@@ -1,8 +1,80 @@
-import speech_recognition as sr
-from pydub import AudioSegment
-from pydub.silence import detect_nonsilent
+import sys
+import time
 import wave
-import pyaudio
+import numpy as np
+import speech_recognition as sr
+
+# Audio recording parameters
+CHUNK = 1024
+CHANNELS = 1
+RATE = 44100
+SILENCE_RMS = 0.01  # Chunk RMS (float samples in [-1, 1]) below this counts as silence
+SILENCE_CHUNKS = 30  # 30 chunks of silence (about 0.7 seconds)
+MAX_SECONDS = 30  # Longest sentence kept; older audio is overwritten
+
+
+class AudioRing:
+    """Preallocated float32 ring buffer holding the most recent audio."""
+
+    def __init__(self, capacity: int):
+        self.buffer = np.zeros(capacity, dtype=np.float32)
+        self.capacity = capacity
+        self.pos = 0
+        self.filled = 0
+
+    def write(self, samples: np.ndarray):
+        n = len(samples)
+        if n >= self.capacity:
+            self.buffer[:] = samples[-self.capacity:]
+            self.pos, self.filled = 0, self.capacity
+            return
+        end = self.pos + n
+        if end <= self.capacity:
+            self.buffer[self.pos:end] = samples
+        else:
+            split = self.capacity - self.pos
+            self.buffer[self.pos:] = samples[:split]
+            self.buffer[:end - self.capacity] = samples[split:]
+        self.pos = end % self.capacity
+        self.filled = min(self.filled + n, self.capacity)
+
+    def contents(self) -> np.ndarray:
+        """Samples in recording order (a view unless the buffer has wrapped)."""
+        if self.filled < self.capacity:
+            return self.buffer[:self.filled]
+        return np.concatenate((self.buffer[self.pos:], self.buffer[:self.pos]))
+
+
+def chunk_rms(samples: np.ndarray) -> float:
+    return float(np.sqrt(np.mean(np.square(samples, dtype=np.float32))))
+
+
+class EndOfSentence:
+    """
+    Ends a sentence after `chunks` quiet chunks in a row. Silence before the
+    first loud chunk doesn't count, so a pause before the user starts speaking
+    doesn't end the recording with nothing captured.
+    """
+
+    def __init__(self, threshold=SILENCE_RMS, chunks=SILENCE_CHUNKS):
+        self.threshold = threshold
+        self.chunks = chunks
+        self.heard = False
+        self.silence = 0
+
+    def update(self, samples: np.ndarray) -> bool:
+        if chunk_rms(samples) >= self.threshold:
+            self.heard = True
+            self.silence = 0
+        elif self.heard:
+            self.silence += 1
+        return self.silence >= self.chunks
+
+
+def to_audio_data(samples: np.ndarray, rate=RATE) -> sr.AudioData:
+    """Wraps float samples as 16-bit PCM AudioData for the recognizer, without a temp file."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    return sr.AudioData(pcm.tobytes(), rate, 2)
 
 
 def record_until_sentence():
@@ -11,14 +83,9 @@ def record_until_sentence():
     Returns the transcribed text.
 
     Requirements:
-    pip install SpeechRecognition pyaudio pydub
+    pip install SpeechRecognition pyaudio numpy
     """
-
-    # Audio recording parameters
-    CHUNK = 1024
-    FORMAT = pyaudio.paFloat32
-    CHANNELS = 1
-    RATE = 44100
+    import pyaudio
 
     # Initialize recognizer
     recognizer = sr.Recognizer()
@@ -30,27 +97,18 @@ def record_until_sentence():
 
     # Start recording
     stream = audio.open(
-        format=FORMAT, channels=CHANNELS, rate=RATE, input=True, frames_per_buffer=CHUNK
+        format=pyaudio.paFloat32, channels=CHANNELS, rate=RATE, input=True, frames_per_buffer=CHUNK
     )
 
-    frames = []
-    silence_threshold = 30  # 30 frames of silence (about 0.7 seconds)
-    silence_count = 0
+    ring = AudioRing(RATE * MAX_SECONDS)
+    end = EndOfSentence()
 
     try:
-        # Record until we detect end of sentence (prolonged silence)
+        # Record until we detect end of sentence (prolonged silence after speech)
         while True:
-            data = stream.read(CHUNK)
-            frames.append(data)
-
-            # Check for silence
-            if max(abs(float(x)) for x in data) < 0.01:  # Adjust threshold as needed
-                silence_count += 1
-            else:
-                silence_count = 0
-
-            # If we detect enough silence, assume end of sentence
-            if silence_count >= silence_threshold:
+            samples = np.frombuffer(stream.read(CHUNK), dtype=np.float32)
+            ring.write(samples)
+            if end.update(samples):
                 break
 
     finally:
@@ -59,27 +117,74 @@ def record_until_sentence():
         stream.close()
         audio.terminate()
 
-    # Save recording temporarily
-    with wave.open("temp_recording.wav", "wb") as wf:
-        wf.setnchannels(CHANNELS)
-        wf.setsampwidth(audio.get_sample_size(FORMAT))
-        wf.setframerate(RATE)
-        wf.writeframes(b"".join(frames))
-
-    # Convert speech to text
+    # Convert speech to text straight from memory
     try:
-        with sr.AudioFile("temp_recording.wav") as source:
-            audio_data = recognizer.record(source)
-            text = recognizer.recognize_google(audio_data)
-            return text
+        return recognizer.recognize_google(to_audio_data(ring.contents()))
     except sr.UnknownValueError:
         return "Could not understand audio"
     except sr.RequestError:
         return "Could not request results from speech recognition service"
 
 
+def read_wav(path):
+    """Loads a WAV file as mono float32 samples in [-1, 1]."""
+    with wave.open(path, "rb") as wf:
+        rate, width, channels = wf.getframerate(), wf.getsampwidth(), wf.getnchannels()
+        raw = wf.readframes(wf.getnframes())
+    dtype = {1: np.uint8, 2: "<i2", 4: "<i4"}[width]
+    samples = np.frombuffer(raw, dtype=dtype).astype(np.float32)
+    if width == 1:
+        samples = (samples - 128) / 128
+    else:
+        samples /= float(2 ** (8 * width - 1))
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+def benchmark(paths):
+    """
+    Replays WAV fixtures through the old per-byte silence check and the new
+    NumPy capture path, chunk by chunk, and prints CPU seconds spent per
+    second of audio for each, the chunks each counts as silent, and where the
+    new path would end the sentence.
+    """
+    for path in paths:
+        samples, rate = read_wav(path)
+        chunk_size = CHUNK * rate // RATE  # Same chunk duration as live capture
+        raw_chunks = [samples[i:i + chunk_size].tobytes() for i in range(0, len(samples), chunk_size)]
+        seconds = len(samples) / rate
+
+        start = time.process_time()
+        old_silent = 0
+        for data in raw_chunks:
+            old_silent += max(abs(float(x)) for x in data) < 0.01
+        old_cpu = time.process_time() - start
+
+        start = time.process_time()
+        ring = AudioRing(rate * MAX_SECONDS)
+        end = EndOfSentence()
+        new_silent, ended_at = 0, None
+        for i, data in enumerate(raw_chunks):
+            chunk = np.frombuffer(data, dtype=np.float32)
+            ring.write(chunk)
+            new_silent += chunk_rms(chunk) < SILENCE_RMS
+            if end.update(chunk) and ended_at is None:
+                ended_at = (i + 1) * chunk_size / rate
+        to_audio_data(ring.contents(), rate)
+        new_cpu = time.process_time() - start
+
+        print(f"{path}: {seconds:.1f}s audio | per-byte loop {old_cpu / seconds * 1000:.2f} ms CPU/s, "
+              f"{old_silent}/{len(raw_chunks)} chunks silent | numpy {new_cpu / seconds * 1000:.3f} ms CPU/s, "
+              f"{new_silent}/{len(raw_chunks)} silent, sentence ends at "
+              f"{f'{ended_at:.1f}s' if ended_at else 'never'} | {old_cpu / max(new_cpu, 1e-9):.0f}x")
+
+
 # Example usage
 if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--bench":
+        benchmark(sys.argv[2:])
+        sys.exit()
     try:
         result = record_until_sentence()
         print(f"Transcribed text: {result}")